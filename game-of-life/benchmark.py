@@ -0,0 +1,433 @@
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import cli
+import formats
+from core import Board, Rule
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'examples')
+# Committed results the default run is compared with, regenerated by --update-baseline
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Long-lived patterns from a few cells, living cells from the top left corner of the pattern
+METHUSELAHS = {
+    'r-pentomino': [(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)],
+    'acorn': [(0, 1), (1, 3), (2, 0), (2, 1), (2, 4), (2, 5), (2, 6)],
+}
+METHUSELAH_SIZES = (128, 512, 2048)
+SOUP_SIZE = 512
+SOUP_DENSITIES = (10, 30, 50)      # Percent of living cells
+
+RULE = 'B3/R23'
+
+# Frames are rendered like in the application, without a window
+FRAME_WIDTH = 1000
+FRAME_HEIGHT = 700
+FRAME_CELL_SIZE = 5
+FRAME_BG = (0, 0, 0)
+FRAME_STROKE = (50, 50, 50)
+FRAME_FILL = (255, 255, 255)
+
+# Measured values and whether higher values are better
+METRICS = {
+    'gens_per_s': True,
+    'cells_per_s': True,
+    'peak_memory': False,
+    'save_ms': False,
+    'read_ms': False,
+    'first_frame_ms': False,
+    'frame_ms': False,
+}
+TOLERANCE = 0.4         # Allowed relative change of a metric against the baseline
+MIN_TIME_MS = 1.0       # Shorter times vary too much to be compared
+
+# Results measured elsewhere are compared only in final populations, times differ too much
+PLATFORM_KEYS = ('python', 'numpy', 'machine', 'system')
+
+RESULTS_VERSION = 1
+
+
+class Workload:
+    """A board to measure: bounded of the given size, or unbounded if the size is None.
+    The setup function adds living cells to the empty board, using the random generator."""
+
+    def __init__(self, name: str, size: tuple, setup) -> None:
+        """Initialize instance variables."""
+
+        self.__name = name
+        self.__size = size
+        self.__setup = setup
+
+    # PROPERTIES
+    # region
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def size(self) -> tuple:
+        return self.__size
+    # endregion
+
+    def create_board(self, engine_name: str, workers: int, seed: int) -> Board:
+        """Create the board with a new engine. The same seed gives the same cells.
+        Return None if the engine does not simulate a bounded or an unbounded board."""
+
+        rule = Rule('B', 'R', '/')
+        rule.try_set_rule(RULE)
+
+        board = Board(cli.create_engine(engine_name, workers))
+        if not (board.engine.BOUNDED_GRID if self.__size != None else board.engine.UNBOUNDED_PLANE):
+            close_engine(board)
+            return None
+        board.rule = rule.table
+        if self.__size != None:
+            board.empty_board(*self.__size)
+        else:
+            board.empty_unbounded()
+
+        self.__setup(board, random.Random('{}:{}'.format(seed, self.__name)))
+        return board
+
+
+def soup(density: int):
+    """Return the setup of a random soup with the percent of living cells."""
+
+    def setup(board: Board, generator: random.Random) -> None:
+        cells = [(i, j) for i in range(board.height) for j in range(board.width)
+                 if generator.random() * 100 < density]
+        board.add_many(cells)
+
+    return setup
+
+
+def example(file_name: str):
+    """Return the setup of a board loaded from the examples directory."""
+
+    def setup(board: Board, generator: random.Random) -> None:
+        if not formats.load_pattern(board, os.path.join(EXAMPLES, file_name)):
+            raise ValueError('Wrong or damaged file ' + file_name + '.')
+
+    return setup
+
+
+def methuselah(cells: list):
+    """Return the setup of a pattern placed in the middle of the board."""
+
+    def setup(board: Board, generator: random.Random) -> None:
+        board.stamp(cells, board.height // 2, board.width // 2)
+
+    return setup
+
+
+def create_workloads() -> list:
+    """Return all workloads in the order they are measured."""
+
+    workloads = [Workload('soup-' + str(density), (SOUP_SIZE, SOUP_SIZE), soup(density))
+                 for density in SOUP_DENSITIES]
+    workloads.append(Workload('pulsar', None, example('pulsar.txt')))
+    workloads.append(Workload('line', None, example('line.txt')))
+    for name, cells in METHUSELAHS.items():
+        for size in METHUSELAH_SIZES:
+            workloads.append(Workload(name + '-' + str(size), (size, size), methuselah(cells)))
+    return workloads
+
+
+WORKLOAD_NAMES = [workload.name for workload in create_workloads()]
+
+
+def close_engine(board: Board) -> None:
+    """Stop workers of parallel engines."""
+
+    if hasattr(board.engine, 'close'):
+        board.engine.close()
+
+
+def best_time(work, repeat: int) -> float:
+    """Return the shortest time in seconds of repeated calls of the work."""
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def create_painter():
+    """Return a painter rendering frames without a window, None if Pillow or tkinter is missing."""
+
+    try:
+        import PIL.Image
+        from gol import Painter     # Loaded only when Pillow is installed, gol quits without it
+    except ImportError:
+        return None
+
+    painter = Painter()
+    painter.reset(FRAME_WIDTH, FRAME_HEIGHT, [FRAME_CELL_SIZE], FRAME_BG, FRAME_STROKE)
+    painter.fill = FRAME_FILL
+    painter.resize(FRAME_WIDTH, FRAME_HEIGHT)
+    return painter
+
+
+def measure(workload: Workload, engine_name: str, args: argparse.Namespace) -> dict:
+    """Measure one workload and return its results, None if the engine does not support the board.
+    Peak memory is traced in a separate run, tracing slows down the program. Memory of worker
+    processes of ProcessEngine is not included. The time of following frames is the median,
+    each of them is drawn only once."""
+
+    generations = args.generations
+
+    # Memory of creating the board and computing the generations
+    tracemalloc.start()
+    try:
+        board = workload.create_board(engine_name, args.workers, args.seed)
+        if board == None:
+            return None
+        for _ in range(generations):
+            board.next_gen()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    close_engine(board)
+
+    board = workload.create_board(engine_name, args.workers, args.seed)
+    initial = board.snapshot()
+
+    def step() -> None:
+        board.restore(initial)
+        for _ in range(generations):
+            board.next_gen()
+
+    step_time = best_time(step, args.repeat)
+
+    # Saving and reading the initial board
+    board.restore(initial)
+    text = board.save_to_string()
+    save_time = best_time(board.save_to_string, args.repeat)
+    reader = workload.create_board(engine_name, args.workers, args.seed)
+    read_time = best_time(lambda: reader.read_from_string(text), args.repeat)
+    close_engine(reader)
+
+    # Frames of the first generations, then the rest of generations for the population
+    painter = create_painter()
+    frame_times = []
+    populations = []
+    board.restore(initial)
+    if painter != None:
+        def first_frame() -> None:
+            painter.board = board       # A new board is drawn whole
+            painter.render_frame()
+
+        frame_times.append(best_time(first_frame, args.repeat))
+    for generation in range(generations):
+        board.next_gen()
+        populations.append(len(board.living))
+        if painter != None and generation < args.frames:
+            frame_times.append(best_time(painter.render_frame, 1))
+    close_engine(board)
+
+    # Bounded boards compute all their cells, unbounded ones only cells near living cells
+    if workload.size != None:
+        cells = workload.size[0] * workload.size[1] * generations
+    else:
+        cells = sum(populations)
+
+    result = {
+        'engine': engine_name,
+        'size': list(workload.size) if workload.size != None else None,
+        'generations': generations,
+        'population': len(initial.living),
+        'final_population': populations[-1] if populations else len(initial.living),
+        'gens_per_s': generations / step_time if step_time > 0 else None,
+        'cells_per_s': cells / step_time if step_time > 0 else None,
+        'peak_memory': peak_memory,
+        'save_ms': save_time * 1000,
+        'read_ms': read_time * 1000,
+        'first_frame_ms': frame_times[0] * 1000 if frame_times else None,
+        'frame_ms': statistics.median(frame_times[1:]) * 1000 if len(frame_times) > 1 else None,
+    }
+    return result
+
+
+def same_platform(results: dict, baseline: dict) -> bool:
+    """Return whether the baseline was measured with the same Python, NumPy and system."""
+
+    return all(results.get(key) == baseline.get(key) for key in PLATFORM_KEYS)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return descriptions of regressions of the results against the baseline: metrics worse
+    by more than the tolerance and boards that ended differently. Workloads measured
+    with another engine or number of generations and very short times are not compared,
+    metrics of a baseline from another platform neither."""
+
+    compare_metrics = same_platform(results, baseline)
+    regressions = []
+    for name, result in results['workloads'].items():
+        base = baseline.get('workloads', {}).get(name)
+        if (base == None or base.get('engine') != result['engine'] or
+            base.get('generations') != result['generations']):
+            continue
+
+        if base.get('final_population') != result['final_population']:
+            regressions.append('{}: final population {}, baseline {}'.format(
+                name, result['final_population'], base.get('final_population')))
+        if not compare_metrics:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            value, base_value = result.get(metric), base.get(metric)
+            if value == None or base_value == None or base_value <= 0:
+                continue
+            if metric.endswith('_ms') and value < MIN_TIME_MS and base_value < MIN_TIME_MS:
+                continue
+            change = value / base_value - 1
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append('{}: {} {:.4g}, baseline {:.4g} ({:+.0%})'.format(
+                    name, metric, value, base_value, change))
+    return regressions
+
+
+def format_value(value: float, scale: float = 1, digits: int = 1) -> str:
+    """Return a value for the table of results, a dash if it was not measured."""
+
+    return '{:.{}f}'.format(value / scale, digits) if value != None else '-'
+
+
+def print_result(name: str, result: dict) -> None:
+    """Print one row of the table of results."""
+
+    print('{:<18} {:>10} {:>10} {:>9} {:>9} {:>9} {:>11} {:>9}'.format(
+        name, format_value(result['gens_per_s']), format_value(result['cells_per_s'], 1e6),
+        format_value(result['peak_memory'], 1024 * 1024), format_value(result['save_ms'], digits=2),
+        format_value(result['read_ms'], digits=2), format_value(result['first_frame_ms']),
+        format_value(result['frame_ms'], digits=2)))
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Create the parser of command line arguments."""
+
+    parser = argparse.ArgumentParser(
+        description='Measure computing generations, saving, reading and rendering of boards '
+                    'without a window, optionally against a baseline of earlier results.')
+    parser.add_argument('-k', '--workloads', nargs='+', choices=WORKLOAD_NAMES, metavar='NAME',
+                        help='workloads to measure (default: all): ' + ', '.join(WORKLOAD_NAMES))
+    parser.add_argument('-n', '--generations', type=int, default=100,
+                        help='number of generations of each workload (default: 100)')
+    parser.add_argument('-e', '--engine', choices=cli.ENGINE_NAMES,
+                        help='engine computing generations (default: bit for bounded, '
+                             'sparse for unbounded boards)')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='number of threads or processes of parallel engines')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of timed runs, the fastest one is reported (default: 5)')
+    parser.add_argument('-f', '--frames', type=int, default=20,
+                        help='number of rendered frames after the first one (default: 20)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of random soups (default: 0)')
+    parser.add_argument('-o', '--output', help='file to write the results to as JSON')
+    parser.add_argument('-b', '--baseline', default=BASELINE,
+                        help='JSON file with earlier results, regressions end with an error '
+                             '(default: benchmark_baseline.json next to this script)')
+    baseline = parser.add_mutually_exclusive_group()
+    baseline.add_argument('-u', '--update-baseline', action='store_true',
+                          help='write the results to the baseline instead of comparing them')
+    baseline.add_argument('--no-baseline', action='store_true',
+                          help='do not compare the results with a baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed relative change against the baseline '
+                             '(default: {})'.format(TOLERANCE))
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """Measure the workloads, write the results and compare them with the baseline.
+    Return 1 if there is a regression."""
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.generations < 1 or args.repeat < 1 or args.frames < 0:
+        parser.error('generations and repeat must be positive, frames must not be negative.')
+
+    baseline = None
+    if not args.no_baseline and not args.update_baseline:
+        try:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError):
+            print('Could not read the baseline ' + args.baseline + ', create it with '
+                  '--update-baseline or run without it with --no-baseline.', file=sys.stderr)
+            return 1
+
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'numpy': np.__version__ if np != None else None,
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'frames': args.frames,
+        'frame_size': [FRAME_WIDTH, FRAME_HEIGHT],
+        'frame_cell_size': FRAME_CELL_SIZE,
+        'workloads': {},
+    }
+
+    print('{:<18} {:>10} {:>10} {:>9} {:>9} {:>9} {:>11} {:>9}'.format(
+        'Workload', 'Gens/s', 'Mcells/s', 'Peak MB', 'Save ms', 'Read ms', 'Frame 1 ms', 'Frame ms'))
+    for workload in create_workloads():
+        if args.workloads != None and workload.name not in args.workloads:
+            continue
+
+        engine_name = args.engine
+        if engine_name == None:
+            engine_name = 'bit' if workload.size != None else 'sparse'
+        result = measure(workload, engine_name, args)
+        if result == None:
+            print('{:<18} skipped, the engine {} does not support the board'.format(
+                workload.name, engine_name))
+            continue
+        results['workloads'][workload.name] = result
+        print_result(workload.name, result)
+
+    outputs = [args.output] if args.output != None else []
+    if args.update_baseline:
+        outputs.append(args.baseline)
+    for output in outputs:
+        try:
+            with open(output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+        except OSError:
+            print('Could not write to the file ' + output + '.', file=sys.stderr)
+            return 1
+
+    if baseline != None:
+        if not same_platform(results, baseline):
+            print('The baseline ' + args.baseline + ' was measured on another platform, '
+                  'only final populations are compared.')
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('REGRESSIONS against ' + args.baseline + ':', file=sys.stderr)
+            for regression in regressions:
+                print('  ' + regression, file=sys.stderr)
+            return 1
+        print('No regressions against ' + args.baseline + '.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+
+import argparse
+import sys
+import time
+import engines
+import formats
+from core import Board, Rule
+from topology import BOUNDED, TOPOLOGIES
+
+
+ENGINE_NAMES = ['list', 'numpy', 'bit', 'sparse', 'tiled', 'threaded', 'process', 'hashlife']
+
+
+def create_engine(name: str, workers: int) -> engines.Engine:
+    """Create an engine by its name, parallel engines use the given number of workers."""
+
+    if name == 'list':
+        return engines.ListEngine()
+    if name == 'numpy':
+        return engines.NumpyEngine()
+    if name == 'bit':
+        return engines.BitEngine()
+    if name == 'sparse':
+        return engines.SparseEngine()
+    if name == 'tiled':
+        return engines.TiledEngine()
+    if name == 'threaded':
+        return engines.ThreadedEngine(workers)
+    if name == 'process':
+        return engines.ProcessEngine(workers)
+    if name == 'hashlife':
+        from hashlife import HashLifeEngine     # Loaded only when used
+        return HashLifeEngine()
+    raise ValueError('Unknown engine ' + name + '.')
+
+
+def parse_size(value: str) -> tuple:
+    """Parse the board size in the format HEIGHTxWIDTH."""
+
+    parts = value.lower().split('x')
+    if len(parts) != 2 or not parts[0].isdecimal() or not parts[1].isdecimal():
+        raise argparse.ArgumentTypeError('Use the format HEIGHTxWIDTH, e.g. 1000x1000.')
+    return int(parts[0]), int(parts[1])
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Create the parser of command line arguments."""
+
+    parser = argparse.ArgumentParser(
+        description='Run the Game of Life without a window and report the timing.')
+    parser.add_argument('pattern', help='file with the initial board, e.g. examples/pulsar.txt, '
+                                        'binary boards, RLE, Life 1.06 and plaintext are recognized')
+    parser.add_argument('-n', '--generations', type=int, default=100,
+                        help='number of generations to compute (default: 100)')
+    parser.add_argument('-r', '--rule',
+                        help='rule in the format Bx/Ry or Bx/Ry/Cz, numbers may be followed by '
+                             'letters of the Hensel notation (default: the rule stored in the file, '
+                             'otherwise B3/R23)')
+    parser.add_argument('-s', '--size', type=parse_size,
+                        help='size of a bounded board HEIGHTxWIDTH, unbounded if not set')
+    parser.add_argument('-t', '--topology', choices=TOPOLOGIES, default=BOUNDED,
+                        help='how the edges of a bounded board are joined (default: bounded, '
+                             'boards stored with joined edges keep their topology)')
+    parser.add_argument('-e', '--engine', choices=ENGINE_NAMES,
+                        help='engine computing generations (default: bit for bounded, '
+                             'sparse for unbounded boards)')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='number of threads or processes of parallel engines')
+    parser.add_argument('-o', '--output', help='file to write the final board to, the format is given '
+                                               'by the extension (' + formats.BINARY_EXTENSION +
+                                               ', .rle, .lif, .cells, otherwise pairs)')
+    parser.add_argument('--speedup', action='store_true',
+                        help='report the speedup of the threaded engine against one thread')
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """Load a board, compute generations, write the result and the timing."""
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    rule = Rule('B', 'R', '/')
+    rule_text = args.rule if args.rule != None else 'B3/R23'
+    if not rule.try_set_rule(rule_text):
+        parser.error('invalid rule ' + rule_text + ', use the format Bx/Ry or Bx/Ry/Cz.')
+
+    engine_name = args.engine
+    if engine_name == None:
+        engine_name = 'bit' if args.size != None else 'sparse'
+
+    board = Board(create_engine(engine_name, args.workers))
+    try:
+        board.rule = rule.table
+    except ValueError as error:
+        parser.error(str(error))
+    if args.size != None and not board.engine.BOUNDED_GRID:
+        parser.error('the engine ' + engine_name + ' needs an unbounded board, do not set --size.')
+    if args.size == None and not board.engine.UNBOUNDED_PLANE:
+        parser.error('the engine ' + engine_name + ' needs a bounded board, set --size.')
+    try:
+        if args.size != None:
+            board.empty_board(*args.size)
+        else:
+            board.empty_unbounded()
+    except ValueError as error:     # The engine cannot simulate the rule on a bounded board
+        parser.error(str(error))
+    if args.topology != BOUNDED and args.size == None:
+        parser.error('the topology ' + args.topology + ' needs a bounded board, set --size.')
+    try:
+        board.topology = args.topology
+    except ValueError as error:
+        parser.error(str(error))
+
+    try:
+        is_valid = formats.load_pattern(board, args.pattern)
+    except (OSError, UnicodeDecodeError):
+        print('Could not read the file ' + args.pattern + '.', file=sys.stderr)
+        return 1
+    except formats.FormatError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    if not is_valid:
+        print('Wrong or damaged file ' + args.pattern + '.', file=sys.stderr)
+        return 1
+
+    # A rule given on the command line replaces the rule stored in the file
+    if args.rule != None:
+        try:
+            board.rule = rule.table
+        except ValueError as error:     # The file replaced the board, e.g. with a bounded one
+            parser.error(str(error))
+
+    start = time.perf_counter()
+    board.advance(args.generations)
+    elapsed = time.perf_counter() - start
+
+    if args.output != None:
+        try:
+            formats.save_pattern(board, args.output)
+        except OSError:
+            print('Could not write to the file ' + args.output + '.', file=sys.stderr)
+            return 1
+        except formats.FormatError as error:
+            print(error, file=sys.stderr)
+            return 1
+
+    rate = args.generations / elapsed if elapsed > 0 else float('inf')
+    print('Engine:', engine_name)
+    print('Generations:', args.generations)
+    if board.background:
+        print('Living cells: all but', len(board.living))
+    else:
+        print('Living cells:', len(board.living))
+    print('Time: {:.3f} s'.format(elapsed))
+    print('Generations per second: {:.1f}'.format(rate))
+
+    if args.speedup:
+        if engine_name == 'threaded':
+            speedup = board.engine.measure_speedup(board.rule)
+            print('Speedup against one thread: {:.2f}x'.format(speedup))
+        else:
+            print('Speedup is measured only for the threaded engine.')
+
+    if hasattr(board.engine, 'close'):
+        board.engine.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,790 @@
+
+import itertools
+import re
+from engines import Engine, default_engine, window_from_cells, unpack_rows
+from rules import RuleTable, parse_conditions, conditions_name, compile_rule, totalistic_rule
+from topology import BOUNDED, TOPOLOGIES
+
+
+# Every state of every board gets a unique version, e.g. to find out if a drawn frame is up to date
+versions = itertools.count(1)
+
+
+def cells_not_in(cells: list, top: int, left: int, height: int, width: int) -> list:
+    """Return cells of the rectangle with the top left cell (top, left) that are not
+    among the given cells, e.g. living cells around cells stored on a living background."""
+
+    cells = set(cells)
+    return [(i, j) for i in range(top, top + height) for j in range(left, left + width)
+            if (i, j) not in cells]
+
+
+class Changes:
+    """Cells born and died in one generation of a board.
+    They turn the state with the base version into the next one. On a living background
+    they are changes of the stored dead cells, the background may change as well."""
+
+    def __init__(self, base_version: int, births: list, deaths: list) -> None:
+        """Initialize instance variables."""
+
+        self.__base_version = base_version
+        self.__births = births
+        self.__deaths = deaths
+
+    @property
+    def base_version(self) -> int:
+        return self.__base_version
+
+    @property
+    def births(self) -> list:
+        return self.__births
+
+    @property
+    def deaths(self) -> list:
+        return self.__deaths
+
+
+class CellIndex:
+    """Living cells sorted into square tiles, so cells in a rectangle are found
+    without going through all living cells. Copies share the tiles until
+    they are changed. The index follows a board by the changes of its generations."""
+
+    TILE_SIZE = 32
+
+    def __init__(self, tile_size: int = TILE_SIZE) -> None:
+        """Initialize instance variables."""
+
+        self.__size = tile_size
+        self.__tiles = {}           # Tile position -> set of living cells in the tile
+        self.__owned = set()        # Tiles not shared with a copy, they can be changed in place
+        self.__version = None       # Version of the indexed state of a board
+
+    # PROPERTIES
+    # region
+    @property
+    def version(self) -> int:
+        return self.__version
+    # endregion
+
+    def copy(self) -> 'CellIndex':
+        """Return a copy of the index, the tiles are copied when either index changes them."""
+
+        index = CellIndex(self.__size)
+        index.__tiles = self.__tiles.copy()
+        index.__version = self.__version
+        self.__owned = set()
+        return index
+
+    def follow(self, source) -> None:
+        """Index cells of a board or a snapshot. Only its changes are indexed
+        if they start from the indexed state, otherwise all living cells."""
+
+        if self.__version == source.version:
+            return
+
+        changes = source.changes
+        if (self.__version != None and changes != None and
+            changes.base_version == self.__version):
+            self.__update(changes.births, changes.deaths)
+        else:
+            self.__tiles = {}
+            self.__owned = set()
+            self.__update(source.living, ())
+
+        self.__version = source.version
+
+    def __update(self, births, deaths) -> None:
+        """Add born cells to their tiles and remove dead cells from them."""
+
+        size = self.__size
+        tiles = self.__tiles
+        for cells, is_birth in ((deaths, False), (births, True)):
+            for cell in cells:
+                key = (cell[0] // size, cell[1] // size)
+                if key not in self.__owned:
+                    tiles[key] = set(tiles.get(key, ()))
+                    self.__owned.add(key)
+                if is_birth:
+                    tiles[key].add(cell)
+                else:
+                    tiles[key].discard(cell)
+
+        for key in [key for key in self.__owned if not tiles[key]]:
+            del tiles[key]
+            self.__owned.discard(key)
+
+    def tiles(self) -> 'Iterator[set]':
+        """Return an iterator of sets of living cells, one set for each tile."""
+
+        return iter(self.__tiles.values())
+
+    def bounds(self) -> tuple:
+        """Return the smallest rectangle (top, left, bottom, right) containing all living cells,
+        bottom and right are past the last cell. Return None if there are no living cells.
+        Only cells of the tiles on the edges are searched."""
+
+        tiles = self.__tiles
+        if not tiles:
+            return None
+
+        rows = [ti for ti, tj in tiles]
+        cols = [tj for ti, tj in tiles]
+        first_row, last_row, first_col, last_col = min(rows), max(rows), min(cols), max(cols)
+        return (min(i for (ti, tj), cells in tiles.items() if ti == first_row for i, j in cells),
+                min(j for (ti, tj), cells in tiles.items() if tj == first_col for i, j in cells),
+                max(i for (ti, tj), cells in tiles.items() if ti == last_row for i, j in cells) + 1,
+                max(j for (ti, tj), cells in tiles.items() if tj == last_col for i, j in cells) + 1)
+
+    def cells_in(self, top: int, left: int, height: int, width: int) -> list:
+        """Return living cells in the rectangle with the top left cell (top, left).
+        Only tiles overlapping the rectangle are searched."""
+
+        if height <= 0 or width <= 0:
+            return []
+
+        size = self.__size
+        bottom, right = top + height, left + width
+        first_row, last_row = top // size, (bottom - 1) // size
+        first_col, last_col = left // size, (right - 1) // size
+
+        # A large rectangle on a small board has more positions of tiles than tiles
+        if (last_row - first_row + 1) * (last_col - first_col + 1) > len(self.__tiles):
+            keys = [(ti, tj) for ti, tj in self.__tiles
+                    if first_row <= ti <= last_row and first_col <= tj <= last_col]
+        else:
+            keys = [(ti, tj) for ti in range(first_row, last_row + 1)
+                    for tj in range(first_col, last_col + 1) if (ti, tj) in self.__tiles]
+
+        result = []
+        for ti, tj in keys:
+            cells = self.__tiles[(ti, tj)]
+            if (top <= ti * size and (ti + 1) * size <= bottom and
+                left <= tj * size and (tj + 1) * size <= right):
+                result.extend(cells)
+            else:
+                result.extend((i, j) for i, j in cells
+                              if top <= i < bottom and left <= j < right)
+        return result
+
+
+class Snapshot:
+    """Immutable state of a board in one generation."""
+
+    def __init__(self, generation: int, living: tuple, version: int = None,
+                 changes: Changes = None, index: CellIndex = None, background: int = 0) -> None:
+        """Initialize instance variables.
+        Changes lead from the previous state of the board to this one, if they are known.
+        The index of living cells is used to find cells in a rectangle, if it is given."""
+
+        self.__generation = generation
+        self.__living = living
+        self.__version = version if version != None else next(versions)
+        self.__changes = changes
+        self.__index = index
+        self.__background = background
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def living(self) -> tuple:
+        # Cells that differ from the background, the living cells if the background is dead
+        return self.__living
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    @property
+    def changes(self) -> Changes:
+        return self.__changes
+
+    @property
+    def background(self) -> int:
+        return self.__background
+
+    def at_generation(self, generation: int) -> 'Snapshot':
+        """Return the same state as a snapshot of another generation, e.g. a later generation
+        of a cycle. The version is kept, because the state is the same."""
+
+        return Snapshot(generation, self.__living, self.__version, self.__changes, self.__index,
+                        self.__background)
+
+    def cells_in(self, top: int, left: int, height: int, width: int) -> list:
+        """Return living cells in the rectangle with the top left cell (top, left)."""
+
+        cells = self.__stored_in(top, left, height, width)
+        if self.__background:
+            return cells_not_in(cells, top, left, height, width)
+        return cells
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left)."""
+
+        window = window_from_cells(self.__stored_in(top, left, height, width), top, left, height, width)
+        return ~window if self.__background else window
+
+    def __stored_in(self, top: int, left: int, height: int, width: int) -> list:
+        """Return stored cells, which differ from the background, in the rectangle."""
+
+        if self.__index != None:
+            return self.__index.cells_in(top, left, height, width)
+
+        return [(i, j) for i, j in self.__living
+                if top <= i < top + height and left <= j < left + width]
+
+
+class Board:
+    """Represents a game board.
+    Rules with birth on 0 neighbors are computed directly by engines that compute every cell
+    of a bounded grid. Other engines store cells that differ from the background, which
+    alternates between dead and alive, so they compute only cells near the stored ones.
+    Cells outside a bounded board stay dead, so such engines simulate these rules only
+    on unbounded boards.
+    Edges of a bounded board may be joined (topology), e.g. into a torus."""
+
+    def __init__(self, engine: Engine = None) -> None:
+        """Initialize instance variables.
+        The engine stores the grid, the fastest available one is used by default."""
+
+        self.__engine = engine if engine != None else default_engine()
+
+        self.__height = 0
+        self.__width = 0
+        self.__bounded = True       # Unbounded boards have no size and allow negative positions
+        self.__topology = BOUNDED   # How the edges of a bounded board are joined
+
+        self.__rule = totalistic_rule(set(), set())
+        self.__background = 0       # State of cells that are not stored by the engine
+
+        self.__generation = 0
+
+        self.__version = next(versions)
+        self.__base_version = None  # Version before the last generation if its changes are known
+        self.__changes = None
+
+        self.__index = CellIndex()  # Living cells by their position, follows the board when used
+
+    # PROPERTIES
+    # region
+    @property
+    def engine(self) -> Engine:
+        return self.__engine
+
+    @property
+    def height(self) -> int:
+        return self.__height
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @property
+    def bounded(self) -> bool:
+        return self.__bounded
+
+    @property
+    def topology(self) -> str:
+        return self.__topology
+
+    @topology.setter
+    def topology(self, value: str) -> None:
+        if value not in TOPOLOGIES:
+            raise ValueError('Unknown topology ' + str(value) + '.')
+        if value != BOUNDED and not self.__bounded:
+            raise ValueError('An unbounded board has no edges to join.')
+        if self.__bounded and value not in self.__engine.TOPOLOGIES:
+            raise ValueError(type(self.__engine).__name__ + ' cannot join edges of the board.')
+        self.__engine.set_topology(value)
+        self.__topology = value
+
+    @property
+    def rule(self) -> RuleTable:
+        return self.__rule
+
+    @rule.setter
+    def rule(self, value: RuleTable) -> None:
+        # A board without area is checked again when it is created
+        self.__check_rule(value, self.__bounded and not self.__is_empty_area())
+        self.__rule = value
+
+    @property
+    def background(self) -> int:
+        return self.__background
+
+    @property
+    def living(self) -> list:
+        # Cells that differ from the background, the living cells if the background is dead.
+        # Only an unbounded board can have a living background, its dead cells are stored.
+        return self.__engine.living
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @generation.setter
+    def generation(self, value: int) -> None:
+        self.__generation = value
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    @property
+    def changes(self) -> Changes:
+        if self.__changes == None and self.__base_version != None:
+            result = self.__engine.changes
+            if result != None:
+                self.__changes = Changes(self.__base_version, *result)
+        return self.__changes
+    #endregion
+
+    def __check_rule(self, rule: RuleTable, bounded: bool) -> None:
+        """Raise ValueError if the engine cannot simulate the rule on a bounded or unbounded board."""
+
+        engine = self.__engine
+        if rule.states > engine.MAX_STATES:
+            raise ValueError(type(engine).__name__ + ' cannot simulate rules with more than 2 states.')
+        if rule.table[0] and not engine.EVERY_CELL:
+            if rule.states > 2:
+                raise ValueError(type(engine).__name__ + ' cannot simulate rules with birth '
+                                 'on 0 neighbors and more than 2 states.')
+            if bounded:
+                raise ValueError(type(engine).__name__ + ' cannot simulate rules with birth '
+                                 'on 0 neighbors on a bounded board.')
+
+    def __is_inside(self, i: int, j: int) -> bool:
+        """Check if the position (i, j) is inside the board."""
+
+        if not self.__bounded:
+            return True
+
+        return 0 <= i and i < self.__height and 0 <= j and j < self.__width
+
+    def __is_empty_area(self) -> bool:
+        """Check if the board has no area for cells."""
+
+        return self.__bounded and (self.__height <= 0 or self.__width <= 0)
+
+    def __modified(self, stepped: bool = False, changes: tuple = None) -> None:
+        """Give the current state a new version.
+        Changes of the engine are used only after a single generation,
+        changes of an edit are given as lists of cells born and died."""
+
+        base_version = self.__version
+        self.__base_version = base_version if stepped else None
+        self.__version = next(versions)
+        self.__changes = Changes(base_version, *changes) if changes != None else None
+
+    def __followed_index(self) -> CellIndex:
+        """Return the index of living cells up to date with the current state."""
+
+        self.__index.follow(self)
+        return self.__index
+
+    def empty_board(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions, the topology is kept.
+        Raise ValueError if the engine cannot simulate a bounded board or the rule on it."""
+
+        if not self.__engine.BOUNDED_GRID:
+            raise ValueError(type(self.__engine).__name__ + ' cannot simulate a bounded board.')
+        self.__check_rule(self.__rule, True)
+        self.__height = height
+        self.__width = width
+        self.__bounded = True
+
+        self.__engine.reset(height, width)
+        self.__generation = 0
+        self.__background = 0
+        self.__modified()
+
+    def empty_unbounded(self) -> None:
+        """Create a new empty unbounded board.
+        Raise ValueError if the engine cannot simulate it, e.g. ListEngine or NumpyEngine."""
+
+        if not self.__engine.UNBOUNDED_PLANE:
+            raise ValueError(type(self.__engine).__name__ + ' cannot simulate an unbounded board.')
+        self.__height = 0
+        self.__width = 0
+        self.__bounded = False
+        self.__topology = BOUNDED
+
+        self.__engine.reset_unbounded()
+        self.__engine.set_topology(BOUNDED)
+        self.__generation = 0
+        self.__background = 0
+        self.__modified()
+    
+    def copy(self, board: 'Board') -> None:
+        """Copy values from the given board to this board."""
+
+        self.__height = board.height
+        self.__width = board.width
+        self.__bounded = board.bounded
+        self.__topology = board.topology
+
+        self.__engine = board.engine.copy()
+        self.__index = CellIndex()
+
+        self.__rule = board.rule
+        self.__background = board.background
+
+        self.__generation = board.generation
+        self.__modified()
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left)."""
+
+        if self.__engine.SPATIAL_WINDOW:
+            window = self.__engine.window(top, left, height, width)
+        else:
+            cells = self.__followed_index().cells_in(top, left, height, width)
+            window = window_from_cells(cells, top, left, height, width)
+        return ~window if self.__background else window
+
+    def cells_in(self, top: int, left: int, height: int, width: int) -> list:
+        """Return living cells in the rectangle with the top left cell (top, left).
+        The cost depends on the size of the rectangle and the cells in it, not on all living cells."""
+
+        cells = self.__followed_index().cells_in(top, left, height, width)
+        if self.__background:
+            return cells_not_in(cells, top, left, height, width)
+        return cells
+
+    def living_chunks(self) -> 'Iterator[set]':
+        """Return an iterator of living cells in chunks, one chunk for each tile of the index.
+        The chunks come from a copy of the index, so they can be read on another thread
+        while the board changes, and no list of all living cells is built."""
+
+        return self.living_index().tiles()
+
+    def living_index(self) -> CellIndex:
+        """Return a copy of the index of cells that differ from the background.
+        It can be read on another thread while the board changes."""
+
+        return self.__followed_index().copy()
+
+    def snapshot(self) -> Snapshot:
+        """Return an immutable copy of living cells in the current generation."""
+
+        return Snapshot(self.__generation, tuple(self.__engine.living),
+                        self.__version, self.changes, self.__followed_index().copy(),
+                        self.__background)
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Set living cells and the generation from a snapshot of this board."""
+
+        self.__engine.clear()
+        self.__engine.add_many(snapshot.living)
+        self.__generation = snapshot.generation
+        self.__background = snapshot.background
+
+        # The state is the same as in the snapshot, so is its version
+        self.__modified()
+        self.__version = snapshot.version
+
+    def grid_copy(self) -> list:
+        """Return a copy of the current grid (empty for unbounded boards)."""
+
+        grid = [[False] * self.__width for x in range(self.__height)]
+        for i, j in self.__engine.living:
+            grid[i][j] = True
+        return grid
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if self.__is_inside(i, j):
+            self.__set_cell(i, j, True)
+
+    def remove(self, i: int, j: int) -> None:
+        '''Remove a living cell at the position (i, j).'''
+
+        if self.__is_inside(i, j):
+            self.__set_cell(i, j, False)
+
+    def __set_cell(self, i: int, j: int, value: bool) -> None:
+        """Make a cell alive or dead, on a living background dead cells are stored.
+        Changes are cells stored and removed."""
+
+        stored = self.__engine.is_alive(i, j)
+        if value != bool(self.__background):
+            self.__engine.add(i, j)
+            self.__modified(changes=([] if stored else [(i, j)], []))
+        else:
+            self.__engine.remove(i, j)
+            self.__modified(changes=([], [(i, j)] if stored else []))
+
+    def add_many(self, cells: list) -> None:
+        """Add new cells at all the positions at once, positions outside the board are skipped."""
+
+        self.__set_many(self.__cells_inside(cells), True)
+
+    def remove_many(self, cells: list) -> None:
+        """Remove living cells at all the positions at once."""
+
+        self.__set_many(self.__cells_inside(cells), False)
+
+    def __set_many(self, cells: list, value: bool) -> None:
+        """Make cells alive or dead at once, on a living background dead cells are stored."""
+
+        if value != bool(self.__background):
+            self.__modified(changes=(self.__engine.add_many(cells), []))
+        else:
+            self.__modified(changes=([], self.__engine.remove_many(cells)))
+
+    def stamp(self, cells: list, i: int, j: int) -> None:
+        """Add a pattern of cells moved by i rows and j columns, e.g. the living cells of another board."""
+
+        self.add_many([(ci + i, cj + j) for ci, cj in cells])
+
+    def fill_rect(self, top: int, left: int, height: int, width: int) -> None:
+        """Make all cells in the rectangle with the top left cell (top, left) alive."""
+
+        self.__set_rect(top, left, height, width, True)
+
+    def clear_rect(self, top: int, left: int, height: int, width: int) -> None:
+        """Remove all living cells in the rectangle with the top left cell (top, left)."""
+
+        self.__set_rect(top, left, height, width, False)
+
+    def invert_rect(self, top: int, left: int, height: int, width: int) -> None:
+        """Invert all cells in the rectangle with the top left cell (top, left)."""
+
+        self.__set_rect(top, left, height, width, None)
+
+    def bit_rows(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return rows of cells in the rectangle with the top left cell (top, left)
+        packed into little endian uint64 words, 64 cells per word with the first cell
+        in the lowest bit. Needs NumPy."""
+
+        return self.__engine.bit_rows(top, left, height, width)
+
+    def add_bit_rows(self, rows: 'np.ndarray', top: int, left: int, width: int) -> bool:
+        """Add living cells from rows packed like in bit_rows, the first cell of the first row
+        is at the position (top, left). Return False if the rows do not fit on the board."""
+
+        if self.__bounded and (top < 0 or top + len(rows) > self.__height or
+                               left < 0 or left + width > self.__width):
+            return False
+
+        if self.__background:
+            # Living cells are removed from the stored dead cells one by one
+            row_indices, col_indices = unpack_rows(rows, width).nonzero()
+            self.add_many(list(zip((row_indices + top).tolist(), (col_indices + left).tolist())))
+            return True
+
+        if len(rows) > 0 and width > 0:
+            self.__engine.add_bit_rows(rows, top, left, width)
+        self.__modified()
+        return True
+
+    def __cells_inside(self, cells: list) -> list:
+        """Return the cells inside the board."""
+
+        if not self.__bounded:
+            return cells
+
+        height, width = self.__height, self.__width
+        return [(i, j) for i, j in cells if 0 <= i < height and 0 <= j < width]
+
+    def __set_rect(self, top: int, left: int, height: int, width: int, value: bool) -> None:
+        """Set all cells in the rectangle cut to the board by the engine."""
+
+        if self.__bounded:
+            bottom, right = min(top + height, self.__height), min(left + width, self.__width)
+            top, left = max(top, 0), max(left, 0)
+            height, width = bottom - top, right - left
+        if height <= 0 or width <= 0:
+            return
+
+        # On a living background dead cells are stored
+        if value != None and self.__background:
+            value = not value
+        self.__modified(changes=self.__engine.set_rect(top, left, height, width, value))
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        if not self.__is_inside(i, j):
+            return False
+
+        return self.__engine.is_alive(i, j) != bool(self.__background)
+
+    def next_gen(self) -> None:
+        """Compute the next generation and set it as current.
+        Cells born and died in it are available in changes."""
+
+        if self.__is_empty_area():
+            return
+
+        table, self.__background = self.__phase()
+        self.__engine.next_gen(table)
+        self.__generation += 1
+        self.__modified(stepped=True)
+
+    def advance(self, n: int) -> None:
+        """Compute the n-th next generation and set it as current.
+        Engines like HashLifeEngine compute it without all the steps in between."""
+
+        if self.__is_empty_area() or n <= 0:
+            return
+
+        # Generations with a changing background need their own tables, one step at a time
+        remaining = n
+        while remaining > 0:
+            table, background = self.__phase()
+            steps = remaining if background == self.__background else 1
+            self.__engine.advance(steps, table)
+            self.__background = background
+            remaining -= steps
+
+        self.__generation += n
+        self.__modified(stepped=(n == 1))
+
+    def __phase(self) -> tuple:
+        """Return the table of the rule for the engine in the current generation
+        and the background of the next generation."""
+
+        if self.__engine.EVERY_CELL:
+            return self.__rule, 0
+        return self.__rule.phase(self.__background)
+
+    def save_to_chunks(self) -> 'Iterator[str]':
+        """Save the board to strings, one string for each chunk of living cells.
+        Written one after another, the strings give the result of save_to_string."""
+
+        return ("".join([str(i) + " " + str(j) + " " for i, j in cells])
+                for cells in self.living_chunks())
+
+    def save_to_string(self) -> str:
+        """Save the board to a string."""
+
+        return "".join(self.save_to_chunks())
+
+    def read_from_string(self, grid_string: str) -> bool:
+        """Read the board from a string.
+        Assumes an empty board has been created before."""
+
+        def is_integer(value: str) -> bool:
+            """Check if the value is an integer, negative only on unbounded boards."""
+
+            if value.startswith('-') and not self.__bounded:
+                value = value[1:]
+            return value.isdecimal()
+
+        self.__engine.clear()
+        self.__generation = 0
+        self.__background = 0
+        self.__modified()
+
+        values = grid_string.split()    # Coordinates of living cells
+        cells = []
+
+        # Divide the coordinates into pairs, all cells are added at once
+        for i in range(0, len(values) - 1, 2):
+            x, y = values[i], values[i + 1]
+
+            if is_integer(x) and is_integer(y):
+                i, j = int(x), int(y)
+                if self.__is_inside(i, j):
+                    cells.append((i, j))
+                else:
+                    return False
+            else:
+                return False
+
+        self.__engine.add_many(cells)
+        self.__modified()
+        return True
+
+
+class Rule:
+    """Validates and stores a game rule.
+    Numbers of neighbors for birth and survival may be followed by letters of isotropic
+    classes (Hensel notation), e.g. B2-a3/R23, and an optional third part sets the number
+    of states of a Generations rule, e.g. B2/R/C3."""
+
+    STATES_NAME = 'C'
+    MAX_STATES = 256
+
+    def __init__(self, birth_name: str, remain_name: str, sep: str) -> None:
+        """Initialize instance variables."""
+
+        self.__birth_name = birth_name
+        self.__remain_name = remain_name
+        self.__sep = sep
+
+        self.__table = totalistic_rule(set(), set())
+
+    @property
+    def table(self) -> RuleTable:
+        return self.__table
+
+    def name_of(self, table: RuleTable) -> str:
+        """Return the text of a compiled rule, e.g. to show a rule read from a file."""
+
+        name = (self.__birth_name + conditions_name(table.birth) + self.__sep +
+                self.__remain_name + conditions_name(table.remain))
+        if table.states > 2:
+            name += self.__sep + self.STATES_NAME + str(table.states)
+        return name
+
+    def standard_name(self, table: RuleTable) -> str:
+        """Return the text of a compiled rule in the B/S notation of pattern files, e.g. B3/S23."""
+
+        return table.name
+
+    def try_set_standard_rule(self, value: str) -> bool:
+        """Try to set a rule in the B/S notation of pattern files, e.g. B3/S23, b3s23,
+        B2-a/S12/C3 or 23/3 (survival first). Return True if successful, False otherwise."""
+
+        conditions = r'([\dcekainyqjrtwz-]*)'
+        states = r'(?:/[Cc](\d+))?'
+
+        value = value.strip()
+        match = re.fullmatch(r'[Bb]' + conditions + r'/?[Ss]' + conditions + states, value)
+        if match != None:
+            birth, remain, count = match.group(1), match.group(2), match.group(3)
+        else:
+            match = re.fullmatch(r'[Ss]?' + conditions + r'/[Bb]?' + conditions + states, value)
+            if match == None:
+                return False
+            remain, birth, count = match.group(1), match.group(2), match.group(3)
+
+        text = self.__birth_name + birth + self.__sep + self.__remain_name + remain
+        if count != None:
+            text += self.__sep + self.STATES_NAME + count
+        return self.try_set_rule(text)
+
+    def try_set_rule(self, value: str) -> bool:
+        """Try to set the value as a new rule.
+        Return True if successful, False otherwise."""
+
+        def try_parse(rule_string: str, rule_name: str) -> set:
+            """Return neighborhoods of a part of the rule, None if it is not valid."""
+
+            if not rule_string.startswith(rule_name):
+                return None
+            return parse_conditions(rule_string[len(rule_name):])
+
+        split_rules = value.split(sep = self.__sep)
+        if len(split_rules) not in (2, 3):
+            return False
+
+        birth = try_parse(split_rules[0], self.__birth_name)
+        remain = try_parse(split_rules[1], self.__remain_name)
+        if birth == None or remain == None:
+            return False
+
+        states = 2
+        if len(split_rules) == 3:
+            count = split_rules[2][len(self.STATES_NAME):]
+            if (not split_rules[2].startswith(self.STATES_NAME) or not count.isdecimal() or
+                not 2 <= int(count) <= self.MAX_STATES):
+                return False
+            states = int(count)
+
+        self.__table = compile_rule(birth, remain, states)
+        return True
@@ -0,0 +1,146 @@
+
+from collections import deque
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MASK = (1 << 64) - 1
+
+
+def cells_hash(cells) -> int:
+    """Return the XOR of random-like 64-bit values of the cells (Zobrist hashing).
+    The value of a cell is computed from its position by the SplitMix64 function,
+    so no table of values is needed and the plane can be unbounded."""
+
+    if len(cells) == 0:
+        return 0
+
+    if np != None:
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        z = ((cells[:, 0].astype(np.uint64) << np.uint64(32)) ^
+             (cells[:, 1].astype(np.uint64) & np.uint64(0xFFFFFFFF)))
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return int(np.bitwise_xor.reduce(z ^ (z >> np.uint64(31))))
+
+    result = 0
+    for i, j in cells:
+        z = ((((i & 0xFFFFFFFF) << 32) ^ (j & 0xFFFFFFFF)) + 0x9E3779B97F4A7C15) & MASK
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+        result ^= z ^ (z >> 31)
+    return result
+
+
+class Cycle:
+    """Repeating states of a board, the state of the start generation
+    returns after each period."""
+
+    def __init__(self, start: int, period: int) -> None:
+        """Initialize instance variables."""
+
+        self.__start = start
+        self.__period = period
+
+    @property
+    def start(self) -> int:
+        return self.__start
+
+    @property
+    def period(self) -> int:
+        return self.__period
+
+    def phase(self, generation: int) -> int:
+        """Return the number of generations since the last repetition of the start state."""
+
+        return (generation - self.__start) % self.__period
+
+
+class CycleDetector:
+    """Finds a repeated state of a board by a hash of its living cells. The hash is updated
+    by cells born and died in each generation, hashes of recent generations are kept
+    in a small table. A repeated state is reported as a cycle with the generation where
+    it starts and the period, a multiple of the period if generations are skipped.
+    Only living cells are hashed, so it must not follow boards with rules with dying
+    states (more than 2 states), where equal living cells may be different states."""
+
+    TABLE_SIZE = 256
+
+    def __init__(self, table_size: int = TABLE_SIZE) -> None:
+        """Initialize instance variables."""
+
+        self.__table_size = table_size
+        self.__table = {}               # (hash, population, background) -> generation
+        self.__order = deque()          # Keys of the table from the oldest
+        self.__hash = 0
+        self.__population = 0
+        self.__generation = None        # Generation of the followed state
+        self.__version = None           # Version of the followed state
+        self.__cycle = None
+
+    # PROPERTIES
+    # region
+    @property
+    def hash(self) -> int:
+        return self.__hash
+
+    @property
+    def population(self) -> int:
+        return self.__population
+
+    @property
+    def cycle(self) -> Cycle:
+        return self.__cycle
+    # endregion
+
+    def follow(self, source) -> Cycle:
+        """Hash the current state of a board or a snapshot, only its changes are hashed
+        if they start from the followed state. The table starts again if the state did not
+        come from an earlier generation, e.g. after editing. Return the cycle if found."""
+
+        if self.__version == source.version:
+            return self.__cycle
+
+        if self.__generation == None or source.generation <= self.__generation:
+            self.clear()
+
+        changes = source.changes
+        if (self.__version != None and changes != None and
+            changes.base_version == self.__version):
+            self.__hash ^= cells_hash(changes.births) ^ cells_hash(changes.deaths)
+            self.__population += len(changes.births) - len(changes.deaths)
+        else:
+            living = source.living
+            self.__hash = cells_hash(living)
+            self.__population = len(living)
+
+        self.__generation = source.generation
+        self.__version = source.version
+
+        key = (self.__hash, self.__population, source.background)
+        start = self.__table.get(key)
+        if start != None and self.__cycle == None:
+            self.__cycle = Cycle(start, source.generation - start)
+
+        self.__table[key] = source.generation
+        self.__order.append(key)
+        if len(self.__order) > self.__table_size:
+            old = self.__order.popleft()
+            if old not in self.__order:
+                del self.__table[old]
+
+        return self.__cycle
+
+    def clear(self) -> None:
+        """Forget hashed generations and the found cycle."""
+
+        self.__table = {}
+        self.__order = deque()
+        self.__hash = 0
+        self.__population = 0
+        self.__generation = None
+        self.__version = None
+        self.__cycle = None
@@ -0,0 +1,1933 @@
+
+import os
+import time
+import weakref
+from rules import RuleTable, CENTER
+from topology import BOUNDED, KLEIN_BOTTLE, TOPOLOGIES, ghost_border, ghost_positions, fill_border
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def neighborhood_index(padded: 'np.ndarray') -> 'np.ndarray':
+    """Return the index of the 3x3 neighborhood of each cell inside grids of 0 and 1 padded
+    by one cell, the bit (di + 1) * 3 + (dj + 1) is the cell (i + di, j + dj).
+    Rows of three cells are packed first, so only a few shifted slices are added."""
+
+    triples = padded[..., :-2] | (padded[..., 1:-1] << 1) | (padded[..., 2:] << 2)
+    index = triples[..., 2:, :].astype(np.uint16) << 6
+    index |= triples[..., 1:-1, :] << 3
+    index |= triples[..., :-2, :]
+    return index
+
+
+def next_states(padded: 'np.ndarray', rule: RuleTable) -> 'np.ndarray':
+    """Return the next states of cells inside grids padded by one cell from the lookup table
+    of the rule. Dying cells of rules with more states are not counted as neighbors."""
+
+    if rule.states == 2:
+        return rule.array[neighborhood_index(padded)]
+
+    alive = (padded == 1).view(np.uint8)
+    return rule.transitions[padded[..., 1:-1, 1:-1], rule.array[neighborhood_index(alive)]]
+
+
+def step_rows(source: 'np.ndarray', target: 'np.ndarray', first: int, last: int,
+              rule: RuleTable) -> None:
+    """Compute rows first..last-1 of a grid padded by one cell into the target grid.
+    Only reads the rows and the rows next to them, array operations release the GIL."""
+
+    target[first + 1:last + 1, 1:-1] = next_states(source[first:last + 2], rule)
+
+
+def window_from_grid(grid: 'np.ndarray', top: int, left: int, height: int, width: int) -> 'np.ndarray':
+    """Return a bool array of cells of the grid in the rectangle with the top left
+    cell (top, left). Cells outside the grid are dead."""
+
+    result = np.zeros((height, width), dtype=bool)
+    first_row, first_col = max(0, top), max(0, left)
+    last_row = min(grid.shape[0], top + height)
+    last_col = min(grid.shape[1], left + width)
+    if first_row < last_row and first_col < last_col:
+        result[first_row - top:last_row - top, first_col - left:last_col - left] = \
+            grid[first_row:last_row, first_col:last_col] == 1
+    return result
+
+
+def changes_from_grids(old: 'np.ndarray', new: 'np.ndarray', top: int = 0, left: int = 0) -> tuple:
+    """Return lists of cells born and died between two grids of the same shape,
+    the top left cell of the grids is (top, left). Only living cells (1) are compared."""
+
+    rows, cols = np.nonzero((old == 1) != (new == 1))
+    born = new[rows, cols] == 1
+    rows += top
+    cols += left
+    births = list(zip(rows[born].tolist(), cols[born].tolist()))
+    deaths = list(zip(rows[~born].tolist(), cols[~born].tolist()))
+    return births, deaths
+
+
+def set_cells_in_grid(grid: 'np.ndarray', cells: list, value: int) -> list:
+    """Set cells of the grid at the positions to the value (1 alive, 0 dead) at once.
+    Return positions of the cells that were born or died, each only once."""
+
+    if len(cells) == 0:
+        return []
+
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    keys = np.unique(cells[:, 0] * grid.shape[1] + cells[:, 1])
+    rows, cols = np.divmod(keys, grid.shape[1])
+    changed = (grid[rows, cols] == 1) != value
+    rows, cols = rows[changed], cols[changed]
+    grid[rows, cols] = value
+    return list(zip(rows.tolist(), cols.tolist()))
+
+
+def set_rect_in_grid(grid: 'np.ndarray', top: int, left: int, height: int, width: int,
+                     value: int = None) -> tuple:
+    """Set cells of the grid in the rectangle to the value, or invert them if the value is None.
+    Return lists of cells born and died."""
+
+    region = grid[top:top + height, left:left + width]
+    old = region.copy()
+    if value == None:
+        region[...] = region != 1
+    else:
+        region[...] = value
+    return changes_from_grids(old, region, top, left)
+
+
+def pack_rows(grid: 'np.ndarray') -> 'np.ndarray':
+    """Pack rows of a bool array into little endian uint64 words, 64 cells per word
+    with the first cell in the lowest bit. Bits after the last column are zero."""
+
+    word_count = (grid.shape[1] + 63) // 64
+    bits = np.zeros((grid.shape[0], word_count * 64), dtype=bool)
+    bits[:, :grid.shape[1]] = grid
+    return np.packbits(bits, axis=1, bitorder='little').view('<u8')
+
+
+def unpack_rows(rows: 'np.ndarray', width: int) -> 'np.ndarray':
+    """Return a uint8 array of cells from rows packed by pack_rows."""
+
+    return np.unpackbits(np.ascontiguousarray(rows).view(np.uint8), axis=1,
+                         count=width, bitorder='little')
+
+
+def window_from_cells(cells, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+    """Return a bool array of the given cells (a list or an array of coordinates)
+    in the rectangle with the top left cell (top, left)."""
+
+    result = np.zeros((height, width), dtype=bool)
+    if len(cells) == 0:
+        return result
+
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    rows = cells[:, 0] - top
+    cols = cells[:, 1] - left
+    inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    result[rows[inside], cols[inside]] = True
+    return result
+
+
+class Engine:
+    """Base class of engines that store a grid of cells and compute its generations.
+    Positions passed to the engine are always inside the grid."""
+
+    SPATIAL_WINDOW = False      # Window reads only cells in the rectangle, not all living cells
+    EVERY_CELL = False          # Computes every cell of the grid, not only cells near living cells
+    MAX_STATES = 2              # Most states of a rule the engine can simulate
+    TOPOLOGIES = (BOUNDED,)     # Ways of joining the edges of a bounded grid the engine can simulate
+    BOUNDED_GRID = True         # Simulates a bounded grid, see reset
+    UNBOUNDED_PLANE = False     # Simulates an unbounded plane, see reset_unbounded
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        raise NotImplementedError
+
+    def reset_unbounded(self) -> None:
+        """Create a new empty unbounded plane, positions may be negative.
+        Only engines with UNBOUNDED_PLANE implement it."""
+
+        raise NotImplementedError
+
+    def copy(self) -> 'Engine':
+        """Return a new engine with a copy of the grid."""
+
+        raise NotImplementedError
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined, one of TOPOLOGIES.
+        The topology is kept when the grid is reset."""
+
+        pass
+
+    def clear(self) -> None:
+        """Remove all living cells from the grid."""
+
+        raise NotImplementedError
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        raise NotImplementedError
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        raise NotImplementedError
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions. Return the cells that were dead before, each only once."""
+
+        born = []
+        for i, j in cells:
+            if not self.is_alive(i, j):
+                self.add(i, j)
+                born.append((i, j))
+        return born
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions. Return the cells that were alive before, each only once."""
+
+        died = []
+        for i, j in cells:
+            if self.is_alive(i, j):
+                self.remove(i, j)
+                died.append((i, j))
+        return died
+
+    def set_rect(self, top: int, left: int, height: int, width: int, value: bool = None) -> tuple:
+        """Make all cells in the rectangle with the top left cell (top, left) alive or dead,
+        or invert them if the value is None. Return lists of cells born and died."""
+
+        living = self.__cells_in_rect(top, left, height, width, True) if value != True else []
+        dead = self.__cells_in_rect(top, left, height, width, False) if value != False else []
+        return self.add_many(dead), self.remove_many(living)
+
+    def bit_rows(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return rows of cells in the rectangle with the top left cell (top, left)
+        packed into words by pack_rows."""
+
+        return pack_rows(self.window(top, left, height, width))
+
+    def add_bit_rows(self, rows: 'np.ndarray', top: int, left: int, width: int) -> None:
+        """Add living cells from rows packed by pack_rows, the first cell of the first row
+        is at the position (top, left)."""
+
+        rows, cols = np.nonzero(unpack_rows(rows, width))
+        self.add_many(list(zip((rows + top).tolist(), (cols + left).tolist())))
+
+    def __cells_in_rect(self, top: int, left: int, height: int, width: int, alive: bool) -> list:
+        """Return positions of living or dead cells in the rectangle."""
+
+        if np != None:
+            rows, cols = np.nonzero(self.window(top, left, height, width) == alive)
+            return list(zip((rows + top).tolist(), (cols + left).tolist()))
+
+        return [(i, j) for i in range(top, top + height) for j in range(left, left + width)
+                if self.is_alive(i, j) == alive]
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        raise NotImplementedError
+
+    @property
+    def living(self) -> list:
+        """Coordinates of living cells."""
+
+        raise NotImplementedError
+
+    @property
+    def changes(self) -> tuple:
+        """Lists of cells born and died in the last call of next_gen as a pair.
+        None if they are unknown or the grid was edited since then."""
+
+        return None
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left)."""
+
+        return window_from_cells(self.living, top, left, height, width)
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation by the lookup table of the rule and set it as current.
+        Engines that do not compute every cell get only tables in which cells
+        with an empty neighborhood stay dead."""
+
+        raise NotImplementedError
+
+    def advance(self, n: int, rule: RuleTable) -> None:
+        """Compute the n-th next generation and set it as current."""
+
+        for x in range(n):
+            self.next_gen(rule)
+
+
+class ListEngine(Engine):
+    """Stores the grid as a list of lists of bools and computes generations
+    only for living cells and their neighbors."""
+
+    TOPOLOGIES = TOPOLOGIES
+
+    def __init__(self) -> None:
+        """Initialize instance variables."""
+
+        # Grids are surrounded by a border of cells, so that neighbors are read without
+        # bounds checks. Cells of the board shown on the border are copied there
+        # once per generation, positions on the grid are moved by one cell.
+        self.__current = []
+        self.__next = []
+
+        self.__height = 0
+        self.__width = 0
+        self.__topology = BOUNDED
+        self.__border = ghost_border(0, 0, BOUNDED)     # Border position -> shown cell or None
+        self.__border_positions = set(self.__border)
+
+        self.__living = {}          # Living cells as keys in the order of adding, removed in constant time
+        self.__changes = None       # Cells born and died in the last generation
+
+    @property
+    def living(self) -> list:
+        return list(self.__living)
+
+    @property
+    def changes(self) -> tuple:
+        return self.__changes
+
+    def __create_empty(self, height: int, width: int) -> list:
+        """Create an empty grid with given dimensions and the border."""
+
+        return [[False] * (width + 2) for x in range(height + 2)]
+
+    def __find_border(self) -> None:
+        """Find cells shown on the border of the grid for the current topology."""
+
+        self.__border = ghost_border(self.__height, self.__width, self.__topology)
+        self.__border_positions = set(self.__border)
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        self.__height = height
+        self.__width = width
+
+        self.__current = self.__create_empty(height, width)
+        self.__next = self.__create_empty(height, width)
+        self.__find_border()
+
+        self.__living = {}
+        self.__changes = None
+
+    def copy(self) -> 'ListEngine':
+        """Return a new engine with a copy of the grid."""
+
+        engine = ListEngine()
+        engine.__height = self.__height
+        engine.__width = self.__width
+        engine.__topology = self.__topology
+        engine.__border = self.__border
+        engine.__border_positions = self.__border_positions
+
+        engine.__current = [row.copy() for row in self.__current]
+        engine.__next = self.__create_empty(self.__height, self.__width)
+
+        engine.__living = self.__living.copy()
+        return engine
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined, the border is cleared."""
+
+        for grid in (self.__current, self.__next):
+            for i, j in self.__border:
+                grid[i][j] = False
+        self.__topology = topology
+        self.__find_border()
+
+    def clear(self) -> None:
+        """Remove all living cells from the grid."""
+
+        for cell in self.__living:
+            i, j = cell
+            self.__current[i + 1][j + 1] = False
+        self.__living = {}
+        self.__changes = None
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if not self.__current[i + 1][j + 1]:
+            self.__living[(i, j)] = None
+            self.__current[i + 1][j + 1] = True
+            self.__changes = None
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        if self.__current[i + 1][j + 1]:
+            del self.__living[(i, j)]
+            self.__current[i + 1][j + 1] = False
+            self.__changes = None
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        return self.__current[i + 1][j + 1]
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation and set it as current."""
+
+        def copy_border() -> None:
+            """Copy cells of the board shown on the border to the border."""
+
+            grid = self.__current
+            for (i, j), cell in self.__border.items():
+                if cell != None:
+                    grid[i][j] = grid[cell[0]][cell[1]]
+
+        def solve_living_and_find_neighbors(living: list, survivors: list, neighbors: set) -> None:
+            """Decide the next state of living cells and find their neighbors."""
+
+            def index_neighbors_and_find_empty(x: int, y: int) -> int:
+                """Return the neighborhood index of a cell (x, y) of the grid with the border
+                and add empty neighbors to the set."""
+
+                def add_if_empty(i: int, j: int, bit: int) -> None:
+                    """Adds the bit of a living neighbor to the index or an empty cell to neighbors."""
+
+                    nonlocal index
+                    if grid[i][j]:
+                        index |= bit
+                    else:
+                        neighbors.add((i, j))
+
+                index = CENTER
+                add_if_empty(x-1, y-1, 1)
+                add_if_empty(x-1, y, 2)
+                add_if_empty(x-1, y+1, 4)
+                add_if_empty(x, y-1, 8)
+                add_if_empty(x, y+1, 32)
+                add_if_empty(x+1, y-1, 64)
+                add_if_empty(x+1, y, 128)
+                add_if_empty(x+1, y+1, 256)
+                return index
+
+            nonlocal next
+            grid = self.__current
+
+            for i, j in living:
+                if table[index_neighbors_and_find_empty(i + 1, j + 1)]:
+                    next[i + 1][j + 1] = True
+                    survivors.append((i, j))
+
+        def replace_border_neighbors(neighbors: set) -> None:
+            """Replace neighbors on the border with the empty cells of the board they show."""
+
+            grid = self.__current
+            outside = neighbors & self.__border_positions
+            neighbors -= outside
+            for position in outside:
+                cell = self.__border[position]
+                if cell != None and not grid[cell[0]][cell[1]]:
+                    neighbors.add(cell)
+
+        def solve_neighbors(neighbors: set, survivors: list) -> None:
+            """Decide the next state of neighbors of living cells."""
+
+            def index_neighbors(x: int, y: int) -> int:
+                """Return the neighborhood index of a dead cell (x, y) of the grid with the border."""
+
+                above, row, below = grid[x-1], grid[x], grid[x+1]
+
+                index = 0
+                if above[y-1]: index |= 1
+                if above[y]: index |= 2
+                if above[y+1]: index |= 4
+                if row[y-1]: index |= 8
+                if row[y+1]: index |= 32
+                if below[y-1]: index |= 64
+                if below[y]: index |= 128
+                if below[y+1]: index |= 256
+
+                return index
+
+            nonlocal next
+            grid = self.__current
+
+            for x, y in neighbors:
+                if table[index_neighbors(x, y)]:
+                    next[x][y] = True
+                    survivors.append((x - 1, y - 1))
+
+        if self.__height <= 0 or self.__width <= 0:
+            return
+
+        survivors = []          # Cells that will survive to the next generation
+        neighbors = set()       # Neighbors of living cells in the grid with the border
+        next = self.__next
+        table = rule.table
+
+        if self.__topology != BOUNDED:
+            copy_border()
+        solve_living_and_find_neighbors(self.__living, survivors, neighbors)
+        replace_border_neighbors(neighbors)
+        solve_neighbors(neighbors, survivors)
+
+        current = self.__current
+        births = [(i, j) for i, j in survivors if not current[i + 1][j + 1]]
+        deaths = [(i, j) for i, j in self.__living if not next[i + 1][j + 1]]
+        self.clear()
+        self.__changes = (births, deaths)
+
+        self.__living = dict.fromkeys(survivors)
+        self.__next = self.__current
+        self.__current = next
+
+
+class NumpyEngine(Engine):
+    """Stores the grid as a NumPy array of uint8 and computes each generation
+    with a few whole-array operations."""
+
+    SPATIAL_WINDOW = True
+    EVERY_CELL = True
+    MAX_STATES = 256
+    TOPOLOGIES = TOPOLOGIES
+
+    def __init__(self) -> None:
+        """Initialize instance variables."""
+
+        if np == None:
+            raise RuntimeError('NumPy library is missing.')
+
+        # The grid is surrounded by a border of cells filled once per generation (dead,
+        # or cells of the opposite edges), so that neighborhoods can be indexed
+        # by adding shifted slices without any bounds checks
+        self.__padded = np.zeros((2, 2), dtype=np.uint8)
+        self.__topology = BOUNDED
+        self.__living = None        # Cached coordinates of living cells
+        self.__previous = None      # Grid before the last generation, None after edits
+
+    @property
+    def grid(self) -> 'np.ndarray':
+        """View of the grid without the border."""
+
+        return self.__padded[1:-1, 1:-1]
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            rows, cols = np.nonzero(self.grid == 1)
+            self.__living = list(zip(rows.tolist(), cols.tolist()))
+        return self.__living
+
+    @property
+    def changes(self) -> tuple:
+        if self.__previous is None:
+            return None
+        return changes_from_grids(self.__previous, self.grid)
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        self.__padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        self.__living = []
+        self.__previous = None
+
+    def copy(self) -> 'NumpyEngine':
+        """Return a new engine with a copy of the grid."""
+
+        engine = NumpyEngine()
+        engine.__padded = self.__padded.copy()
+        engine.__topology = self.__topology
+        if self.__living != None:
+            engine.__living = self.__living.copy()
+        return engine
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined."""
+
+        self.__topology = topology
+
+    def clear(self) -> None:
+        """Remove all living cells from the grid."""
+
+        self.__padded.fill(0)
+        self.__living = []
+        self.__previous = None
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if self.__padded[i + 1, j + 1] != 1:
+            self.__padded[i + 1, j + 1] = 1
+            self.__living = None
+            self.__previous = None
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        if self.__padded[i + 1, j + 1] == 1:
+            self.__padded[i + 1, j + 1] = 0
+            self.__living = None
+            self.__previous = None
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions at once. Return the cells that were dead before."""
+
+        born = set_cells_in_grid(self.grid, cells, 1)
+        if born:
+            self.__living = None
+            self.__previous = None
+        return born
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions at once. Return the cells that were alive before."""
+
+        died = set_cells_in_grid(self.grid, cells, 0)
+        if died:
+            self.__living = None
+            self.__previous = None
+        return died
+
+    def set_rect(self, top: int, left: int, height: int, width: int, value: bool = None) -> tuple:
+        """Make all cells in the rectangle alive or dead, or invert them if the value is None,
+        with one slice of the grid. Return lists of cells born and died."""
+
+        births, deaths = set_rect_in_grid(self.grid, top, left, height, width,
+                                          None if value == None else int(value))
+        if births or deaths:
+            self.__living = None
+            self.__previous = None
+        return births, deaths
+
+    def add_bit_rows(self, rows: 'np.ndarray', top: int, left: int, width: int) -> None:
+        """Add living cells from packed rows, unpacked straight into a slice of the grid."""
+
+        np.copyto(self.grid[top:top + len(rows), left:left + width], 1,
+                  where=unpack_rows(rows, width) == 1)
+        self.__living = None
+        self.__previous = None
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        return self.__padded[i + 1, j + 1] == 1
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left)."""
+
+        return window_from_grid(self.grid, top, left, height, width)
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation and set it as current."""
+
+        grid = self.grid
+        if grid.size == 0:
+            return
+
+        self.__previous = grid.copy()
+        fill_border(self.__padded, self.__topology)
+        grid[...] = next_states(self.__padded, rule)
+        self.__living = None
+
+
+class BitEngine(Engine):
+    """Stores each row of the grid as an array of uint64 words (64 cells per word)
+    and computes generations with bitwise adder logic over whole arrays."""
+
+    WORD_BITS = 64
+    SPATIAL_WINDOW = True
+    EVERY_CELL = True
+    TOPOLOGIES = TOPOLOGIES
+
+    def __init__(self) -> None:
+        """Initialize instance variables."""
+
+        if np == None:
+            raise RuntimeError('NumPy library is missing.')
+
+        # Rows are surrounded by a row above and below the grid, filled once per generation
+        self.__rows = np.zeros((2, 0), dtype=np.uint64)
+        self.__mask = np.zeros(0, dtype=np.uint64)  # Valid bits of words in a row
+        self.__width = 0
+        self.__topology = BOUNDED
+        self.__living = None        # Cached coordinates of living cells
+        self.__previous = None      # Words before the last generation, None after edits
+
+    @property
+    def words(self) -> 'np.ndarray':
+        """View of the words of the grid without the border rows."""
+
+        return self.__rows[1:-1]
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            self.__living = self.__cells_in_words(self.words)
+        return self.__living
+
+    @property
+    def changes(self) -> tuple:
+        if self.__previous is None:
+            return None
+        words, previous = self.words, self.__previous
+        return self.__cells_in_words(words & ~previous), self.__cells_in_words(previous & ~words)
+
+    def __cells_in_words(self, all_words: 'np.ndarray') -> list:
+        """Find coordinates of cells set in rows of words, unpack only non-empty words."""
+
+        rows, cols = np.nonzero(all_words)
+        words = all_words[rows, cols].astype('<u8').view(np.uint8)
+        bits = np.unpackbits(words.reshape(-1, 8), axis=1, bitorder='little')
+        k, bit = np.nonzero(bits)
+
+        rows = rows[k]
+        cols = cols[k] * self.WORD_BITS + bit
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    def __position(self, i: int, j: int) -> tuple:
+        """Return the index of the word with the cell (i, j) and the bit of the cell."""
+
+        return (i + 1, j // self.WORD_BITS), np.uint64(1 << (j % self.WORD_BITS))
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        word_count = (width + self.WORD_BITS - 1) // self.WORD_BITS
+        self.__rows = np.zeros((height + 2, word_count), dtype=np.uint64)
+        self.__width = width
+
+        self.__mask = np.full(word_count, ~np.uint64(0), dtype=np.uint64)
+        if width % self.WORD_BITS != 0:
+            self.__mask[-1] = np.uint64((1 << (width % self.WORD_BITS)) - 1)
+
+        self.__living = []
+        self.__previous = None
+
+    def copy(self) -> 'BitEngine':
+        """Return a new engine with a copy of the grid."""
+
+        engine = BitEngine()
+        engine.__rows = self.__rows.copy()
+        engine.__mask = self.__mask
+        engine.__width = self.__width
+        engine.__topology = self.__topology
+        if self.__living != None:
+            engine.__living = self.__living.copy()
+        return engine
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined."""
+
+        self.__topology = topology
+
+    def clear(self) -> None:
+        """Remove all living cells from the grid."""
+
+        self.__rows.fill(0)
+        self.__living = []
+        self.__previous = None
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        index, bit = self.__position(i, j)
+        if not self.__rows[index] & bit:
+            self.__rows[index] |= bit
+            self.__living = None
+            self.__previous = None
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        index, bit = self.__position(i, j)
+        if self.__rows[index] & bit:
+            self.__rows[index] &= ~bit
+            self.__living = None
+            self.__previous = None
+
+    def __set_cells(self, cells: list, alive: bool) -> list:
+        """Set or clear bits of cells at the positions at once.
+        Return positions of the cells that changed, each only once."""
+
+        if len(cells) == 0:
+            return []
+
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        rows, cols = np.divmod(np.unique(cells[:, 0] * self.__width + cells[:, 1]), self.__width)
+        index = (rows + 1, cols // self.WORD_BITS)
+        bits = np.left_shift(np.uint64(1), (cols % self.WORD_BITS).astype(np.uint64))
+
+        changed = ((self.__rows[index] & bits) != 0) != alive
+        index = (index[0][changed], index[1][changed])
+        if alive:
+            np.bitwise_or.at(self.__rows, index, bits[changed])
+        else:
+            np.bitwise_and.at(self.__rows, index, ~bits[changed])
+
+        if changed.any():
+            self.__living = None
+            self.__previous = None
+        return list(zip(rows[changed].tolist(), cols[changed].tolist()))
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions at once. Return the cells that were dead before."""
+
+        return self.__set_cells(cells, True)
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions at once. Return the cells that were alive before."""
+
+        return self.__set_cells(cells, False)
+
+    def set_rect(self, top: int, left: int, height: int, width: int, value: bool = None) -> tuple:
+        """Make all cells in the rectangle alive or dead, or invert them if the value is None,
+        with one mask of columns applied to all rows. Return lists of cells born and died."""
+
+        old = self.window(top, left, height, width)
+        new = ~old if value == None else np.full_like(old, value)
+        births, deaths = changes_from_grids(old, new, top, left)
+
+        bits = np.zeros(self.__rows.shape[1] * self.WORD_BITS, dtype=bool)
+        bits[left:left + width] = True
+        mask = np.packbits(bits, bitorder='little').view('<u8').astype(np.uint64)
+        rows = self.__rows[top + 1:top + height + 1]
+        if value == None:
+            rows ^= mask
+        elif value:
+            rows |= mask
+        else:
+            rows &= ~mask
+
+        if births or deaths:
+            self.__living = None
+            self.__previous = None
+        return births, deaths
+
+    def bit_rows(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return rows of cells in the rectangle packed into words.
+        Whole rows are returned as a view of the grid, they are stored the same way."""
+
+        if left == 0 and width == self.__width and 0 <= top and top + height <= len(self.words):
+            return self.__rows[top + 1:top + height + 1]
+        return super().bit_rows(top, left, height, width)
+
+    def add_bit_rows(self, rows: 'np.ndarray', top: int, left: int, width: int) -> None:
+        """Add living cells from packed rows. Whole rows are combined with the words
+        of the grid without unpacking."""
+
+        if left == 0 and width == self.__width:
+            self.__rows[top + 1:top + len(rows) + 1] |= rows & self.__mask
+            self.__living = None
+            self.__previous = None
+        else:
+            super().add_bit_rows(rows, top, left, width)
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        index, bit = self.__position(i, j)
+        return bool(self.__rows[index] & bit)
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left),
+        unpack only the words in the rectangle."""
+
+        first_row = max(0, top)
+        first_word = max(0, left) // self.WORD_BITS
+        last_word = max(0, left + width - 1) // self.WORD_BITS + 1
+        words = self.words[first_row:max(first_row, top + height), first_word:last_word]
+        bits = np.unpackbits(words.astype('<u8').view(np.uint8), axis=1, bitorder='little')
+        return window_from_grid(bits, top - first_row, left - first_word * self.WORD_BITS,
+                                height, width)
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation and set it as current. Totalistic rules are computed
+        on the words, other rules unpack the words to index the lookup table.
+        Joined edges are handled by the rows around the grid and by the first and the last
+        column added to the shifted words."""
+
+        def fill_border_rows() -> None:
+            """Fill the rows around the grid with the rows of the board shown there."""
+
+            if self.__topology == BOUNDED:
+                rows[0] = 0
+                rows[-1] = 0
+            elif self.__topology == KLEIN_BOTTLE:
+                rows[0] = pack_rows(unpack_rows(rows[-2:-1], self.__width)[:, ::-1])[0]
+                rows[-1] = pack_rows(unpack_rows(rows[1:2], self.__width)[:, ::-1])[0]
+            else:
+                rows[0] = rows[-2]
+                rows[-1] = rows[1]
+
+        def shift_west(rows: 'np.ndarray') -> 'np.ndarray':
+            """Move each cell to the column on its right, i.e. the value of the western neighbor."""
+
+            shifted = rows << one
+            shifted[:, 1:] |= rows[:, :-1] >> last
+            return shifted
+
+        def shift_east(rows: 'np.ndarray') -> 'np.ndarray':
+            """Move each cell to the column on its left, i.e. the value of the eastern neighbor."""
+
+            shifted = rows >> one
+            shifted[:, :-1] |= rows[:, 1:] << last
+            return shifted
+
+        def full_add(a: 'np.ndarray', b: 'np.ndarray', c: 'np.ndarray') -> tuple:
+            """Add three bits in each position, return the sum and the carry."""
+
+            a_xor_b = a ^ b
+            return a_xor_b ^ c, (a & b) | (c & a_xor_b)
+
+        def equal_count(count: int) -> 'np.ndarray':
+            """Return bits of cells with the given number of neighbors."""
+
+            result = None
+            for k, plane in enumerate(planes):
+                bits = plane if count & (1 << k) else ~plane
+                result = bits if result is None else result & bits
+            return result
+
+        rows = self.__rows
+        if rows.shape[0] <= 2 or rows.shape[1] <= 0:
+            return
+
+        counts = rule.counts
+        if counts == None:
+            width = self.__width
+            padded = np.zeros((rows.shape[0], width + 2), dtype=np.uint8)
+            padded[1:-1, 1:-1] = unpack_rows(rows[1:-1], width)
+            fill_border(padded, self.__topology)
+            self.__previous = rows[1:-1].copy()
+            rows[1:-1] = pack_rows(next_states(padded, rule)) & self.__mask
+            self.__living = None
+            return
+        birth_rule, remain_rule = counts
+
+        one = np.uint64(1)
+        last = np.uint64(self.WORD_BITS - 1)
+
+        fill_border_rows()
+        west = shift_west(rows)
+        east = shift_east(rows)
+        if self.__topology != BOUNDED:
+            # The western neighbor of the first column is the last column and vice versa
+            word, bit = divmod(self.__width - 1, self.WORD_BITS)
+            bit = np.uint64(bit)
+            west[:, 0] |= (rows[:, word] >> bit) & one
+            east[:, word] |= (rows[:, 0] & one) << bit
+
+        # Add 8 neighbors with a tree of adders, the count is stored in 4 bit planes
+        sum_a, carry_a = full_add(west[:-2], rows[:-2], east[:-2])
+        sum_b, carry_b = full_add(west[2:], rows[2:], east[2:])
+        sum_c, carry_c = west[1:-1] ^ east[1:-1], west[1:-1] & east[1:-1]
+
+        bit_0, carry_d = full_add(sum_a, sum_b, sum_c)
+        sum_e, carry_e = full_add(carry_a, carry_b, carry_c)
+        bit_1, carry_f = sum_e ^ carry_d, sum_e & carry_d
+        bit_2, bit_3 = carry_e ^ carry_f, carry_e & carry_f
+        planes = (bit_0, bit_1, bit_2, bit_3)
+
+        alive = rows[1:-1]
+        born = np.zeros_like(alive)
+        for count in birth_rule:
+            born |= equal_count(count)
+        remain = np.zeros_like(alive)
+        for count in remain_rule:
+            remain |= equal_count(count)
+
+        self.__previous = alive.copy()
+        alive[...] = ((born & ~alive) | (remain & alive)) & self.__mask
+        self.__living = None
+
+
+class SparseEngine(Engine):
+    """Stores only coordinates of living cells in a set, the plane can be unbounded.
+    The cost of a generation depends on the number of living cells, not on the area.
+    Dying cells of rules with more states are stored in a dictionary."""
+
+    NEIGHBORS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+    BITS = (256, 128, 64, 32, 8, 4, 2, 1)   # Bits of a cell in the index of each neighbor
+    MAX_KEY = 1 << 62       # Larger areas cannot be encoded to int64 keys
+    MAX_STATES = 256
+    TOPOLOGIES = TOPOLOGIES
+    UNBOUNDED_PLANE = True
+
+    def __init__(self) -> None:
+        """Initialize instance variables."""
+
+        self.__cells = set()
+        self.__dying = {}           # Cells in dying states -> state
+        self.__height = None        # Bounds of the grid, None if unbounded
+        self.__width = None
+        self.__topology = BOUNDED
+        self.__living = []          # Cached coordinates of living cells
+        self.__previous = None      # Cells before the last generation, None after edits
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            self.__living = list(self.__cells)
+        return self.__living
+
+    @property
+    def changes(self) -> tuple:
+        if self.__previous == None:
+            return None
+        return list(self.__cells - self.__previous), list(self.__previous - self.__cells)
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        self.__cells = set()
+        self.__dying = {}
+        self.__height = height
+        self.__width = width
+        self.__living = []
+        self.__previous = None
+
+    def reset_unbounded(self) -> None:
+        """Create a new empty unbounded plane, positions may be negative."""
+
+        self.reset(None, None)
+
+    def copy(self) -> 'SparseEngine':
+        """Return a new engine with a copy of the cells."""
+
+        engine = SparseEngine()
+        engine.__cells = self.__cells.copy()
+        engine.__dying = self.__dying.copy()
+        engine.__height = self.__height
+        engine.__width = self.__width
+        engine.__topology = self.__topology
+        engine.__living = None
+        return engine
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined."""
+
+        self.__topology = topology
+
+    def clear(self) -> None:
+        """Remove all living cells."""
+
+        self.__cells = set()
+        self.__dying = {}
+        self.__living = []
+        self.__previous = None
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if (i, j) not in self.__cells:
+            self.__cells.add((i, j))
+            self.__dying.pop((i, j), None)
+            self.__living = None
+            self.__previous = None
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        if (i, j) in self.__cells:
+            self.__cells.remove((i, j))
+            self.__living = None
+            self.__previous = None
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions with one set operation. Return the cells that were dead before."""
+
+        born = set(cells) - self.__cells
+        if born:
+            self.__cells |= born
+            for cell in born.intersection(self.__dying):
+                del self.__dying[cell]
+            self.__living = None
+            self.__previous = None
+        return list(born)
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions with one set operation. Return the cells that were alive before."""
+
+        died = self.__cells.intersection(cells)
+        if died:
+            self.__cells -= died
+            self.__living = None
+            self.__previous = None
+        return list(died)
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        return (i, j) in self.__cells
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation and set it as current."""
+
+        self.__previous = self.__cells
+        if not self.__cells and not self.__dying:
+            return
+
+        # Living cells at joined edges are also added just outside the opposite edges,
+        # like the border of a padded grid, the cells outside are removed afterwards
+        source = self.__cells
+        if self.__height != None and self.__topology != BOUNDED:
+            last_row, last_col = self.__height - 1, self.__width - 1
+            source = source.union(
+                ghost for i, j in source if i == 0 or i == last_row or j == 0 or j == last_col
+                for ghost in ghost_positions(i, j, self.__height, self.__width, self.__topology))
+
+        if np != None and source:
+            cells = self.__next_cells_numpy(source, rule)
+        else:
+            cells = None
+        if cells == None:
+            cells = self.__next_cells(source, rule)
+
+        if self.__height != None:
+            cells = {(i, j) for i, j in cells
+                     if 0 <= i and i < self.__height and 0 <= j and j < self.__width}
+
+        if rule.states > 2 or self.__dying:
+            # No cell is born in a dying cell, cells that did not survive start dying
+            cells -= self.__dying.keys()
+            dying = {cell: state + 1 for cell, state in self.__dying.items() if state + 1 < rule.states}
+            if rule.states > 2:
+                dying.update(dict.fromkeys(self.__cells - cells, 2))
+            self.__dying = dying
+
+        self.__cells = cells
+        self.__living = None
+
+    def __next_cells(self, source: set, rule: RuleTable) -> set:
+        """Build neighborhood indexes of the living cells in a dictionary
+        and return cells of the next generation."""
+
+        index = dict.fromkeys(source, CENTER)
+        for i, j in source:
+            for (di, dj), bit in zip(self.NEIGHBORS, self.BITS):
+                key = (i + di, j + dj)
+                index[key] = index.get(key, 0) | bit
+
+        table = rule.table
+        return {cell for cell, x in index.items() if table[x]}
+
+    def __next_cells_numpy(self, source: set, rule: RuleTable) -> set:
+        """Encode the living cells as integer keys, count neighbors or build neighborhood
+        indexes of all cells at once and return cells of the next generation.
+        Return None if the cells are too far apart to be encoded."""
+
+        cells = np.array(list(source), dtype=np.int64)
+        top = int(cells[:, 0].min()) - 1
+        left = int(cells[:, 1].min()) - 1
+        span = int(cells[:, 1].max()) - left + 2
+        if (int(cells[:, 0].max()) - top + 2) * span >= self.MAX_KEY:
+            return None
+
+        keys = (cells[:, 0] - top) * span + (cells[:, 1] - left)
+        offsets = np.array([di * span + dj for di, dj in self.NEIGHBORS], dtype=np.int64)
+
+        # Living cells are included once more, so that they are counted even without neighbors
+        candidates = np.concatenate(((keys[:, None] + offsets).ravel(), keys))
+
+        rule_counts = rule.counts
+        if rule_counts != None:
+            # Totalistic rules need only the number of neighbors, which is faster to find
+            candidates, counts = np.unique(candidates, return_counts=True)
+            alive = np.isin(candidates, keys, assume_unique=True)
+            counts -= alive
+
+            birth = np.zeros(10, dtype=bool)
+            birth[list(rule_counts[0])] = True
+            remain = np.zeros(10, dtype=bool)
+            remain[list(rule_counts[1])] = True
+            next_keys = candidates[np.where(alive, remain[counts], birth[counts])]
+        else:
+            # Each cell adds its bit to the indexes of its neighbors and the center bit to its own
+            bits = np.concatenate((np.tile(np.array(self.BITS, dtype=np.int64), len(keys)),
+                                   np.full(len(keys), CENTER, dtype=np.int64)))
+            order = np.argsort(candidates)
+            candidates, bits = candidates[order], bits[order]
+            starts = np.flatnonzero(np.r_[True, candidates[1:] != candidates[:-1]])
+            index = np.bitwise_or.reduceat(bits, starts)
+            next_keys = candidates[starts][rule.array[index] == 1]
+
+        rows = next_keys // span + top
+        cols = next_keys % span + left
+        return set(zip(rows.tolist(), cols.tolist()))
+
+
+class TiledEngine(Engine):
+    """Divides the plane into square tiles stored as NumPy arrays and computes only
+    active tiles, which changed in the last generation or whose neighbors changed
+    next to them. Stable regions are skipped, the plane can be unbounded.
+    A different rule table, e.g. the next phase of a rule with birth on 0 neighbors,
+    activates all stored tiles."""
+
+    TILE_SIZE = 64
+    SPATIAL_WINDOW = True
+    UNBOUNDED_PLANE = True
+
+    def __init__(self, tile_size: int = TILE_SIZE) -> None:
+        """Initialize instance variables."""
+
+        if np == None:
+            raise RuntimeError('NumPy library is missing.')
+
+        self.__size = tile_size
+        self.__tiles = {}           # Tile position -> array of cells, empty tiles are dropped
+        self.__active = set()       # Positions of tiles computed in the next generation
+        self.__height = None        # Bounds of the grid, None if unbounded
+        self.__width = None
+        self.__living = []          # Cached coordinates of living cells
+        self.__changed = None       # Old and new values of tiles changed in the last generation
+        self.__table = None         # Rule table of the last generation
+
+    # PROPERTIES
+    # region
+    @property
+    def tile_size(self) -> int:
+        return self.__size
+
+    @property
+    def active_tiles(self) -> int:
+        return len(self.__active)
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            self.__living = self.__find_living()
+        return self.__living
+
+    @property
+    def changes(self) -> tuple:
+        if self.__changed == None:
+            return None
+
+        births, deaths = [], []
+        for ti, tj, old, new in self.__changed:
+            born, died = changes_from_grids(old, new, ti * self.__size, tj * self.__size)
+            births.extend(born)
+            deaths.extend(died)
+        return births, deaths
+    # endregion
+
+    def __find_living(self) -> list:
+        """Find coordinates of living cells in all tiles."""
+
+        living = []
+        for (ti, tj), tile in self.__tiles.items():
+            rows, cols = np.nonzero(tile)
+            rows += ti * self.__size
+            cols += tj * self.__size
+            living.extend(zip(rows.tolist(), cols.tolist()))
+        return living
+
+    def __is_tile_inside(self, ti: int, tj: int) -> bool:
+        """Check if the tile (ti, tj) covers some cells of the grid."""
+
+        if self.__height == None:
+            return True
+        return (0 <= ti and ti * self.__size < self.__height and
+                0 <= tj and tj * self.__size < self.__width)
+
+    def __wake(self, ti: int, tj: int) -> None:
+        """Activate the tile (ti, tj) and its neighbors."""
+
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if self.__is_tile_inside(ti + di, tj + dj):
+                    self.__active.add((ti + di, tj + dj))
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        self.__tiles = {}
+        self.__active = set()
+        self.__height = height
+        self.__width = width
+        self.__living = []
+        self.__changed = None
+
+    def reset_unbounded(self) -> None:
+        """Create a new empty unbounded plane, positions may be negative."""
+
+        self.reset(None, None)
+
+    def copy(self) -> 'TiledEngine':
+        """Return a new engine with a copy of the tiles."""
+
+        engine = TiledEngine(self.__size)
+        engine.__tiles = {key: tile.copy() for key, tile in self.__tiles.items()}
+        engine.__active = self.__active.copy()
+        engine.__height = self.__height
+        engine.__width = self.__width
+        engine.__living = None
+        engine.__table = self.__table
+        return engine
+
+    def clear(self) -> None:
+        """Remove all living cells."""
+
+        self.__tiles = {}
+        self.__active = set()
+        self.__living = []
+        self.__changed = None
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        ti, r = divmod(i, self.__size)
+        tj, c = divmod(j, self.__size)
+        if (ti, tj) not in self.__tiles:
+            self.__tiles[(ti, tj)] = np.zeros((self.__size, self.__size), dtype=np.uint8)
+
+        tile = self.__tiles[(ti, tj)]
+        if not tile[r, c]:
+            tile[r, c] = 1
+            self.__wake(ti, tj)
+            self.__living = None
+            self.__changed = None
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        ti, r = divmod(i, self.__size)
+        tj, c = divmod(j, self.__size)
+        if (ti, tj) in self.__tiles and self.__tiles[(ti, tj)][r, c]:
+            self.__tiles[(ti, tj)][r, c] = 0
+            self.__wake(ti, tj)
+            self.__living = None
+            self.__changed = None
+
+    def __set_cells(self, cells: list, value: int) -> list:
+        """Set cells at the positions to the value (1 alive, 0 dead), tile by tile.
+        Return positions of the cells that changed, each only once."""
+
+        if len(cells) == 0:
+            return []
+
+        # Keys of cells are ordered by tiles, so cells of one tile are next to each other
+        size = self.__size
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        tile_rows, rows = np.divmod(cells[:, 0], size)
+        tile_cols, cols = np.divmod(cells[:, 1], size)
+        first_row, first_col = tile_rows.min(), tile_cols.min()
+        tile_keys = (tile_rows - first_row) * (tile_cols.max() - first_col + 1) + (tile_cols - first_col)
+        keys, first = np.unique((tile_keys * size + rows) * size + cols, return_index=True)
+        tile_rows, tile_cols = tile_rows[first], tile_cols[first]
+        rows, cols = rows[first], cols[first]
+
+        changed = []
+        ends = np.flatnonzero(np.diff(keys // (size * size))) + 1
+        for start, end in zip([0] + ends.tolist(), ends.tolist() + [len(keys)]):
+            ti, tj = int(tile_rows[start]), int(tile_cols[start])
+            tile = self.__tiles.get((ti, tj))
+            if tile is None:
+                if not value:
+                    continue
+                tile = self.__tiles[(ti, tj)] = np.zeros((size, size), dtype=np.uint8)
+
+            r, c = rows[start:end], cols[start:end]
+            hit = tile[r, c] != value
+            if hit.any():
+                r, c = r[hit], c[hit]
+                tile[r, c] = value
+                self.__wake(ti, tj)
+                changed.extend(zip((r + ti * size).tolist(), (c + tj * size).tolist()))
+
+        if changed:
+            self.__living = None
+            self.__changed = None
+        return changed
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions at once. Return the cells that were dead before."""
+
+        return self.__set_cells(cells, 1)
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions at once. Return the cells that were alive before."""
+
+        return self.__set_cells(cells, 0)
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        ti, r = divmod(i, self.__size)
+        tj, c = divmod(j, self.__size)
+        return (ti, tj) in self.__tiles and bool(self.__tiles[(ti, tj)][r, c])
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left),
+        copy only tiles in the rectangle."""
+
+        result = np.zeros((height, width), dtype=bool)
+        size = self.__size
+        for ti in range(top // size, (top + height - 1) // size + 1):
+            for tj in range(left // size, (left + width - 1) // size + 1):
+                if (ti, tj) in self.__tiles:
+                    part = window_from_grid(self.__tiles[(ti, tj)], top - ti * size,
+                                            left - tj * size, height, width)
+                    result |= part
+        return result
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation of active tiles, all at once in one stacked array."""
+
+        def fill_padded(padded: 'np.ndarray', ti: int, tj: int) -> None:
+            """Copy the tile (ti, tj) and the adjacent cells of its neighbors."""
+
+            tiles = self.__tiles
+            if (ti, tj) in tiles:
+                padded[1:-1, 1:-1] = tiles[(ti, tj)]
+            if (ti - 1, tj) in tiles:
+                padded[0, 1:-1] = tiles[(ti - 1, tj)][-1]
+            if (ti + 1, tj) in tiles:
+                padded[-1, 1:-1] = tiles[(ti + 1, tj)][0]
+            if (ti, tj - 1) in tiles:
+                padded[1:-1, 0] = tiles[(ti, tj - 1)][:, -1]
+            if (ti, tj + 1) in tiles:
+                padded[1:-1, -1] = tiles[(ti, tj + 1)][:, 0]
+            if (ti - 1, tj - 1) in tiles:
+                padded[0, 0] = tiles[(ti - 1, tj - 1)][-1, -1]
+            if (ti - 1, tj + 1) in tiles:
+                padded[0, -1] = tiles[(ti - 1, tj + 1)][-1, 0]
+            if (ti + 1, tj - 1) in tiles:
+                padded[-1, 0] = tiles[(ti + 1, tj - 1)][0, -1]
+            if (ti + 1, tj + 1) in tiles:
+                padded[-1, -1] = tiles[(ti + 1, tj + 1)][0, 0]
+
+        def clip_to_grid(tile: 'np.ndarray', ti: int, tj: int) -> None:
+            """Kill cells of the tile (ti, tj) outside a bounded grid."""
+
+            if self.__height == None:
+                return
+            tile[max(0, self.__height - ti * size):, :] = 0
+            tile[:, max(0, self.__width - tj * size):] = 0
+
+        # Stable tiles are stable only under the rule they were computed with
+        if rule.table != self.__table:
+            for ti, tj in self.__tiles:
+                self.__wake(ti, tj)
+            self.__table = rule.table
+
+        self.__changed = []
+        if not self.__active:
+            return
+
+        size = self.__size
+        keys = list(self.__active)
+        padded = np.zeros((len(keys), size + 2, size + 2), dtype=np.uint8)
+        for k, (ti, tj) in enumerate(keys):
+            fill_padded(padded[k], ti, tj)
+
+        old = padded[:, 1:-1, 1:-1]
+        new = next_states(padded, rule)
+        for k, (ti, tj) in enumerate(keys):
+            clip_to_grid(new[k], ti, tj)
+
+        # Find which edges and corners of tiles changed
+        diff = new != old
+        changed = diff.any(axis=(1, 2))
+        edges = np.stack((diff[:, 0, :].any(axis=1), diff[:, -1, :].any(axis=1),
+                          diff[:, :, 0].any(axis=1), diff[:, :, -1].any(axis=1),
+                          diff[:, 0, 0], diff[:, 0, -1], diff[:, -1, 0], diff[:, -1, -1]), axis=1)
+        directions = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+        self.__active = set()
+        for k in np.nonzero(changed)[0].tolist():
+            ti, tj = keys[k]
+            self.__changed.append((ti, tj, old[k], new[k]))
+            if new[k].any():
+                self.__tiles[(ti, tj)] = new[k].copy()
+            else:
+                self.__tiles.pop((ti, tj), None)
+
+            self.__active.add((ti, tj))
+            for (di, dj), edge_changed in zip(directions, edges[k].tolist()):
+                if edge_changed and self.__is_tile_inside(ti + di, tj + dj):
+                    self.__active.add((ti + di, tj + dj))
+
+        self.__living = None
+
+
+def strip_worker(conn, names: tuple, shape: tuple, first: int, last: int) -> None:
+    """Step rows first..last-1 of a padded grid in shared memory on each request.
+    Runs in a worker process of ProcessEngine until it receives None."""
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    memories = [SharedMemory(name=name) for name in names]
+    grids = [np.ndarray(shape, dtype=np.uint8, buffer=memory.buf) for memory in memories]
+
+    rule = None
+
+    while True:
+        message = conn.recv()
+        if message == None:
+            break
+
+        current, table, states = message
+        if rule == None or rule.table != table or rule.states != states:
+            rule = RuleTable(table, states)
+
+        # The rows above and below the strip are read from the neighboring strips
+        step_rows(grids[current], grids[1 - current], first, last, rule)
+        conn.send(True)
+
+    del grids
+    for memory in memories:
+        memory.close()
+    conn.close()
+
+
+def release_workers(workers: list, memories: list) -> None:
+    """Stop worker processes and free shared memory of a ProcessEngine."""
+
+    for process, conn in workers:
+        try:
+            conn.send(None)
+        except OSError:
+            pass
+    for process, conn in workers:
+        process.join()
+        conn.close()
+    workers.clear()
+
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+    memories.clear()
+
+
+class ProcessEngine(Engine):
+    """Splits the grid into horizontal strips computed in parallel by a persistent
+    pool of worker processes. Both grids move to shared memory when the workers start,
+    so workers read the rows next to their strips directly and synchronise once
+    per generation. Engines that never compute a generation, e.g. copies kept
+    in the history, start no workers."""
+
+    SPATIAL_WINDOW = True
+    EVERY_CELL = True
+    MAX_STATES = 256
+    TOPOLOGIES = TOPOLOGIES
+
+    def __init__(self, workers: int = None) -> None:
+        """Initialize instance variables.
+        Uses one worker per CPU by default."""
+
+        if np == None:
+            raise RuntimeError('NumPy library is missing.')
+
+        self.__worker_count = workers if workers != None else (os.cpu_count() or 1)
+        self.__topology = BOUNDED
+        self.__shape = (2, 2)
+        self.__memories = []        # Shared memory of the current and the next grid
+        self.__grids = [np.zeros(self.__shape, dtype=np.uint8) for x in range(2)]  # Padded grids
+        self.__current = 0          # Index of the current grid
+        self.__workers = []         # Pairs (process, connection)
+        self.__release = None
+        self.__living = []          # Cached coordinates of living cells
+        self.__stepped = False      # The other grid holds the previous generation
+
+    # PROPERTIES
+    # region
+    @property
+    def worker_count(self) -> int:
+        return self.__worker_count
+
+    @property
+    def grid(self) -> 'np.ndarray':
+        """View of the current grid without the border."""
+
+        return self.__grids[self.__current][1:-1, 1:-1]
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            rows, cols = np.nonzero(self.grid == 1)
+            self.__living = list(zip(rows.tolist(), cols.tolist()))
+        return self.__living
+
+    @property
+    def changes(self) -> tuple:
+        if not self.__stepped:
+            return None
+        return changes_from_grids(self.__grids[1 - self.__current][1:-1, 1:-1], self.grid)
+    # endregion
+
+    def __start_workers(self) -> None:
+        """Move both grids to shared memory and start a worker process for each strip."""
+
+        # Multiprocessing is imported only when needed, it slows down loading of the module
+        from multiprocessing import Pipe, Process
+        from multiprocessing.shared_memory import SharedMemory
+
+        size = self.__shape[0] * self.__shape[1]
+        self.__memories = [SharedMemory(create=True, size=size) for x in range(2)]
+        self.__workers = []
+        self.__release = weakref.finalize(self, release_workers, self.__workers, self.__memories)
+
+        grids = [np.ndarray(self.__shape, dtype=np.uint8, buffer=memory.buf)
+                 for memory in self.__memories]
+        for grid, old in zip(grids, self.__grids):
+            grid[...] = old
+        self.__grids = grids
+
+        height = self.__shape[0] - 2
+        count = max(1, min(self.__worker_count, height))
+        names = tuple(memory.name for memory in self.__memories)
+
+        for k in range(count):
+            first = height * k // count
+            last = height * (k + 1) // count
+            parent_conn, child_conn = Pipe()
+            process = Process(target=strip_worker, daemon=True,
+                              args=(child_conn, names, self.__shape, first, last))
+            process.start()
+            child_conn.close()
+            self.__workers.append((process, parent_conn))
+
+    def close(self) -> None:
+        """Stop the worker processes and free the shared memory, the grids are kept
+        in the process. Workers start again with the next generation."""
+
+        if self.__release != None:
+            # Views of the shared memory must not exist when it is freed
+            self.__grids = [grid.copy() for grid in self.__grids]
+            self.__release()
+            self.__release = None
+            self.__workers = []
+            self.__memories = []
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions, workers start with the first generation."""
+
+        self.close()
+
+        self.__shape = (height + 2, width + 2)
+        self.__grids = [np.zeros(self.__shape, dtype=np.uint8) for x in range(2)]
+        self.__current = 0
+        self.__living = []
+        self.__stepped = False
+
+    def copy(self) -> 'ProcessEngine':
+        """Return a new engine with a copy of the grid. It shares no memory or workers
+        with this engine and starts its own workers only when it computes a generation."""
+
+        engine = ProcessEngine(self.__worker_count)
+        engine.__shape = self.__shape
+        engine.__grids = [self.__grids[self.__current].copy(), np.zeros(self.__shape, dtype=np.uint8)]
+        engine.__topology = self.__topology
+        engine.__living = self.__living.copy() if self.__living != None else None
+        return engine
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined."""
+
+        self.__topology = topology
+
+    def clear(self) -> None:
+        """Remove all living cells from the grid."""
+
+        self.grid.fill(0)
+        self.__living = []
+        self.__stepped = False
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if self.grid[i, j] != 1:
+            self.grid[i, j] = 1
+            self.__living = None
+            self.__stepped = False
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        if self.grid[i, j] == 1:
+            self.grid[i, j] = 0
+            self.__living = None
+            self.__stepped = False
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions at once. Return the cells that were dead before."""
+
+        born = set_cells_in_grid(self.grid, cells, 1)
+        if born:
+            self.__living = None
+            self.__stepped = False
+        return born
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions at once. Return the cells that were alive before."""
+
+        died = set_cells_in_grid(self.grid, cells, 0)
+        if died:
+            self.__living = None
+            self.__stepped = False
+        return died
+
+    def set_rect(self, top: int, left: int, height: int, width: int, value: bool = None) -> tuple:
+        """Make all cells in the rectangle alive or dead, or invert them if the value is None,
+        with one slice of the grid. Return lists of cells born and died."""
+
+        births, deaths = set_rect_in_grid(self.grid, top, left, height, width,
+                                          None if value == None else int(value))
+        if births or deaths:
+            self.__living = None
+            self.__stepped = False
+        return births, deaths
+
+    def add_bit_rows(self, rows: 'np.ndarray', top: int, left: int, width: int) -> None:
+        """Add living cells from packed rows, unpacked straight into a slice of the grid."""
+
+        np.copyto(self.grid[top:top + len(rows), left:left + width], 1,
+                  where=unpack_rows(rows, width) == 1)
+        self.__living = None
+        self.__stepped = False
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        return self.grid[i, j] == 1
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left)."""
+
+        return window_from_grid(self.grid, top, left, height, width)
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Let every worker compute its strip and wait until all of them finish."""
+
+        if self.__shape[0] <= 2 or self.__shape[1] <= 2:
+            return
+
+        if not self.__workers:
+            self.__start_workers()
+
+        # The border is filled once, workers read it with the rows next to their strips
+        fill_border(self.__grids[self.__current], self.__topology)
+        message = (self.__current, rule.table, rule.states)
+        for process, conn in self.__workers:
+            conn.send(message)
+        for process, conn in self.__workers:
+            conn.recv()
+
+        self.__current = 1 - self.__current
+        self.__living = None
+        self.__stepped = True
+
+
+class ThreadedEngine(Engine):
+    """Splits the grid into horizontal bands computed in parallel by a reusable pool
+    of threads. NumPy releases the GIL in array operations, so the bands run
+    at the same time inside one process."""
+
+    SPATIAL_WINDOW = True
+    EVERY_CELL = True
+    MAX_STATES = 256
+    TOPOLOGIES = TOPOLOGIES
+
+    def __init__(self, workers: int = None) -> None:
+        """Initialize instance variables.
+        Uses one thread per CPU by default."""
+
+        if np == None:
+            raise RuntimeError('NumPy library is missing.')
+
+        self.__worker_count = workers if workers != None else (os.cpu_count() or 1)
+        self.__topology = BOUNDED
+        self.__executor = None
+        self.__grids = [np.zeros((2, 2), dtype=np.uint8) for x in range(2)]
+        self.__current = 0          # Index of the current grid, the other is the next grid
+        self.__living = []          # Cached coordinates of living cells
+        self.__stepped = False      # The other grid holds the previous generation
+
+    # PROPERTIES
+    # region
+    @property
+    def worker_count(self) -> int:
+        return self.__worker_count
+
+    @worker_count.setter
+    def worker_count(self, value: int) -> None:
+        if value >= 1 and value != self.__worker_count:
+            self.close()
+            self.__worker_count = value
+
+    @property
+    def grid(self) -> 'np.ndarray':
+        """View of the current grid without the border."""
+
+        return self.__grids[self.__current][1:-1, 1:-1]
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            rows, cols = np.nonzero(self.grid == 1)
+            self.__living = list(zip(rows.tolist(), cols.tolist()))
+        return self.__living
+
+    @property
+    def changes(self) -> tuple:
+        if not self.__stepped:
+            return None
+        return changes_from_grids(self.__grids[1 - self.__current][1:-1, 1:-1], self.grid)
+    # endregion
+
+    def close(self) -> None:
+        """Stop the threads, a new pool is created for the next generation."""
+
+        if self.__executor != None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def reset(self, height: int, width: int) -> None:
+        """Create a new empty grid with given dimensions."""
+
+        self.__grids = [np.zeros((height + 2, width + 2), dtype=np.uint8) for x in range(2)]
+        self.__current = 0
+        self.__living = []
+        self.__stepped = False
+
+    def copy(self) -> 'ThreadedEngine':
+        """Return a new engine with a copy of the grid and its own threads."""
+
+        engine = ThreadedEngine(self.__worker_count)
+        engine.__grids = [grid.copy() for grid in self.__grids]
+        engine.__current = self.__current
+        engine.__topology = self.__topology
+        engine.__living = None
+        return engine
+
+    def set_topology(self, topology: str) -> None:
+        """Set how the edges of the bounded grid are joined."""
+
+        self.__topology = topology
+
+    def clear(self) -> None:
+        """Remove all living cells from the grid."""
+
+        self.grid.fill(0)
+        self.__living = []
+        self.__stepped = False
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if self.grid[i, j] != 1:
+            self.grid[i, j] = 1
+            self.__living = None
+            self.__stepped = False
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        if self.grid[i, j] == 1:
+            self.grid[i, j] = 0
+            self.__living = None
+            self.__stepped = False
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions at once. Return the cells that were dead before."""
+
+        born = set_cells_in_grid(self.grid, cells, 1)
+        if born:
+            self.__living = None
+            self.__stepped = False
+        return born
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions at once. Return the cells that were alive before."""
+
+        died = set_cells_in_grid(self.grid, cells, 0)
+        if died:
+            self.__living = None
+            self.__stepped = False
+        return died
+
+    def set_rect(self, top: int, left: int, height: int, width: int, value: bool = None) -> tuple:
+        """Make all cells in the rectangle alive or dead, or invert them if the value is None,
+        with one slice of the grid. Return lists of cells born and died."""
+
+        births, deaths = set_rect_in_grid(self.grid, top, left, height, width,
+                                          None if value == None else int(value))
+        if births or deaths:
+            self.__living = None
+            self.__stepped = False
+        return births, deaths
+
+    def add_bit_rows(self, rows: 'np.ndarray', top: int, left: int, width: int) -> None:
+        """Add living cells from packed rows, unpacked straight into a slice of the grid."""
+
+        np.copyto(self.grid[top:top + len(rows), left:left + width], 1,
+                  where=unpack_rows(rows, width) == 1)
+        self.__living = None
+        self.__stepped = False
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        return self.grid[i, j] == 1
+
+    def window(self, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return a bool array of cells in the rectangle with the top left cell (top, left)."""
+
+        return window_from_grid(self.grid, top, left, height, width)
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute each band in a thread of the pool and wait until all of them finish."""
+
+        source = self.__grids[self.__current]
+        target = self.__grids[1 - self.__current]
+        height = source.shape[0] - 2
+        if height <= 0 or source.shape[1] <= 2:
+            return
+
+        if self.__executor == None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.__executor = ThreadPoolExecutor(max_workers=self.__worker_count)
+
+        fill_border(source, self.__topology)
+        count = max(1, min(self.__worker_count, height))
+        futures = [self.__executor.submit(step_rows, source, target,
+                                          height * k // count, height * (k + 1) // count, rule)
+                   for k in range(count)]
+        for future in futures:
+            future.result()
+
+        self.__current = 1 - self.__current
+        self.__living = None
+        self.__stepped = True
+
+    def measure_speedup(self, rule: RuleTable, generations: int = 10) -> float:
+        """Return how many times faster copies of the grid are computed
+        with all threads than with one thread. The grid is not changed."""
+
+        times = []
+        for workers in (1, self.__worker_count):
+            engine = self.copy()
+            engine.worker_count = workers
+            engine.next_gen(rule)       # Start the threads
+
+            start = time.perf_counter()
+            for x in range(generations):
+                engine.next_gen(rule)
+            times.append(time.perf_counter() - start)
+            engine.close()
+
+        return times[0] / times[1] if times[1] > 0 else 1.0
+
+
+def default_engine() -> Engine:
+    """Return a new instance of the fastest available engine."""
+
+    if np != None:
+        return BitEngine()
+    return ListEngine()
@@ -0,0 +1,813 @@
+
+import itertools
+import mmap
+import os
+import re
+import struct
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from core import Board, CellIndex, Rule
+from rules import RuleTable, NEIGHBORHOODS, totalistic_rule
+from topology import BOUNDED, TORUS, KLEIN_BOTTLE, TOPOLOGIES
+
+
+# Binary boards start with a header of fixed size, the body stores living cells
+# of the rectangle given by the header
+BINARY_MAGIC = b'GOLB'
+BINARY_VERSION = 1
+BINARY_EXTENSION = '.gol'
+
+# Magic, version, body, flags, birth rule, remain rule, generation, top, left, height, width,
+# states of the rule (0 in older files means 2), topology of a bounded board (index
+# in TOPOLOGIES), padded to 64 bytes so that words of the body are aligned in a mapped file
+HEADER = struct.Struct('<4sBBHHHqqqqqHB9x')
+RULE_TABLE_SIZE = NEIGHBORHOODS // 8
+
+BODY_BITS = 0       # Rows of little endian uint64 words, 64 cells per word, the first cell in the lowest bit
+BODY_CELLS = 1      # Pairs of little endian int64 coordinates of living cells
+FLAG_BOUNDED = 1    # The rectangle is the whole bounded board
+FLAG_RULE_TABLE = 2     # The rule is not totalistic, its lookup table follows the header in 64 bytes
+
+# Text formats are read and written in chunks, cells are added to the board in batches
+CHUNK_SIZE = 1 << 16
+BATCH_SIZE = 1 << 16
+ROW_BAND = 64       # Rows of cells sorted at once by writers of rows
+
+FORMAT_PAIRS = 'pairs'          # Own format, coordinates "i j" separated by spaces
+FORMAT_BINARY = 'binary'
+FORMAT_RLE = 'rle'
+FORMAT_LIFE106 = 'life106'
+FORMAT_PLAINTEXT = 'plaintext'
+EXTENSIONS = {BINARY_EXTENSION: FORMAT_BINARY, '.rle': FORMAT_RLE, '.lif': FORMAT_LIFE106,
+              '.life': FORMAT_LIFE106, '.cells': FORMAT_PLAINTEXT}
+
+RLE_HEADER = re.compile(r'\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?')
+RLE_TOKEN = re.compile(r'(\d*)(\D)')
+RLE_LINE_LENGTH = 70
+
+# Bounded grids of Golly after the rule, e.g. B3/S23:T100,80 (torus 100 wide and 80 high),
+# the asterisk of a Klein bottle marks the twisted top and bottom edges
+GRID_SUFFIXES = {TORUS: 'T{},{}', KLEIN_BOTTLE: 'K{}*,{}'}
+GRID_SUFFIX = re.compile(r'([PpTtKk])(\d+)(\*?),(\d+)')
+
+
+class FormatError(ValueError):
+    """Raised by readers of pattern files if the file is damaged or does not fit on the board."""
+
+
+class Cancelled(Exception):
+    """Raised while a file is read or written if the work was cancelled."""
+
+
+class Progress:
+    """Progress of reading or writing a file, shared by the thread doing the work
+    and the window showing it. The window can cancel the work."""
+
+    def __init__(self) -> None:
+        """Initialize instance variables."""
+
+        self.__done = 0             # Characters read or written
+        self.__total = None         # Size of the read file, None when writing
+        self.__is_cancelled = False
+
+    # PROPERTIES
+    # region
+    @property
+    def done(self) -> int:
+        return self.__done
+
+    @property
+    def total(self) -> int:
+        return self.__total
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.__is_cancelled
+    # endregion
+
+    def start(self, total: int = None) -> None:
+        """Start counting the work, the total is unknown when writing."""
+
+        self.__done = 0
+        self.__total = total
+
+    def advance(self, amount: int) -> None:
+        """Count the amount of work, raise Cancelled if the work was cancelled."""
+
+        if self.__is_cancelled:
+            raise Cancelled()
+        self.__done += amount
+
+    def cancel(self) -> None:
+        """Stop the work at the next reported amount."""
+
+        self.__is_cancelled = True
+
+
+class ProgressFile:
+    """Text file which reports read and written characters to a progress."""
+
+    def __init__(self, f, progress: Progress) -> None:
+        """Initialize instance variables."""
+
+        self.__file = f
+        self.__progress = progress
+
+    def read(self, size: int = -1) -> str:
+        """Read at most size characters."""
+
+        text = self.__file.read(size)
+        self.__progress.advance(len(text))
+        return text
+
+    def readline(self) -> str:
+        """Read one line."""
+
+        line = self.__file.readline()
+        self.__progress.advance(len(line))
+        return line
+
+    def __iter__(self) -> 'Iterator[str]':
+        """Read the file line by line."""
+
+        for line in self.__file:
+            self.__progress.advance(len(line))
+            yield line
+
+    def write(self, text: str) -> None:
+        """Write the text."""
+
+        self.__progress.advance(len(text))
+        self.__file.write(text)
+
+
+class CellBatch:
+    """Collects cells read from a pattern file and adds them to a board in batches,
+    so that the memory does not grow with the size of the file.
+    The pattern is moved by the given offset."""
+
+    def __init__(self, board: Board, top: int = 0, left: int = 0) -> None:
+        """Initialize instance variables."""
+
+        self.__board = board
+        self.__top = top
+        self.__left = left
+        self.__cells = []
+
+    def add_run(self, i: int, j: int, length: int = 1) -> None:
+        """Add a run of living cells in a row starting with the cell (i, j)."""
+
+        board = self.__board
+        i += self.__top
+        j += self.__left
+        if board.bounded and not (0 <= i < board.height and 0 <= j and j + length <= board.width):
+            raise FormatError('The pattern does not fit on the board.')
+        self.__add_moved_run(i, j, length)
+
+    def add_runs(self, rows: 'np.ndarray', columns: 'np.ndarray', lengths: 'np.ndarray') -> None:
+        """Add runs of living cells given by arrays of rows, first columns and lengths.
+        The runs are expanded to cells in parts of about one batch."""
+
+        if len(rows) == 0:
+            return
+
+        board = self.__board
+        rows = rows + self.__top
+        columns = columns + self.__left
+        if board.bounded and ((rows < 0) | (rows >= board.height) | (columns < 0) |
+                              (columns + lengths > board.width)).any():
+            raise FormatError('The pattern does not fit on the board.')
+
+        is_long = lengths > BATCH_SIZE
+        for k in np.flatnonzero(is_long):
+            self.__add_moved_run(int(rows[k]), int(columns[k]), int(lengths[k]))
+        rows, columns, lengths = rows[~is_long], columns[~is_long], lengths[~is_long]
+
+        # A part ends with the run which crosses a multiple of the batch size
+        splits = np.flatnonzero(np.diff((np.cumsum(lengths) - 1) // BATCH_SIZE)) + 1
+        for part_rows, part_columns, part_lengths in zip(np.split(rows, splits), np.split(columns, splits),
+                                                         np.split(lengths, splits)):
+            starts = np.cumsum(part_lengths) - part_lengths
+            offsets = np.arange(starts[-1] + part_lengths[-1]) - np.repeat(starts, part_lengths)
+            cell_rows = np.repeat(part_rows, part_lengths)
+            cell_columns = np.repeat(part_columns, part_lengths) + offsets
+            self.__cells.extend(zip(cell_rows.tolist(), cell_columns.tolist()))
+            if len(self.__cells) >= BATCH_SIZE:
+                self.flush()
+
+    def __add_moved_run(self, i: int, j: int, length: int) -> None:
+        """Add a run of cells already moved by the offset and checked against the board."""
+
+        while length > 0:
+            count = min(length, BATCH_SIZE - len(self.__cells))
+            self.__cells.extend((i, j + k) for k in range(count))
+            j += count
+            length -= count
+            if len(self.__cells) >= BATCH_SIZE:
+                self.flush()
+
+    def flush(self) -> None:
+        """Add the collected cells to the board."""
+
+        if self.__cells:
+            self.__board.add_many(self.__cells)
+            self.__cells = []
+
+
+class ChunkWriter:
+    """Collects pieces of text and writes them to a file in chunks of bounded size."""
+
+    def __init__(self, f) -> None:
+        """Initialize instance variables."""
+
+        self.__file = f
+        self.__pieces = []
+        self.__size = 0
+
+    def write(self, text: str) -> None:
+        """Write the text, the file is written when a chunk is full."""
+
+        self.__pieces.append(text)
+        self.__size += len(text)
+        if self.__size >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the collected text to the file."""
+
+        self.__file.write(''.join(self.__pieces))
+        self.__pieces = []
+        self.__size = 0
+
+
+def is_binary(file_name: str) -> bool:
+    """Check if the file starts like a binary board."""
+
+    with open(file_name, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def rule_mask(rule: set) -> int:
+    """Return numbers of a rule as bits of an integer."""
+
+    return sum(1 << x for x in rule)
+
+
+def rule_from_mask(mask: int) -> set:
+    """Return numbers of a rule stored as bits of an integer."""
+
+    return {x for x in range(9) if mask & (1 << x)}
+
+
+def check_background(board: Board) -> None:
+    """Raise FormatError if the board stores cells that differ from a living background,
+    files store only living cells on a dead background."""
+
+    if board.background:
+        raise FormatError('A board on a living background cannot be saved.')
+
+
+def bit_counts() -> 'np.ndarray':
+    """Return the number of set bits for each value of a byte."""
+
+    return np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def save_binary(board: Board, f) -> None:
+    """Write the board with its rule and generation to a file opened in binary mode.
+    Rows of bits are written for dense boards, coordinates of living cells for sparse ones."""
+
+    if np == None:
+        raise RuntimeError('NumPy library is missing.')
+
+    # Bounded boards are counted in their rows of bits, so that dense boards are saved
+    # without a list of living cells
+    rows = None
+    if board.bounded:
+        top, left, height, width = 0, 0, board.height, board.width
+        rows = np.ascontiguousarray(board.bit_rows(top, left, height, width))
+        count = int(bit_counts()[rows.view(np.uint8)].sum(dtype=np.int64))
+    elif board.living:
+        cells = np.array(board.living, dtype=np.int64)
+        top, left = cells.min(axis=0).tolist()
+        height, width = (cells.max(axis=0) + 1).tolist()
+        height, width = height - top, width - left
+        count = len(cells)
+    else:
+        top, left, height, width, count = 0, 0, 0, 0, 0
+
+    bits_size = height * ((width + 63) // 64) * 8
+    body = BODY_BITS if bits_size <= 16 * count else BODY_CELLS
+    flags = FLAG_BOUNDED if board.bounded else 0
+
+    counts = board.rule.counts
+    if counts == None:
+        flags |= FLAG_RULE_TABLE
+        counts = (set(), set())
+
+    f.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, body, flags,
+                        rule_mask(counts[0]), rule_mask(counts[1]),
+                        board.generation, top, left, height, width, board.rule.states,
+                        TOPOLOGIES.index(board.topology)))
+    if flags & FLAG_RULE_TABLE:
+        f.write(np.packbits(board.rule.array, bitorder='little').tobytes())
+    if body == BODY_BITS:
+        if rows is None:
+            rows = np.ascontiguousarray(board.bit_rows(top, left, height, width))
+        f.write(memoryview(rows))
+    else:
+        f.write(memoryview(np.array(board.living, dtype='<i8').reshape(-1, 2)))
+
+
+def load_binary(board: Board, file_name: str) -> bool:
+    """Read a board with its rule and generation from a binary file. The file is mapped
+    to memory and the body is read through views of the mapping without copying.
+    Assumes an empty board has been created before. A saved bounded board replaces
+    a bounded one with its size and topology, a board with joined edges replaces any board."""
+
+    def read_body(mapping: mmap.mmap) -> bool:
+        """Read the header and add living cells from the body, views of the mapping
+        are released on return."""
+
+        if len(mapping) < HEADER.size:
+            return False
+        (magic, version, body, flags, birth_mask, remain_mask,
+         generation, top, left, height, width, states, topology) = HEADER.unpack_from(mapping)
+        if (magic != BINARY_MAGIC or version != BINARY_VERSION or height < 0 or width < 0 or
+            topology >= len(TOPOLOGIES)):
+            return False
+
+        states = max(states, 2)
+        offset = HEADER.size
+        if flags & FLAG_RULE_TABLE:
+            offset += RULE_TABLE_SIZE
+            if len(mapping) < offset:
+                return False
+            bits = np.frombuffer(mapping, dtype=np.uint8, count=RULE_TABLE_SIZE, offset=HEADER.size)
+            rule = RuleTable(np.unpackbits(bits, bitorder='little').tobytes(), states)
+        else:
+            rule = totalistic_rule(rule_from_mask(birth_mask), rule_from_mask(remain_mask), states)
+
+        # Cells of a board with joined edges are neighbors only on a board of the same size,
+        # a bounded board keeps its size unless it is loaded to the plane
+        if TOPOLOGIES[topology] != BOUNDED or (flags & FLAG_BOUNDED and board.bounded):
+            if not flags & FLAG_BOUNDED or top != 0 or left != 0:
+                return False
+            try:
+                board.empty_board(height, width)
+                board.topology = TOPOLOGIES[topology]
+            except ValueError:
+                return False
+
+        if board.bounded and (top < 0 or top + height > board.height or
+                              left < 0 or left + width > board.width):
+            return False
+
+        if body == BODY_BITS:
+            word_count = (width + 63) // 64
+            if len(mapping) != offset + height * word_count * 8:
+                return False
+            rows = np.frombuffer(mapping, dtype='<u8', count=height * word_count,
+                                 offset=offset).reshape(height, word_count)
+            board.add_bit_rows(rows, top, left, width)
+        elif body == BODY_CELLS:
+            if (len(mapping) - offset) % 16 != 0:
+                return False
+            cells = np.frombuffer(mapping, dtype='<i8', offset=offset).reshape(-1, 2)
+            rows, cols = cells[:, 0], cells[:, 1]
+            if ((rows < top) | (rows >= top + height) | (cols < left) | (cols >= left + width)).any():
+                return False
+            board.add_many(list(zip(rows.tolist(), cols.tolist())))
+        else:
+            return False
+
+        try:
+            board.rule = rule
+        except ValueError:      # The engine cannot simulate the rule
+            return False
+        board.generation = generation
+        return True
+
+    if np == None:
+        raise RuntimeError('NumPy library is missing.')
+
+    with open(file_name, 'rb') as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:      # Empty file
+            return False
+
+    try:
+        return read_body(mapping)
+    finally:
+        mapping.close()
+
+
+def set_rule(board: Board, text: str) -> None:
+    """Set a rule in the B/S notation of pattern files to the board. A bounded grid
+    of Golly after the rule, e.g. B3/S23:T100,80, replaces the board with a board
+    of its size with joined edges, bounded planes (P) keep the board."""
+
+    text, _, grid = text.strip().partition(':')
+    rule = Rule('B', 'R', '/')
+    if not rule.try_set_standard_rule(text):
+        raise FormatError('Unsupported rule ' + text + '.')
+    try:
+        board.rule = rule.table
+    except ValueError as error:
+        raise FormatError(str(error))
+
+    if not grid:
+        return
+    match = GRID_SUFFIX.fullmatch(grid)
+    if match == None or (match.group(1) in 'Kk') != (match.group(3) == '*'):
+        raise FormatError('Unsupported bounded grid ' + grid + '.')
+    width, height = int(match.group(2)), int(match.group(4))
+    if match.group(1) in 'Pp':
+        return
+    if width <= 0 or height <= 0:
+        raise FormatError('Unsupported bounded grid ' + grid + '.')
+
+    if not board.engine.BOUNDED_GRID:
+        raise FormatError('The board cannot join edges of the bounded grid ' + grid + '.')
+    try:
+        board.empty_board(height, width)
+        board.topology = TORUS if match.group(1) in 'Tt' else KLEIN_BOTTLE
+    except ValueError as error:
+        raise FormatError(str(error))
+
+
+def rle_runs(body: str, i: int, j: int) -> tuple:
+    """Find runs of living cells in a part of the RLE body starting at the cell (i, j).
+    Return arrays of rows, first columns and lengths of the runs, the cell after the part
+    and whether the end of the pattern was reached. The part must not end with a run count."""
+
+    is_finished = '!' in body
+    if is_finished:
+        body = body[:body.index('!')].rstrip('0123456789')
+    codes = np.frombuffer(body.encode('ascii', errors='replace'), dtype=np.uint8)
+
+    # Digits of a run count belong to the next tag
+    is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+    tag_positions = np.flatnonzero(~is_digit)
+    tags = codes[tag_positions]
+    digit_positions = np.flatnonzero(is_digit)
+    owners = np.cumsum(~is_digit)[digit_positions]
+    exponents = tag_positions[owners] - digit_positions - 1
+    values = np.bincount(owners, weights=(codes[digit_positions] - ord('0')) * 10.0 ** exponents,
+                         minlength=len(tags))
+    has_count = np.bincount(owners, minlength=len(tags)) > 0
+    counts = np.where(has_count, values, 1).astype(np.int64)
+
+    is_row = tags == ord('$')
+    is_alive = ~is_row & (tags != ord('b')) & (tags != ord('.'))
+    row_steps = np.where(is_row, counts, 0)
+    column_steps = np.where(is_row, 0, counts)
+    rows = i + np.cumsum(row_steps) - row_steps
+    columns = np.cumsum(column_steps) - column_steps
+
+    # Columns start again from zero after the last end of row before the tag
+    last_row_ends = np.maximum.accumulate(np.where(is_row, np.arange(len(tags)), -1))
+    columns = np.where(last_row_ends >= 0, columns - columns[np.maximum(last_row_ends, 0)], j + columns)
+
+    if len(tags) > 0:
+        i = int(rows[-1] + row_steps[-1])
+        j = int(columns[-1] + column_steps[-1])
+    return rows[is_alive], columns[is_alive], counts[is_alive], i, j, is_finished
+
+
+def read_rle(board: Board, f) -> None:
+    """Read a pattern in the RLE format from a text file. The body is read in chunks
+    and runs of cells are added to the board in batches."""
+
+    top, left = 0, 0
+    rule = None
+
+    line = f.readline()
+    while line and (line.startswith('#') or not line.strip()):
+        position = re.search(r'Pos\s*=\s*(-?\d+)\s*,\s*(-?\d+)', line)
+        if line.startswith('#CXRLE') and position != None:
+            left, top = int(position.group(1)), int(position.group(2))
+        elif line.startswith('#r'):
+            rule = line[2:].strip()
+        line = f.readline()
+
+    header = RLE_HEADER.match(line)
+    if header == None:
+        raise FormatError('Missing header of the RLE file.')
+    if header.group(3) != None:
+        rule = header.group(3)
+    if rule != None:
+        set_rule(board, rule)
+
+    # Golly places the origin of a bounded grid in its centre
+    if rule != None and ':' in rule and board.topology != BOUNDED:
+        top += board.height // 2
+        left += board.width // 2
+
+    batch = CellBatch(board, top, left)
+    i, j = 0, 0
+    count = ''      # Digits at the end of a chunk, the run continues in the next chunk
+    is_finished = False
+    while not is_finished:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+
+        text = count + ''.join(chunk.split())
+        body = text.rstrip('0123456789')
+        count = text[len(body):]
+        if np != None:
+            rows, columns, lengths, i, j, is_finished = rle_runs(body, i, j)
+            batch.add_runs(rows, columns, lengths)
+            continue
+
+        for digits, tag in RLE_TOKEN.findall(body):
+            length = int(digits) if digits else 1
+            if tag == '$':
+                i += length
+                j = 0
+            elif tag == '!':
+                is_finished = True
+                break
+            elif tag == 'b' or tag == '.':
+                j += length
+            else:
+                batch.add_run(i, j, length)
+                j += length
+
+    batch.flush()
+
+
+def read_pairs(board: Board, f) -> None:
+    """Read a board in the own format (coordinates "i j" separated by spaces) from a text file
+    in chunks. A value left without a pair at the end of the file is ignored."""
+
+    def to_int(value: str) -> int:
+        """Convert the value to an integer, negative values are checked by the batch."""
+
+        if not (value[1:] if value.startswith('-') else value).isdecimal():
+            raise FormatError('Wrong value ' + value + '.')
+        return int(value)
+
+    batch = CellBatch(board)
+    values = []         # Values without a pair yet
+    rest = ''           # Text at the end of a chunk, the value continues in the next chunk
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        text = rest + chunk
+        parts = text.split()
+        rest = parts.pop() if chunk and parts and not text[-1].isspace() else ''
+        values.extend(parts)
+
+        count = len(values) - len(values) % 2
+        for k in range(0, count, 2):
+            batch.add_run(to_int(values[k]), to_int(values[k + 1]))
+        del values[:count]
+        if not chunk:
+            break
+
+    batch.flush()
+
+
+def read_life106(board: Board, f) -> None:
+    """Read a pattern in the Life 1.06 format (lines "x y") from a text file line by line."""
+
+    if not f.readline().startswith('#Life 1.06'):
+        raise FormatError('Missing header of the Life 1.06 file.')
+
+    batch = CellBatch(board)
+    for line in f:
+        if line.startswith('#R'):
+            set_rule(board, line[2:])
+            continue
+        if line.startswith('#') or not line.strip():
+            continue
+
+        values = line.split()
+        if len(values) != 2:
+            raise FormatError('Wrong line ' + line.strip() + '.')
+        try:
+            x, y = int(values[0]), int(values[1])
+        except ValueError:
+            raise FormatError('Wrong line ' + line.strip() + '.')
+        batch.add_run(y, x)
+
+    batch.flush()
+
+
+def read_plaintext(board: Board, f) -> None:
+    """Read a pattern in the plaintext format (rows of "." and "O") from a text file line by line."""
+
+    batch = CellBatch(board)
+    i = 0
+    for line in f:
+        line = line.rstrip('\r\n')
+        if line.startswith('!'):
+            continue
+        if line.strip('.O* '):
+            raise FormatError('Wrong row ' + line + '.')
+
+        for run in re.finditer(r'[O*]+', line):
+            batch.add_run(i, run.start(), run.end() - run.start())
+        i += 1
+
+    batch.flush()
+
+
+def living_rows(index: CellIndex, top: int, left: int, bottom: int, right: int) -> 'Iterator[list]':
+    """Return an iterator of living cells of the rectangle sorted by rows and columns,
+    in bands of rows, so that only cells of one band are held in a list."""
+
+    for band in range(top, bottom, ROW_BAND):
+        yield sorted(index.cells_in(band, left, min(ROW_BAND, bottom - band), right - left))
+
+
+def write_rle(board: Board, f) -> None:
+    """Write living cells of the board in the RLE format to a text file, runs of cells
+    are written in chunks, rows are read in bands. The position of the pattern is kept
+    in the #CXRLE line, joined edges of the board after the rule like in Golly."""
+
+    index = board.living_index()
+    bounds = index.bounds()
+    top, left, bottom, right = bounds if bounds != None else (0, 0, 0, 0)
+    height, width = bottom - top, right - left
+
+    rule = Rule('B', 'R', '/').standard_name(board.rule)
+    position = (left, top)
+    if board.topology != BOUNDED:
+        rule += ':' + GRID_SUFFIXES[board.topology].format(board.width, board.height)
+        position = (left - board.width // 2, top - board.height // 2)
+
+    writer = ChunkWriter(f)
+    writer.write('#CXRLE Pos={},{}\n'.format(*position))
+    writer.write('x = {}, y = {}, rule = {}\n'.format(width, height, rule))
+
+    line_length = 0
+
+    def write_token(length: int, tag: str) -> None:
+        """Write a run of the length, lines are kept short."""
+
+        nonlocal line_length
+        token = (str(length) if length > 1 else '') + tag
+        if line_length + len(token) > RLE_LINE_LENGTH:
+            writer.write('\n')
+            line_length = 0
+        writer.write(token)
+        line_length += len(token)
+
+    row, column = top, left         # Position after the last written run
+    start, length = None, 0         # Run of living cells not written yet
+
+    def write_run() -> None:
+        """Write the run of living cells with dead cells and rows before it."""
+
+        nonlocal row, column
+        if start[0] > row:
+            write_token(start[0] - row, '$')
+            row, column = start[0], left
+        if start[1] > column:
+            write_token(start[1] - column, 'b')
+        write_token(length, 'o')
+        column = start[1] + length
+
+    for cells in living_rows(index, top, left, bottom, right):
+        for i, j in cells:
+            if start != None and i == start[0] and j == start[1] + length:
+                length += 1
+            else:
+                if start != None:
+                    write_run()
+                start, length = (i, j), 1
+    if start != None:
+        write_run()
+
+    write_token(1, '!')
+    writer.write('\n')
+    writer.flush()
+
+
+def write_life106(board: Board, f) -> None:
+    """Write living cells of the board in the Life 1.06 format to a text file in chunks."""
+
+    writer = ChunkWriter(f)
+    writer.write('#Life 1.06\n')
+    for cells in board.living_chunks():
+        writer.write(''.join(['{} {}\n'.format(j, i) for i, j in cells]))
+    writer.flush()
+
+
+def write_pairs(board: Board, f) -> None:
+    """Write living cells of the board in the own format to a text file in chunks."""
+
+    for chunk in board.save_to_chunks():
+        f.write(chunk)
+
+
+def write_plaintext(board: Board, f) -> None:
+    """Write the rectangle with living cells of the board in the plaintext format
+    to a text file in chunks, rows are read in bands. The position of the pattern is lost."""
+
+    index = board.living_index()
+    bounds = index.bounds()
+    top, left, bottom, right = bounds if bounds != None else (0, 0, 0, 0)
+
+    writer = ChunkWriter(f)
+    writer.write('!Generation: {}\n'.format(board.generation))
+    row = top       # The next row to write
+    for cells in living_rows(index, top, left, bottom, right):
+        for i, row_cells in itertools.groupby(cells, lambda cell: cell[0]):
+            writer.write('.\n' * (i - row))        # Empty rows
+            columns = [j - left for i, j in row_cells]
+            line = ['.'] * (columns[-1] + 1)
+            for j in columns:
+                line[j] = 'O'
+            writer.write(''.join(line) + '\n')
+            row = i + 1
+    writer.flush()
+
+
+READERS = {FORMAT_PAIRS: read_pairs, FORMAT_RLE: read_rle, FORMAT_LIFE106: read_life106,
+           FORMAT_PLAINTEXT: read_plaintext}
+WRITERS = {FORMAT_PAIRS: write_pairs, FORMAT_RLE: write_rle, FORMAT_LIFE106: write_life106,
+           FORMAT_PLAINTEXT: write_plaintext}
+
+
+def detect_format(file_name: str) -> str:
+    """Return the format of a file by its first lines, or by its extension if they are not
+    distinctive. Files of unknown formats are read as pairs of coordinates."""
+
+    if is_binary(file_name):
+        return FORMAT_BINARY
+
+    with open(file_name, 'r', errors='replace') as f:
+        for line in f.read(CHUNK_SIZE).splitlines():
+            line = line.strip()
+            if line.startswith('#Life 1.06'):
+                return FORMAT_LIFE106
+            if line.startswith('!'):
+                return FORMAT_PLAINTEXT
+            if RLE_HEADER.match(line):
+                return FORMAT_RLE
+            if line and not line.startswith('#'):
+                break
+
+    return EXTENSIONS.get(os.path.splitext(file_name)[1].lower(), FORMAT_PAIRS)
+
+
+def load_pattern(board: Board, file_name: str, progress: Progress = None) -> bool:
+    """Read a board from a file in any supported format, rules stored in the file are set
+    to the board. Return False if a binary file is damaged or does not fit on the board,
+    a text file raises FormatError with the reason and leaves an empty board.
+    Read characters are reported to the progress, Cancelled is raised if it is cancelled.
+    Assumes an empty board has been created before."""
+
+    if progress != None:
+        progress.start(os.path.getsize(file_name))
+
+    file_format = detect_format(file_name)
+    if file_format == FORMAT_BINARY:
+        # The mapped file is read at once
+        is_valid = load_binary(board, file_name)
+        if progress != None:
+            progress.advance(progress.total)
+        return is_valid
+
+    with open(file_name, 'r') as f:
+        try:
+            READERS[file_format](board, f if progress == None else ProgressFile(f, progress))
+        except FormatError:
+            # Cells are added while the file is read, a damaged file leaves an empty board
+            if board.bounded:
+                board.empty_board(board.height, board.width)
+            else:
+                board.empty_unbounded()
+            raise
+    return True
+
+
+def save_pattern(board: Board, file_name: str, progress: Progress = None) -> None:
+    """Write the board to a file in the format given by the extension of the file name.
+    Written characters are reported to the progress. If it is cancelled, the unfinished
+    file is removed and Cancelled is raised. FormatError is raised for a board
+    on a living background."""
+
+    check_background(board)
+    if progress != None:
+        progress.start()
+
+    file_format = EXTENSIONS.get(os.path.splitext(file_name)[1].lower(), FORMAT_PAIRS)
+    try:
+        if file_format == FORMAT_BINARY:
+            with open(file_name, 'wb') as f:
+                save_binary(board, f)
+            if progress != None:
+                progress.advance(os.path.getsize(file_name))
+        else:
+            with open(file_name, 'w') as f:
+                WRITERS[file_format](board, f if progress == None else ProgressFile(f, progress))
+    except Cancelled:
+        os.remove(file_name)
+        raise
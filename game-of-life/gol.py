@@ -2,8 +2,19 @@
 from typing import Tuple
 import time
 import math
-from tkinter import Canvas
+from tkinter import Canvas, messagebox
 import sys
+import queue
+import threading
+from collections import OrderedDict
+from core import Snapshot, Board
+from pyramid import DensityPyramid
+from history import History
+from cycles import Cycle, CycleDetector
+try:
+    import numpy as np
+except ImportError:
+    np = None
 try:
     from PIL import Image as Img
     from PIL import ImageTk, ImageDraw
@@ -27,364 +38,59 @@ def min(x: int, y: int):
         return y
 
 
-class Board:
-    """Represents a game board."""
-
-    def __init__(self) -> None:
-        """Initialize instance variables."""
-
-        self.__current = []
-        self.__next = []
-
-        self.__height = 0
-        self.__width = 0
-
-        self.__birth_rule = set()
-        self.__remain_rule = set()
-
-        self.__living = []
-        self.__generation = 0
-
-    # PROPERTIES
-    # region
-    @property
-    def height(self) -> int:
-        return self.__height
-
-    @property
-    def width(self) -> int:
-        return self.__width
-
-    @property
-    def birth_rule(self) -> set:
-        return self.__birth_rule.copy()
-
-    @birth_rule.setter
-    def birth_rule(self, value: set) -> None:
-        self.__birth_rule = value
-
-    @property
-    def remain_rule(self) -> set:
-        return self.__remain_rule.copy()
-
-    @remain_rule.setter
-    def remain_rule(self, value: set) -> None:
-        self.__remain_rule = value
-
-    @property
-    def living(self) -> list:
-        return self.__living
-
-    @property
-    def generation(self) -> int:
-        return self.__generation
-    #endregion
-
-    def __create_empty(self, height: int, width: int) -> list:
-        """Create an empty grid with given dimensions."""
-
-        return [[False] * width for x in range(height)]
-
-    def __remove_living(self) -> None:
-        """Remove all living cells from the board."""
-
-        for cell in self.__living:
-            i, j = cell
-            self.__current[i][j] = False
-        self.__living = []
-
-    def empty_board(self, height: int, width: int) -> None:
-        """Create a new empty grid with given dimensions."""
-
-        self.__height = height
-        self.__width = width
-
-        self.__current = self.__create_empty(height, width)
-        self.__next = self.__create_empty(height, width)
-
-        self.__living = []
-        self.__generation = 0
-    
-    def copy(self, board: 'Board') -> None:
-        """Copy values from the given board to this board."""
-
-        self.__height = board.height
-        self.__width = board.width
-
-        self.__current = board.grid_copy()
-        self.__next = self.__create_empty(board.height, board.width)
-
-        self.__birth_rule = board.birth_rule
-        self.__remain_rule = board.remain_rule
-
-        self.__living = board.living.copy()
-        self.__generation = board.generation
-
-    def grid_copy(self) -> list:
-        """Return a copy of the current grid."""
-
-        return [row.copy() for row in self.__current]
-
-    def add(self, i: int, j: int) -> None:
-        """Add a new cell at the position (i, j)."""
-
-        if (i < 0 or self.__height <= i or
-            j < 0 or self.__width <= j):
-            return
-
-        if not self.__current[i][j]:
-            self.__living.append((i, j))
-            self.__current[i][j] = True
-
-    def remove(self, i: int, j: int) -> None:
-        '''Remove a living cell at the position (i, j).'''
-
-        if (i < 0 or self.__height <= i or
-            j < 0 or self.__width <= j):
-            return
-
-        if self.__current[i][j]:
-            self.__living.remove((i, j))
-            self.__current[i][j] = False
-
-    def is_alive(self, i: int, j: int) -> bool:
-        """Check if a cell at the position (i, j) is alive."""
-
-        if (i < 0 or self.__height <= i or
-            j < 0 or self.__width <= j):
-            return False
-
-        return self.__current[i][j]
-
-    def next_gen(self) -> None:
-        """Compute the next generation and set it as current."""
-
-        def solve_living_and_find_neighbors(living: list, survivors: list, neighbors: set) -> None:
-            """Decide the next state of living cells and find their neighbors."""
-
-            def count_neighbors_and_find_empty(x: int, y: int) -> int:
-                """Count neighbors of a cell (x, y) and add empty neighbors to the set."""
-                
-                def add_if_empty(i: int, j: int) -> None:
-                    """Increments the counter or adds an empty cell to neighbors."""
-
-                    nonlocal counter
-                    if self.__current[i][j]:
-                        counter += 1
-                    else:
-                        neighbors.add((i, j))
-
-                counter = 0
-                if x > 0:
-                    add_if_empty(x-1, y)
-                    if y > 0:
-                        add_if_empty(x-1, y-1)
-                    if y < self.__width - 1:
-                        add_if_empty(x-1, y+1)
-
-                if x < self.__height - 1:
-                    add_if_empty(x+1, y)
-                    if y > 0:
-                        add_if_empty(x+1, y-1)
-                    if y < self.__width - 1:
-                        add_if_empty(x+1, y+1)
-    
-                if y > 0:
-                    add_if_empty(x, y-1)
-                if y < self.__width - 1:
-                    add_if_empty(x, y+1)
-
-                return counter
-
-            nonlocal next
-            current = self.__current
-
-            for i, j in living:
-                neighbor_count = count_neighbors_and_find_empty(i, j)
-                if neighbor_count in self.__remain_rule:
-                    next[i][j] = True
-                    survivors.append((i, j))
-
-        def solve_neighbors(neighbors: set, survivors: list) -> None:
-            """Decide the next state of neighbors of living cells."""
-            
-            def count_neighbors(x: int, y: int) -> int:
-                """Count neighbors of a cell (x, y)."""
-
-                grid = self.__current
-
-                counter = 0   
-                if x > 0:
-                    if grid[x-1][y]: counter += 1
-                    if y > 0:
-                        if grid[x-1][y-1]: counter += 1
-                    if y < self.__width - 1:
-                        if grid[x-1][y+1]: counter += 1
-
-                if x < self.__height - 1:
-                    if grid[x+1][y]: counter += 1
-                    if y > 0:
-                        if grid[x+1][y-1]: counter += 1
-                    if y < self.__width - 1:
-                        if grid[x+1][y+1]: counter += 1
-    
-                if y > 0:
-                    if grid[x][y-1]: counter += 1
-                if y < self.__width - 1:
-                    if grid[x][y+1]: counter += 1
-
-                return counter
-
-            nonlocal next
-            current = self.__current
-
-            for i, j in neighbors:
-                neighbor_count = count_neighbors(i, j)
-                if neighbor_count in self.__birth_rule:
-                    next[i][j] = True
-                    survivors.append((i, j))
-
-        if self.__height <= 0 or self.__width <= 0:
-            return
-
-        survivors = []          # Cells that will survive to the next generation
-        neighbors = set()       # Neighbors of living cells
-        next = self.__next
-
-        solve_living_and_find_neighbors(self.__living, survivors, neighbors)
-        solve_neighbors(neighbors, survivors)
-        self.__remove_living()
-
-        self.__living = survivors
-        self.__next = self.__current
-        self.__current = next
-        self.__generation += 1
-
-    def save_to_string(self) -> str:
-        """Save the board to a string."""
-
-        grid_string = ""
-        for cell in self.__living:
-            i, j = cell
-            grid_string += str(i) + " " + str(j) + " "
-
-        return grid_string
-
-    def read_from_string(self, grid_string: str) -> bool:
-        """Read the board from a string.
-        Assumes an empty board has been created before."""
-
-        self.__remove_living()
-        self.__generation = 0
-
-        cells = grid_string.split()     # Coordinates of living cells
-
-        # Divide the coordinates into pairs
-        for i in range(0, len(cells) - 1, 2):
-            x, y = cells[i], cells[i + 1]
-
-            if x.isdigit() and y.isdigit():
-                i, j = int(x), int(y)
-                if (0 <= i and i < self.__height and 
-                    0 <= j and j < self.__width):
-                    self.__living.append((i, j))
-                    self.__current[i][j] = True
-                else:
-                    self.__remove_living()
-                    return False
-            else:
-                self.__remove_living()
-                return False
-
-        return True
-
-
-class Rule:
-    """Validates and stores a game rule."""
-
-    def __init__(self, birth_name: str, remain_name: str, sep: str) -> None:
-        """Initialize instance variables."""
-
-        self.__birth_name = birth_name
-        self.__remain_name = remain_name
-        self.__sep = sep
-
-        self.__birth_rule = set()
-        self.__remain_rule = set()
-
-    @property
-    def birth_rule(self) -> set:
-        return self.__birth_rule.copy()
-
-    @property
-    def remain_rule(self) -> set:
-        return self.__remain_rule.copy()
-
-    def try_set_rule(self, value: str) -> bool:
-        """Try to set the value as a new rule.
-        Return True if successful, False otherwise."""
-
-        def try_add_numbers(rule_string: str, rule_name: str, rule_numbers: set) -> bool:
-            """Try to add rule numbers to a set.
-            Return True if successful, False otherwise."""
-
-            if not rule_string.find(rule_name) == 0:
-                return False
-
-            numbers = list(rule_string)[len(rule_name):]   
-            for num in numbers:
-                if not num.isdigit():
-                    return False
-                x = int(num)
-                if (x == 0) or (x == 9) or (x in rule_numbers):
-                    return False
-                rule_numbers.add(x)
-            return True
-
-        birth_rule = set()
-        remain_rule = set()
-
-        split_rules = value.split(sep = self.__sep)
-        if len(split_rules) != 2:
-            return False
-        birth_string, remain_string = split_rules
-
-        if (not try_add_numbers(birth_string, self.__birth_name, birth_rule) or
-            not try_add_numbers(remain_string, self.__remain_name, remain_rule)):
-            return False
-
-        self.__birth_rule = birth_rule
-        self.__remain_rule = remain_rule
-        return True
-
-
 class Painter:
-    """Paints a board on a canvas."""
+    """Paints a board on a canvas.
+    Cell sizes below 1 are overview levels, e.g. 1/4 draws a block of 4 x 4 cells
+    as one pixel with the brightness by the number of living cells in it."""
+
+    MAX_CHANGED_CELLS = 2000    # With more changed cells in view the whole frame is drawn again
+    GRID_CACHE_BYTES = 32 * 1024 * 1024     # Default memory for cached grid images
+    MINIMAP_SIZE = 150          # Size of the minimap in pixels
+    MINIMAP_MARGIN = 10
 
     def __init__(self) -> None:
         """Initialize instance variables"""
 
-        self.__max_width = 0        # Maximum size of the canvas image, actual size of grids
+        self.__max_width = 0        # Maximum size of the canvas image
         self.__max_height = 0
-        self.__width = 0            # Actual size of the canvas image and cropped grids
+        self.__width = 0            # Actual size of the canvas image and grids
         self.__height = 0
 
         self.__m_cell = (0,0)       # Index of a cell displayed in the middle of the 
                                     # canvas image = position of the view
         self.__board = None
+        self.__snapshot = None          # Drawn instead of the board if set, e.g. while
+                                        # the board is computed in another thread
         self.__canvas = None
         self.__canvas_image = None
-        self.__board_image = None       # Result image drawn on the canvas_image
+        self.__board_image = None       # Image shown by the canvas_image, frames are pasted into it
+        self.__bg = (0,0,0)             # Background color of grids
         self.__stroke = (50,50,50)      # Stroke color of the cells
         self.__fill = (255,255,255)     # Fill color of the cells
 
         self.__cell_sizes = []
-        self.__grids = []           # Images of grids for different cell sizes
-        self.__current = 0          # Index of currently used cell size and grid
+        self.__current = 0          # Index of currently used cell size
+
+        # Grid images are drawn on first use, the least recently used are dropped
+        self.__grids = OrderedDict()    # (cell size, width, height) -> image of the grid
+        self.__grid_cache_bytes = self.GRID_CACHE_BYTES
 
         self.__is_drawing = False
         self.__is_adjusting = False
 
+        # The last frame drawn with NumPy, later frames redraw only changed cells
+        self.__frame_version = None     # Version of the drawn state, None if it must be drawn again
+        self.__frame_background = 0     # Background of the drawn state
+        self.__background = None        # Pixels of the cropped grid
+        self.__pixels = None            # Pixels of the frame
+        self.__alive = None             # Visible cells surrounded by one more cell on each side
+        self.__top_left = (0, 0)        # Top left visible cell
+        self.__origin = (0, 0)          # Position of the top left visible cell in the frame
+
+        # Counts of living cells in blocks for overview levels and the minimap, needs NumPy
+        self.__pyramid = None
+        self.__minimap = False
+
     # PROPERTIES
     # region
     @property
@@ -395,6 +101,7 @@ class Painter:
     def canvas(self, value: Canvas) -> None:
         self.__canvas = value
         self.__canvas_image = self.__canvas.create_image(0, 0, anchor='nw')
+        self.__frame_version = None
 
     @property
     def board(self) -> Board:
@@ -403,7 +110,16 @@ class Painter:
     @board.setter
     def board(self, value: Board) -> None:
         self.__board = value
-        self.__m_cell = (value.height // 2, value.width // 2)
+        self.__m_cell = self.__find_middle_cell(value)
+        self.__frame_version = None
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self.__snapshot
+
+    @snapshot.setter
+    def snapshot(self, value: Snapshot) -> None:
+        self.__snapshot = value
 
     @property
     def fill(self) -> Tuple[int,int,int]:
@@ -412,6 +128,25 @@ class Painter:
     @fill.setter
     def fill(self, value: Tuple[int,int,int]) -> None:
         self.__fill = value
+        self.__frame_version = None
+
+    @property
+    def minimap(self) -> bool:
+        return self.__minimap
+
+    @minimap.setter
+    def minimap(self, value: bool) -> None:
+        self.__minimap = value and np != None
+        self.__frame_version = None
+
+    @property
+    def grid_cache_bytes(self) -> int:
+        return self.__grid_cache_bytes
+
+    @grid_cache_bytes.setter
+    def grid_cache_bytes(self, value: int) -> None:
+        self.__grid_cache_bytes = value
+        self.__drop_grids()
 
     @property
     def zoom(self) -> int:
@@ -421,40 +156,70 @@ class Painter:
     def zoom(self, value: int) -> None:
         if 0 <= value and value < len(self.__cell_sizes):
             self.__current = value
+            self.__frame_version = None
     # endregion
 
     def reset(self, max_width: int, max_height: int, cell_sizes: list,
               bg: Tuple[int,int,int], stroke: Tuple[int,int,int]) -> None:
-        """Initialize the painter, create a background image (grid) for each cell size."""
-
-        def append_grid(w: int, h: int, cell_size: int):
-            """Append a new grid image for the cell size."""
-
-            # Do not draw grid lines for cell_size < 5
-            if cell_size < 5:
-                if len(self.__grids) == 0:
-                    self.__grids.append(Img.new('RGB', (w,h), color = bg)) 
-                else:                                       
-                    self.__grids.append(self.__grids[0])    # Do not create more empty images
-                return
-
-            self.__grids.append(Img.new('RGB', (w,h), color = bg))
-            draw = ImageDraw.Draw(self.__grids[-1])
-            for i in range(w // cell_size):
-                draw.line((0, i*cell_size, h, i*cell_size), fill=stroke, width=1)
-            for i in range(h // cell_size):
-                draw.line((i*cell_size, 0, i*cell_size, w), fill=stroke, width=1)
+        """Initialize the painter. Background images (grids) for the cell sizes
+        are drawn later, when they are used."""
 
         cell_sizes.sort()
-        self.__grids = []
-        for cell_size in cell_sizes:
-            append_grid(max_width, max_height, cell_size)
+        self.__grids = OrderedDict()
 
         self.__max_width = max_width
         self.__max_height = max_height
         self.__cell_sizes = cell_sizes
         self.__current = 0
+        self.__bg = bg
         self.__stroke = stroke
+        self.__frame_version = None
+
+    def __grid_image(self) -> Img.Image:
+        """Return the grid for the current cell size with the size of the canvas image.
+        The grid is drawn on first use and kept in the cache."""
+
+        size = self.__cell_sizes[self.__current]
+        w = self.__width
+        h = self.__height
+
+        # Do not draw grid lines for cell_size < 5, such grids are all the same
+        key = (size if size >= 5 else 0, w, h)
+        if key in self.__grids:
+            self.__grids.move_to_end(key)
+            return self.__grids[key]
+
+        grid = Img.new('RGB', (w,h), color = self.__bg)
+        if size >= 5:
+            # Lines are where they would be in the middle of a grid of the maximum size
+            left = (w // 2 - self.__max_width // 2) % size
+            top = (h // 2 - self.__max_height // 2) % size
+            draw = ImageDraw.Draw(grid)
+            for y in range(top, h, size):
+                draw.line((0, y, w, y), fill=self.__stroke, width=1)
+            for x in range(left, w, size):
+                draw.line((x, 0, x, h), fill=self.__stroke, width=1)
+
+        self.__grids[key] = grid
+        self.__drop_grids()
+        return grid
+
+    def __drop_grids(self) -> None:
+        """Drop the least recently used grids while they take more memory than allowed.
+        The last used grid is always kept."""
+
+        def grid_bytes(key: tuple) -> int:
+            """Return the memory of a grid, Pillow stores an RGB pixel in 4 bytes."""
+
+            return key[1] * key[2] * 4
+
+        total = 0
+        for key in self.__grids:
+            total += grid_bytes(key)
+
+        while len(self.__grids) > 1 and total > self.__grid_cache_bytes:
+            key, grid = self.__grids.popitem(last=False)
+            total -= grid_bytes(key)
 
     def adjust_to_canvas(self) -> None:
         """Adjust drawing to the canvas size.
@@ -466,13 +231,48 @@ class Painter:
 
         canvas_width = self.__canvas.winfo_width()
         canvas_height = self.__canvas.winfo_height()
-        self.__width = min(self.__max_width, canvas_width)
-        self.__height = min(self.__max_height, canvas_height)
+        width = min(self.__max_width, canvas_width)
+        height = min(self.__max_height, canvas_height)
+        if width != self.__width or height != self.__height:
+            self.resize(width, height)
+
+            # The image on the canvas is created again only when its size changes
+            if width > 0 and height > 0:
+                self.__board_image = ImageTk.PhotoImage('RGB', (width, height))
+                self.__canvas.itemconfig(self.__canvas_image, image=self.__board_image)
+            else:
+                self.__board_image = None
 
         self.__is_adjusting = False
 
+    def resize(self, width: int, height: int) -> None:
+        """Set the size of the drawn image, at most the maximum size.
+        Without a canvas, frames of this size are rendered by render_frame."""
+
+        self.__width = min(self.__max_width, width)
+        self.__height = min(self.__max_height, height)
+        self.__frame_version = None
+
     def draw_board(self) -> None:
-        """Draw the board on the canvas."""
+        """Draw the board on the canvas.
+        With NumPy only cells changed since the last frame are drawn again, if possible."""
+
+        if (self.__canvas == None or self.__board_image == None or
+            self.__is_drawing or self.__is_adjusting):
+            return
+        self.__is_drawing = True
+
+        # Frames are pasted into the image on the canvas, no image for tkinter is created
+        image = self.render_frame()
+        if image != None:
+            self.__board_image.paste(image)
+
+        self.__is_drawing = False
+
+    def render_frame(self) -> Img.Image:
+        """Return the image of the board in the view, it needs no canvas or display.
+        Return None if there is nothing to draw, or with NumPy if the last frame
+        shows the current state."""
 
         def find_cells_in_view(m_position) -> Tuple:
             """Find indices of cells in the top left corner and the bottom right corner
@@ -496,50 +296,270 @@ class Painter:
 
             return top_left, bottom_right
 
-        def crop_grid(grid: Img.Image) -> Img.Image:
-            """Crop the grid to fit the canvas image."""
-
-            max_w = self.__max_width
-            max_h = self.__max_height
-            w = self.__width
-            h = self.__height
-
-            crop_from = (max_w // 2 - w // 2, max_h // 2 - h // 2)
-            crop_to = (crop_from[0] + w - 1, crop_from[1] + h - 1)
-
-            return grid.crop(crop_from + crop_to)
-
         def draw_cells(image: Img.Image, m_position: Tuple[int,int],
                        top_left: Tuple[int,int], bottom_right: Tuple[int,int]):
-            """Draw all living cells."""
+            """Draw visible living cells one by one, used without NumPy."""
 
             draw = ImageDraw.Draw(image)
             m_cell = self.__m_cell
             size = self.__cell_sizes[self.__current]
 
-            for i, j in self.__board.living:
-                if (i < top_left[0] or bottom_right[0] < i or
-                    j < top_left[1] or bottom_right[1] < j):
-                    continue
+            source = self.__snapshot if self.__snapshot != None else self.__board
+            for i, j in source.cells_in(top_left[0], top_left[1], bottom_right[0] - top_left[0] + 1,
+                                        bottom_right[1] - top_left[1] + 1):
                 left = m_position[0] + (j - m_cell[1]) * size      # Left position of the cell
                 top = m_position[1] + (i - m_cell[0]) * size       # Top position of the cell
                 rect = (left, top, left + size, top + size)
                 draw.rectangle(rect, fill=self.__fill, outline=self.__stroke, width=1)
 
-        if (self.__canvas == None or self.__board == None or 
-            self.__is_drawing or self.__is_adjusting):
-            return
-        self.__is_drawing = True
+        def rasterize_frame(source, m_position: Tuple[int,int],
+                            top_left: Tuple[int,int], bottom_right: Tuple[int,int]) -> None:
+            """Draw all visible cells at once into a new frame."""
 
-        m_position = self.__m_cell_position_in_image()
-        top_left, bottom_right = find_cells_in_view(m_position)
+            size = self.__cell_sizes[self.__current]
+            m_cell = self.__m_cell
+            rows = bottom_right[0] - top_left[0] + 1
+            cols = bottom_right[1] - top_left[1] + 1
+
+            self.__alive = np.zeros((rows + 2, cols + 2), dtype=bool)
+            self.__alive[1:-1, 1:-1] = source.window(top_left[0], top_left[1], rows, cols)
+            self.__top_left = top_left
+            self.__origin = (m_position[0] - (m_cell[1] - top_left[1]) * size,
+                             m_position[1] - (m_cell[0] - top_left[0]) * size)
+
+            self.__background = np.array(self.__grid_image())
+            self.__pixels = self.__rasterize(self.__background, self.__alive, self.__origin)
+            self.__frame_background = source.background
+
+        def update_frame(source) -> bool:
+            """Redraw only cells that changed since the last frame.
+            Return False if the changes do not follow the frame or there are too many of them."""
+
+            changes = source.changes
+            if (self.__frame_version == None or changes == None or
+                changes.base_version != self.__frame_version or
+                source.background != self.__frame_background):
+                return False
+
+            alive = self.__alive
+            rows = alive.shape[0] - 2
+            cols = alive.shape[1] - 2
+            top, left = self.__top_left
+
+            # On a living background the changes are of stored dead cells
+            background = bool(source.background)
+            changed = []        # Visible changed cells relatively to the top left cell
+            for cells, state in ((changes.births, not background), (changes.deaths, background)):
+                for i, j in cells:
+                    r, c = i - top, j - left
+                    if 0 <= r and r < rows and 0 <= c and c < cols:
+                        changed.append((r, c, state))
+            if len(changed) > self.MAX_CHANGED_CELLS:
+                return False
+            if not changed:
+                return True
 
-        cropped = crop_grid(self.__grids[self.__current])
-        draw_cells(cropped, m_position, top_left, bottom_right)
-        self.__board_image = ImageTk.PhotoImage(cropped)    # Convert image to be used by tkinter
-        self.__canvas.itemconfig(self.__canvas_image, image=self.__board_image)
+            r, c, state = (np.array(values) for values in zip(*changed))
+            alive[r + 1, c + 1] = state
 
-        self.__is_drawing = False
+            # A cell is drawn with its outline, which depends only on its neighbors
+            size = self.__cell_sizes[self.__current]
+            height, width = self.__pixels.shape[:2]
+            x = self.__origin[0] + c * size
+            y = self.__origin[1] + r * size
+            inside = (x >= 0) & (y >= 0) & (x + size < width) & (y + size < height)
+
+            # Cells inside the frame are drawn all at once
+            near = np.arange(3)
+            neighbors = alive[(r[inside])[:, None, None] + near[:, None],
+                              (c[inside])[:, None, None] + near[None, :]]
+            offset = np.arange(size + 1)
+            pixel_y = (y[inside])[:, None, None] + offset[:, None]
+            pixel_x = (x[inside])[:, None, None] + offset[None, :]
+            self.__pixels[pixel_y, pixel_x] = self.__rasterize(
+                self.__background[pixel_y, pixel_x], neighbors, (0, 0))
+
+            # Cells on the edge of the frame are cut off
+            for k in np.nonzero(~inside)[0].tolist():
+                x0, y0 = max(0, x[k]), max(0, y[k])
+                x1, y1 = min(width, x[k] + size + 1), min(height, y[k] + size + 1)
+                if x0 < x1 and y0 < y1:
+                    self.__pixels[y0:y1, x0:x1] = self.__rasterize(
+                        self.__background[y0:y1, x0:x1], alive[r[k]:r[k] + 3, c[k]:c[k] + 3],
+                        (x[k] - x0, y[k] - y0))
+            return True
+
+        def draw_points(image: Img.Image) -> None:
+            """Draw a pixel for each block with living cells on an overview level, used without NumPy."""
+
+            level = self.__overview_level()
+            top, left = self.__overview_top_left(level)
+
+            source = self.__snapshot if self.__snapshot != None else self.__board
+            if source.background:
+                # Nearly every block has living cells on a living background
+                image.paste(self.__fill, (0, 0, self.__width, self.__height))
+                return
+            for i, j in source.cells_in(top << level, left << level,
+                                        self.__height << level, self.__width << level):
+                image.putpixel(((j >> level) - left, (i >> level) - top), self.__fill)
+
+        def draw_overview(source) -> None:
+            """Draw one pixel for each block of cells on an overview level, the cost depends
+            only on the size of the image."""
+
+            level = self.__overview_level()
+            top, left = self.__overview_top_left(level)
+            counts = self.__pyramid.window(level, top, left, self.__height, self.__width)
+            self.__pixels = self.__density_pixels(living_counts(source, counts, level), level)
+
+        def living_counts(source, counts: 'np.ndarray', level: int) -> 'np.ndarray':
+            """Return counts of living cells in blocks of the level from counts of stored cells,
+            on a living background the stored cells are dead."""
+
+            return (1 << (2 * level)) - counts if source.background else counts
+
+        def draw_minimap(source, image: Img.Image) -> None:
+            """Draw all living cells zoomed out to a square in the bottom right corner
+            of the image, with a frame of the visible area."""
+
+            size = self.__cell_sizes[self.__current]
+            m_size = self.MINIMAP_SIZE
+            if (self.__width < m_size + 2 * self.MINIMAP_MARGIN or
+                self.__height < m_size + 2 * self.MINIMAP_MARGIN):
+                return
+
+            # Visible cells
+            view = (self.__m_cell[0] - self.__height / size / 2,
+                    self.__m_cell[1] - self.__width / size / 2,
+                    self.__m_cell[0] + self.__height / size / 2,
+                    self.__m_cell[1] + self.__width / size / 2)
+
+            # The whole board, or all living cells of an unbounded board, and the view
+            if self.__board.bounded:
+                world = (0, 0, self.__board.height, self.__board.width)
+            else:
+                world = self.__pyramid.bounds()
+            if world == None:
+                world = view
+            top, left = min(world[0], view[0]), min(world[1], view[1])
+            bottom, right = max(world[2], view[2]), max(world[3], view[3])
+
+            level = 1
+            extent = max(bottom - top, right - left)
+            while level < self.__pyramid.levels and extent / (1 << level) > m_size:
+                level += 1
+
+            block_top = int((top + bottom) / 2) // (1 << level) - m_size // 2
+            block_left = int((left + right) / 2) // (1 << level) - m_size // 2
+            counts = self.__pyramid.window(level, block_top, block_left, m_size, m_size)
+            minimap = Img.fromarray(self.__density_pixels(living_counts(source, counts, level), level))
+
+            draw = ImageDraw.Draw(minimap)
+            draw.rectangle((view[1] / (1 << level) - block_left, view[0] / (1 << level) - block_top,
+                            view[3] / (1 << level) - block_left, view[2] / (1 << level) - block_top),
+                           outline=self.__fill, width=1)
+            draw.rectangle((0, 0, m_size - 1, m_size - 1), outline=self.__stroke, width=1)
+            image.paste(minimap, (self.__width - m_size - self.MINIMAP_MARGIN,
+                                  self.__height - m_size - self.MINIMAP_MARGIN))
+
+        if self.__board == None or self.__width <= 0 or self.__height <= 0:
+            return None
+
+        source = self.__snapshot if self.__snapshot != None else self.__board
+        if np != None:
+            is_overview = self.__overview_level() > 0
+            if is_overview or self.__minimap:
+                if self.__pyramid == None:
+                    self.__pyramid = DensityPyramid()
+                self.__pyramid.follow(source)
+
+            if self.__frame_version != source.version:
+                if is_overview:
+                    draw_overview(source)
+                elif not update_frame(source):
+                    m_position = self.__m_cell_position_in_image()
+                    top_left, bottom_right = find_cells_in_view(m_position)
+                    rasterize_frame(source, m_position, top_left, bottom_right)
+                self.__frame_version = source.version
+
+                image = Img.fromarray(self.__pixels)
+                if self.__minimap:
+                    draw_minimap(source, image)
+                return image
+            return None
+        else:
+            image = self.__grid_image().copy()
+            if self.__overview_level() > 0:
+                draw_points(image)
+            else:
+                m_position = self.__m_cell_position_in_image()
+                top_left, bottom_right = find_cells_in_view(m_position)
+                draw_cells(image, m_position, top_left, bottom_right)
+            return image
+
+    def __rasterize(self, background: 'np.ndarray', alive: 'np.ndarray',
+                    origin: Tuple[int,int]) -> 'np.ndarray':
+        """Draw cells over the background pixels at once: scale the array of cells
+        up to the cell size and composite it over the background.
+        Alive has one more cell on each side, the cell alive[..., 1, 1] is at the origin.
+        Both arrays may be stacks of several areas in the first dimension."""
+
+        size = self.__cell_sizes[self.__current]
+        rows = alive.shape[-2] - 2
+        cols = alive.shape[-1] - 2
+
+        # Outlines of cells overlap, a line is drawn if any cell next to it is alive
+        horizontal = alive.copy()
+        horizontal[..., 1:, :] |= alive[..., :-1, :]
+        vertical = alive.copy()
+        vertical[..., 1:] |= alive[..., :-1]
+        corner = horizontal.copy()
+        corner[..., 1:] |= horizontal[..., :-1]
+
+        # Index of the cell and the position inside the cell for each pixel
+        x = np.arange(background.shape[-2]) - origin[0]
+        y = np.arange(background.shape[-3]) - origin[1]
+        index = (..., np.clip(y // size + 1, 0, rows + 1)[:, None],
+                 np.clip(x // size + 1, 0, cols + 1)[None, :])
+        on_vertical = (x % size == 0)[None, :]
+        on_horizontal = (y % size == 0)[:, None]
+
+        stroke = np.where(on_horizontal,
+                          np.where(on_vertical, corner[index], horizontal[index]),
+                          on_vertical & vertical[index])
+        fill = ~on_horizontal & ~on_vertical & alive[index]
+
+        pixels = background.copy()
+        pixels[fill] = self.__fill
+        pixels[stroke] = self.__stroke
+        return pixels
+
+    def __density_pixels(self, counts: 'np.ndarray', level: int) -> 'np.ndarray':
+        """Return pixels colored between the background and the fill color by the share
+        of living cells in blocks of the level. Blocks with any living cell stay visible."""
+
+        share = np.sqrt(counts / float(1 << (2 * level)))
+        brightness = np.where(counts > 0, 0.25 + 0.75 * np.minimum(share, 1.0), 0.0)
+
+        bg = np.array(self.__bg, dtype=float)
+        fill = np.array(self.__fill, dtype=float)
+        return (bg + brightness[..., None] * (fill - bg)).astype(np.uint8)
+
+    def __overview_level(self) -> int:
+        """Return the level of blocks drawn as one pixel, 0 if cells are drawn."""
+
+        size = self.__cell_sizes[self.__current]
+        if size >= 1:
+            return 0
+        return max(1, min(DensityPyramid.LEVELS, round(math.log2(1 / size))))
+
+    def __overview_top_left(self, level: int) -> Tuple[int, int]:
+        """Return the block in the top left corner on an overview level,
+        the block with the middle cell is in the middle of the image."""
+
+        return ((self.__m_cell[0] >> level) - self.__height // 2,
+                (self.__m_cell[1] >> level) - self.__width // 2)
 
     def __m_cell_position_in_image(self) -> Tuple[int, int]:
         """Find the position of the middle cell in the cropped image."""
@@ -556,11 +576,36 @@ class Painter:
 
         return m_position
 
+    def __find_middle_cell(self, board: Board) -> Tuple[int, int]:
+        """Find the cell displayed in the middle of a new board.
+        Unbounded boards are centred on their living cells."""
+
+        if board.bounded:
+            return board.height // 2, board.width // 2
+
+        living = board.living
+        if not living:
+            return 0, 0
+
+        top, left = living[0]
+        bottom, right = living[0]
+        for i, j in living:
+            top, bottom = min(top, i), max(bottom, i)
+            left, right = min(left, j), max(right, j)
+        return (top + bottom) // 2, (left + right) // 2
+
     def cell_index_from_coord(self, x: int, y: int) -> Tuple[int,int]:
-        """Return the index of a cell (row, column) at the coordinates (x, y) on the canvas."""
+        """Return the index of a cell (row, column) at the coordinates (x, y) on the canvas.
+        Return None if the coordinates are outside the image."""
+
+        if x < 0 or x >= self.__width or y < 0 or y >= self.__height:
+            return None
 
-        if x >= self.__width or y >= self.__height:
-            return -1, -1
+        # On an overview level, the top left cell of the block under the pixel
+        level = self.__overview_level()
+        if level > 0:
+            top, left = self.__overview_top_left(level)
+            return (top + y) << level, (left + x) << level
 
         size = self.__cell_sizes[self.__current]
         m_position = self.__m_cell_position_in_image()
@@ -579,17 +624,29 @@ class Painter:
             return
         
         size = self.__cell_sizes[self.__current]
-        displayed_cells = min(self.__width // size,
-                              self.__height // size)
+        displayed_cells = min(int(self.__width // size),
+                              int(self.__height // size))
         move_length = max(1, displayed_cells // 5)
 
         new_i = self.__m_cell[0] + bottom * move_length
         new_j = self.__m_cell[1] + right * move_length
         self.__m_cell = (new_i, new_j)
+        self.__frame_version = None
 
 
 class Animator:
-    """Animates board generations using a painter."""
+    """Animates board generations using a painter.
+    Generations are computed ahead in a background thread into a bounded queue
+    of snapshots, the tkinter loop only displays them. When the board repeats a state,
+    the animation continues, pauses, or shows the cycle without computing it."""
+
+    MIN_WAIT = 10               # Minimal time between frames in milliseconds, leaves time for events
+    DEFAULT_LOOK_AHEAD = 8      # Number of generations computed ahead
+
+    # Policies for a found cycle
+    CYCLE_CONTINUE = 'continue'     # Compute generations as before
+    CYCLE_PAUSE = 'pause'           # Stop the animation at the first repeated state
+    CYCLE_SKIP = 'skip'             # Show states of the cycle, only the generation number is computed
 
     def __init__(self, master) -> None:
         """Initialize instance variables."""
@@ -600,8 +657,23 @@ class Animator:
 
         self.__is_running = False
         self.__time_per_gen = 1
+        self.__gens_per_frame = 1   # Generations computed between two frames
+        self.__look_ahead = self.DEFAULT_LOOK_AHEAD
+
+        self.__frames = None        # Queue of computed snapshots
+        self.__producer = None      # Thread computing generations
+        self.__cancel = None        # Event that stops the producer
+        self.__displayed = None     # Snapshot on the canvas
+        self.__last_frame = 0       # Time when the last snapshot was displayed
+        self.__after_id = None      # Scheduled tkinter callback
 
         self.__on_new_gen = None
+        self.__history = None       # History recording displayed generations
+
+        self.__detector = CycleDetector()   # Used by the producer thread while running
+        self.__cycle_policy = self.CYCLE_CONTINUE
+        self.__cycle = None         # Cycle found by the producer
+        self.__on_cycle = None
 
     # PROPERTIES
     # region
@@ -625,6 +697,14 @@ class Animator:
     def is_running(self) -> bool:
         return self.__is_running
 
+    @property
+    def generation(self) -> int:
+        """Generation on the canvas, the board may be ahead while running."""
+
+        if self.__is_running and self.__displayed != None:
+            return self.__displayed.generation
+        return self.__board.generation if self.__board != None else 0
+
     @property
     def time_per_gen(self) -> int:
         return self.__time_per_gen
@@ -632,6 +712,29 @@ class Animator:
     @time_per_gen.setter
     def time_per_gen(self, value: int) -> None:
         self.__time_per_gen = value
+        if self.__is_running:
+            self.__schedule_frame()     # Apply the new speed to the waiting frame
+
+    @property
+    def gens_per_frame(self) -> int:
+        return self.__gens_per_frame
+
+    @gens_per_frame.setter
+    def gens_per_frame(self, value: int) -> None:
+        if value >= 1 and value != self.__gens_per_frame:
+            self.__gens_per_frame = value
+            if self.__is_running:
+                self.__stop_producer()      # Computed frames use the old value
+                self.__start_producer()
+
+    @property
+    def look_ahead(self) -> int:
+        return self.__look_ahead
+
+    @look_ahead.setter
+    def look_ahead(self, value: int) -> None:
+        if value >= 1:
+            self.__look_ahead = value
 
     @property
     def on_new_gen(self) -> 'function':
@@ -640,32 +743,42 @@ class Animator:
     @on_new_gen.setter
     def on_new_gen(self, value: 'function') -> None:    
         self.__on_new_gen = value
-    # endregion
 
-    def play(self) -> None:
-        """Start the animation."""
+    @property
+    def history(self) -> History:
+        return self.__history
 
-        def next_frame() -> None:
-            """Draw the next frame of the animation."""
+    @history.setter
+    def history(self, value: History) -> None:
+        self.__history = value
 
-            if not self.__is_running:
-                return
+    @property
+    def cycle_policy(self) -> str:
+        return self.__cycle_policy
 
-            start = time.time()
+    @cycle_policy.setter
+    def cycle_policy(self, value: str) -> None:
+        if value != self.__cycle_policy:
+            self.__cycle_policy = value
+            if self.__is_running:
+                self.__stop_producer()      # Computed frames use the old policy
+                self.__start_producer()
 
-            self.__board.next_gen()
-            self.__painter.draw_board()
-            if self.__on_new_gen != None:
-                self.__on_new_gen()
+    @property
+    def cycle(self) -> Cycle:
+        return self.__cycle
 
-            end = time.time()
+    @property
+    def on_cycle(self) -> 'function':
+        return self.__on_cycle
 
-            elapsed = int((end - start) * 1000)
-            time_to_wait = self.__time_per_gen - elapsed
+    @on_cycle.setter
+    def on_cycle(self, value: 'function') -> None:
+        self.__on_cycle = value
+    # endregion
 
-            if time_to_wait <= 50:   # Make enough time for events
-                time_to_wait = 50
-            self.__master.after(time_to_wait, next_frame)
+    def play(self) -> None:
+        """Start the animation."""
 
         if (self.__board == None or
             self.__painter == None or
@@ -673,11 +786,151 @@ class Animator:
             return
 
         self.__is_running = True
-        self.__master.after(max(self.__time_per_gen, 50), next_frame)
+        self.__displayed = self.__board.snapshot()
+        self.__painter.snapshot = self.__displayed
+        self.__last_frame = time.time()
+
+        # A cycle found before is not followed again, e.g. after a pause at its repeated state
+        self.__detector.clear()
+        self.__cycle = None
+
+        self.__start_producer()
+        self.__schedule_frame()
 
     def stop(self) -> None:
-        """Pause the animation."""
+        """Pause the animation, the board is returned to the displayed generation."""
+
+        if not self.__is_running:
+            return
 
         self.__is_running = False
+        if self.__after_id != None:
+            self.__master.after_cancel(self.__after_id)
+            self.__after_id = None
+
+        self.__stop_producer()
+        self.__painter.snapshot = None
+
+    def __start_producer(self) -> None:
+        """Start a thread that computes generations into the queue of frames."""
+
+        def put(frames: queue.Queue, cancel: threading.Event, snapshot: Snapshot) -> None:
+            """Put the snapshot to the queue, wait while the queue is full."""
+
+            while not cancel.is_set():
+                try:
+                    frames.put(snapshot, timeout=0.05)
+                    return
+                except queue.Full:
+                    pass
+
+        def cycle_states(board: Board, cycle: Cycle) -> list:
+            """Return snapshots of one period of the cycle from the current generation,
+            the board is returned to the current state."""
+
+            states = [board.snapshot()]
+            for k in range(cycle.period - 1):
+                board.next_gen()
+                states.append(board.snapshot())
+            board.restore(states[0])
+            return states
+
+        def produce(board: Board, frames: queue.Queue, cancel: threading.Event, gens: int,
+                    detector: CycleDetector, policy: str) -> None:
+            """Compute snapshots until cancelled or until a cycle is found, then follow the policy.
+            Skipped generations are not computed, states of the cycle are repeated instead.
+            Cycles are not searched for with rules with dying states, snapshots do not keep them."""
+
+            is_detecting = policy != self.CYCLE_CONTINUE and board.rule.states == 2
+            detector.follow(board)
+            cycle = None
+            while not cancel.is_set() and cycle == None:
+                board.advance(gens)
+                snapshot = board.snapshot()
+                if is_detecting:
+                    cycle = detector.follow(snapshot)
+                put(frames, cancel, snapshot)
+
+            if cycle == None:
+                return
+            self.__cycle = cycle
+            if policy == self.CYCLE_PAUSE:
+                return
+
+            states = cycle_states(board, cycle)
+            generation = board.generation
+            while not cancel.is_set():
+                generation += gens
+                put(frames, cancel, states[(generation - board.generation) % cycle.period].at_generation(generation))
+
+        self.__frames = queue.Queue(maxsize=self.__look_ahead)
+        self.__cancel = threading.Event()
+        self.__cycle = None
+        self.__producer = threading.Thread(
+            target=produce, daemon=True,
+            args=(self.__board, self.__frames, self.__cancel, self.__gens_per_frame,
+                  self.__detector, self.__cycle_policy))
+        self.__producer.start()
+
+    def __stop_producer(self) -> None:
+        """Stop the producer thread, drop computed frames and return the board
+        to the displayed generation."""
+
+        self.__cancel.set()
+        self.__producer.join()
+        self.__frames = queue.Queue(maxsize=self.__look_ahead)
+        self.__board.restore(self.__displayed)
+
+    def __schedule_frame(self) -> None:
+        """Schedule displaying of the next frame according to the speed."""
+
+        if self.__after_id != None:
+            self.__master.after_cancel(self.__after_id)
+
+        elapsed = int((time.time() - self.__last_frame) * 1000)
+        time_to_wait = self.__time_per_gen - elapsed
+        if time_to_wait < self.MIN_WAIT:
+            time_to_wait = self.MIN_WAIT
+        self.__after_id = self.__master.after(time_to_wait, self.__next_frame)
+
+    def __next_frame(self) -> None:
+        """Display the next computed frame, wait for it if it is not ready."""
+
+        self.__after_id = None
+        if not self.__is_running:
+            return
+
+        try:
+            snapshot = self.__frames.get_nowait()
+        except queue.Empty:
+            if not self.__producer.is_alive():
+                # The producer stopped at a cycle and all its frames are displayed
+                self.stop()
+                return
+
+            # The generation is not computed yet, try again soon
+            self.__after_id = self.__master.after(self.MIN_WAIT, self.__next_frame)
+            return
+
+        self.__displayed = snapshot
+        self.__last_frame = time.time()
+        self.__painter.snapshot = snapshot
+        self.__painter.draw_board()
+        if self.__history != None:
+            self.__history.follow(snapshot)
+        if self.__on_new_gen != None:
+            self.__on_new_gen()
+
+        # The first repeated state of a found cycle is displayed
+        cycle = self.__cycle
+        if cycle != None and snapshot.generation == cycle.start + cycle.period:
+            if self.__cycle_policy == self.CYCLE_PAUSE:
+                self.stop()
+            if self.__on_cycle != None:
+                self.__on_cycle()
+            if not self.__is_running:
+                return
+
+        self.__schedule_frame()
 
 
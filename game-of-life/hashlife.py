@@ -0,0 +1,482 @@
+
+import weakref
+from engines import Engine
+from rules import RuleTable
+
+
+class Node:
+    """Canonical node of a quadtree, a square of 2^level x 2^level cells.
+    Nodes are never changed after they are created, equal squares share one node."""
+
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', 'epoch', 'results')
+
+    def __init__(self, nw: 'Node', ne: 'Node', sw: 'Node', se: 'Node',
+                 level: int, population: int) -> None:
+        """Initialize instance variables."""
+
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+        self.epoch = 0          # Epoch of the cache in which results were computed
+        self.results = None     # Memoised centres of the node after 2^j generations
+
+
+class NodeCache:
+    """Hash-consing cache of quadtree nodes with memoised results.
+    Nodes are evicted when the cache grows over the limit."""
+
+    def __init__(self, max_nodes: int) -> None:
+        """Initialize instance variables."""
+
+        self.__max_nodes = max_nodes
+        self.__limit = max_nodes    # Size that triggers an eviction
+        self.__nodes = {}           # Children identities -> canonical node
+        self.__engines = weakref.WeakSet()  # Engines whose roots survive an eviction
+        self.__epoch = 1        # Results from other epochs are not valid
+        self.__rule = None      # Table of the rule used for the results
+
+        self.dead = Node(None, None, None, None, 0, 0)
+        self.alive = Node(None, None, None, None, 0, 1)
+        self.__empty = [self.dead]   # Empty nodes for each level
+
+    # PROPERTIES
+    # region
+    @property
+    def max_nodes(self) -> int:
+        return self.__max_nodes
+
+    @max_nodes.setter
+    def max_nodes(self, value: int) -> None:
+        self.__max_nodes = value
+        self.__limit = value
+
+    @property
+    def size(self) -> int:
+        return len(self.__nodes)
+    # endregion
+
+    def add_engine(self, engine: 'HashLifeEngine') -> None:
+        """Register an engine whose root must stay cached after an eviction."""
+
+        self.__engines.add(engine)
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        """Return the canonical node with the given children."""
+
+        key = (id(nw), id(ne), id(sw), id(se))
+        node = self.__nodes.get(key)
+        if node != None:
+            return node
+
+        if len(self.__nodes) >= self.__limit:
+            self.evict()
+
+        node = Node(nw, ne, sw, se, nw.level + 1,
+                    nw.population + ne.population + sw.population + se.population)
+        self.__nodes[key] = node
+        return node
+
+    def empty(self, level: int) -> Node:
+        """Return an empty node of the given level."""
+
+        while len(self.__empty) <= level:
+            e = self.__empty[-1]
+            self.__empty.append(self.join(e, e, e, e))
+        return self.__empty[level]
+
+    def get_result(self, node: Node, j: int) -> Node:
+        """Return the memoised result of the node after 2^j generations by the used rule or None."""
+
+        if node.epoch != self.__epoch or node.results == None:
+            return None
+        return node.results.get((self.__rule, j))
+
+    def set_result(self, node: Node, j: int, result: Node) -> None:
+        """Memoise the result of the node after 2^j generations by the used rule."""
+
+        if node.epoch != self.__epoch or node.results == None:
+            node.epoch = self.__epoch
+            node.results = {}
+        node.results[(self.__rule, j)] = result
+
+    def use_rule(self, rule: RuleTable) -> None:
+        """Use results memoised for the rule. Results of other rules are kept,
+        so rules that alternate in generations do not drop each other's results."""
+
+        self.__rule = rule.table
+
+    def evict(self) -> None:
+        """Drop all nodes and results except the nodes of registered roots."""
+
+        self.__epoch += 1
+        self.__nodes = {}
+        self.__empty = [self.dead]
+
+        stack = [engine.root for engine in self.__engines]
+        visited = set()
+        while stack:
+            node = stack.pop()
+            if node == None or node.level == 0 or id(node) in visited:
+                continue
+            visited.add(id(node))
+            node.results = None
+            self.__nodes[(id(node.nw), id(node.ne), id(node.sw), id(node.se))] = node
+            stack.extend((node.nw, node.ne, node.sw, node.se))
+
+        # Roots larger than the limit would cause an eviction on every new node
+        self.__limit = max(self.__max_nodes, 2 * len(self.__nodes))
+
+
+class HashLifeEngine(Engine):
+    """Stores the cells in a canonical quadtree and computes generations with
+    the HashLife algorithm, which can jump 2^j generations in one step.
+    The engine simulates only an unbounded plane, its cells are not cut to a bounded grid."""
+
+    TOPOLOGIES = ()
+    BOUNDED_GRID = False        # Cells would leave a bounded grid
+    UNBOUNDED_PLANE = True
+    MIN_LEVEL = 3
+    DEFAULT_MAX_NODES = 1000000
+
+    def __init__(self, max_nodes: int = DEFAULT_MAX_NODES, cache: NodeCache = None) -> None:
+        """Initialize instance variables.
+        Engines created by copy() share the cache of nodes."""
+
+        self.__cache = cache if cache != None else NodeCache(max_nodes)
+        self.__root = self.__cache.empty(self.MIN_LEVEL)
+        self.__top = 0          # Position of the top left cell of the root
+        self.__left = 0
+        self.__living = []      # Cached coordinates of living cells
+
+        self.__cache.add_engine(self)
+
+    # PROPERTIES
+    # region
+    @property
+    def cache(self) -> NodeCache:
+        return self.__cache
+
+    @property
+    def root(self) -> Node:
+        return self.__root
+
+    @property
+    def population(self) -> int:
+        return self.__root.population
+
+    @property
+    def living(self) -> list:
+        if self.__living == None:
+            self.__living = self.__find_living()
+        return self.__living
+    # endregion
+
+    def __find_living(self) -> list:
+        """Find coordinates of living cells, skip empty nodes."""
+
+        living = []
+        stack = [(self.__root, self.__top, self.__left)]
+        while stack:
+            node, top, left = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                living.append((top, left))
+                continue
+            half = 1 << (node.level - 1)
+            stack.append((node.se, top + half, left + half))
+            stack.append((node.sw, top + half, left))
+            stack.append((node.ne, top, left + half))
+            stack.append((node.nw, top, left))
+        return living
+
+    def __build(self, cells: list, level: int, top: int, left: int) -> Node:
+        """Build a node of the given level from cells inside its square."""
+
+        if not cells:
+            return self.__cache.empty(level)
+        if level == 0:
+            return self.__cache.alive
+
+        half = 1 << (level - 1)
+        parts = ([], [], [], [])
+        for cell in cells:
+            i, j = cell
+            parts[(i >= top + half) * 2 + (j >= left + half)].append(cell)
+
+        return self.__cache.join(self.__build(parts[0], level - 1, top, left),
+                                 self.__build(parts[1], level - 1, top, left + half),
+                                 self.__build(parts[2], level - 1, top + half, left),
+                                 self.__build(parts[3], level - 1, top + half, left + half))
+
+    def __contains(self, i: int, j: int) -> bool:
+        """Check if the position (i, j) is inside the square of the root."""
+
+        size = 1 << self.__root.level
+        return (self.__top <= i and i < self.__top + size and
+                self.__left <= j and j < self.__left + size)
+
+    def __expand(self) -> None:
+        """Put the root in the centre of a twice larger empty node."""
+
+        root = self.__root
+        e = self.__cache.empty(root.level - 1)
+        join = self.__cache.join
+
+        self.__root = join(join(e, e, e, root.nw), join(e, e, root.ne, e),
+                           join(e, root.sw, e, e), join(root.se, e, e, e))
+        quarter = 1 << (root.level - 1)
+        self.__top -= quarter
+        self.__left -= quarter
+
+    def __is_centred(self) -> bool:
+        """Check if all living cells are in the central half of the root."""
+
+        root = self.__root
+        return (root.nw.se.population + root.ne.sw.population +
+                root.sw.ne.population + root.se.nw.population) == root.population
+
+    def __shrink(self) -> None:
+        """Replace the root with its centre while it contains all living cells."""
+
+        join = self.__cache.join
+        while self.__root.level > self.MIN_LEVEL and self.__is_centred():
+            root = self.__root
+            self.__root = join(root.nw.se, root.ne.sw, root.sw.ne, root.se.nw)
+            quarter = 1 << (root.level - 2)
+            self.__top += quarter
+            self.__left += quarter
+
+    def __set_cell(self, i: int, j: int, alive: bool) -> None:
+        """Set the state of a cell at the position (i, j)."""
+
+        def set_in(node: Node, i: int, j: int) -> Node:
+            """Return a copy of the node with the cell (i, j) relative to the node set."""
+
+            if node.level == 0:
+                return self.__cache.alive if alive else self.__cache.dead
+
+            half = 1 << (node.level - 1)
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            if i < half:
+                if j < half:
+                    nw = set_in(nw, i, j)
+                else:
+                    ne = set_in(ne, i, j - half)
+            else:
+                if j < half:
+                    sw = set_in(sw, i - half, j)
+                else:
+                    se = set_in(se, i - half, j - half)
+            return self.__cache.join(nw, ne, sw, se)
+
+        while not self.__contains(i, j):
+            self.__expand()
+
+        self.__root = set_in(self.__root, i - self.__top, j - self.__left)
+        self.__living = None
+
+    def reset_unbounded(self) -> None:
+        """Create a new empty plane, positions may be negative."""
+
+        self.__root = self.__cache.empty(self.MIN_LEVEL)
+        self.__top = 0
+        self.__left = 0
+        self.__living = []
+
+    def copy(self) -> 'HashLifeEngine':
+        """Return a new engine with the same cells, sharing the cache of nodes."""
+
+        engine = HashLifeEngine(cache=self.__cache)
+        engine.__root = self.__root
+        engine.__top = self.__top
+        engine.__left = self.__left
+        if self.__living != None:
+            engine.__living = self.__living.copy()
+        return engine
+
+    def clear(self) -> None:
+        """Remove all living cells."""
+
+        self.__root = self.__cache.empty(self.__root.level)
+        self.__living = []
+
+    def load(self, cells: list) -> None:
+        """Replace all living cells with the given cells at once."""
+
+        if not cells:
+            self.clear()
+            return
+
+        top = min(i for i, j in cells)
+        left = min(j for i, j in cells)
+        size = max(max(i for i, j in cells) - top, max(j for i, j in cells) - left) + 1
+
+        level = self.MIN_LEVEL
+        while (1 << level) < size:
+            level += 1
+
+        self.__root = self.__build(list(cells), level, top, left)
+        self.__top = top
+        self.__left = left
+        self.__living = None
+
+    def add(self, i: int, j: int) -> None:
+        """Add a new cell at the position (i, j)."""
+
+        if not self.is_alive(i, j):
+            self.__set_cell(i, j, True)
+
+    def remove(self, i: int, j: int) -> None:
+        """Remove a living cell at the position (i, j)."""
+
+        if self.is_alive(i, j):
+            self.__set_cell(i, j, False)
+
+    def add_many(self, cells: list) -> list:
+        """Add new cells at the positions, the tree is built again only once.
+        Return the cells that were dead before."""
+
+        living = set(self.living)
+        born = [cell for cell in set(cells) if cell not in living]
+        if born:
+            self.load(self.living + born)
+        return born
+
+    def remove_many(self, cells: list) -> list:
+        """Remove living cells at the positions, the tree is built again only once.
+        Return the cells that were alive before."""
+
+        died = set(self.living).intersection(cells)
+        if died:
+            self.load([cell for cell in self.living if cell not in died])
+        return list(died)
+
+    def is_alive(self, i: int, j: int) -> bool:
+        """Check if a cell at the position (i, j) is alive."""
+
+        if not self.__contains(i, j):
+            return False
+
+        node = self.__root
+        i -= self.__top
+        j -= self.__left
+        while node.level > 0:
+            if node.population == 0:
+                return False
+            half = 1 << (node.level - 1)
+            if i < half:
+                node = node.nw if j < half else node.ne
+            else:
+                node = node.sw if j < half else node.se
+            i %= half
+            j %= half
+        return node.population == 1
+
+    def next_gen(self, rule: RuleTable) -> None:
+        """Compute the next generation and set it as current."""
+
+        self.advance(1, rule)
+
+    def advance(self, n: int, rule: RuleTable) -> None:
+        """Compute the n-th next generation, jump 2^j generations for each bit j of n."""
+
+        if rule.table[0]:
+            raise ValueError('HashLife cannot simulate rules with birth on 0 neighbors.')
+
+        self.__cache.use_rule(rule)
+
+        j = 0
+        while n > 0 and self.__root.population > 0:
+            if n & 1:
+                self.jump(j, rule)
+            n >>= 1
+            j += 1
+
+    def jump(self, j: int, rule: RuleTable) -> None:
+        """Compute the generation 2^j steps ahead in one call."""
+
+        self.__cache.use_rule(rule)
+        if self.__root.population == 0:
+            return
+
+        # Cells spread at most 2^j cells in each direction, keep them in the result
+        while self.__root.level < j + 3 or not self.__is_centred():
+            self.__expand()
+        self.__expand()
+
+        level = self.__root.level
+        self.__root = self.__successor(self.__root, j, rule.table)
+        quarter = 1 << (level - 2)
+        self.__top += quarter
+        self.__left += quarter
+
+        self.__shrink()
+        self.__living = None
+
+    def __successor(self, node: Node, j: int, table: bytes) -> Node:
+        """Return the centre of the node after 2^j generations (j <= level - 2)."""
+
+        if node.population == 0:
+            return node.nw
+
+        j = min(j, node.level - 2)
+        result = self.__cache.get_result(node, j)
+        if result != None:
+            return result
+
+        if node.level == 2:
+            result = self.__life_4x4(node, table)
+        else:
+            join = self.__cache.join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+
+            # Nine overlapping subnodes of the half size
+            parts = [nw, join(nw.ne, ne.nw, nw.se, ne.sw), ne,
+                     join(nw.sw, nw.se, sw.nw, sw.ne), join(nw.se, ne.sw, sw.ne, se.nw),
+                     join(ne.sw, ne.se, se.nw, se.ne),
+                     sw, join(sw.ne, se.nw, sw.se, se.sw), se]
+            c = [self.__successor(part, j, table) for part in parts]
+
+            if j < node.level - 2:
+                # The nine results are already 2^j generations ahead, combine their centres
+                result = join(join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                              join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                              join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                              join(c[4].se, c[5].sw, c[7].ne, c[8].nw))
+            else:
+                # The nine results are halfway, advance the four combined quarters again
+                result = join(
+                    self.__successor(join(c[0], c[1], c[3], c[4]), j, table),
+                    self.__successor(join(c[1], c[2], c[4], c[5]), j, table),
+                    self.__successor(join(c[3], c[4], c[6], c[7]), j, table),
+                    self.__successor(join(c[4], c[5], c[7], c[8]), j, table))
+
+        self.__cache.set_result(node, j, result)
+        return result
+
+    def __life_4x4(self, node: Node, table: bytes) -> Node:
+        """Return the centre 2x2 cells of a 4x4 node after one generation."""
+
+        grid = [[0] * 4 for x in range(4)]
+        for r, row in enumerate(((node.nw, node.ne), (node.sw, node.se))):
+            for c, child in enumerate(row):
+                grid[2*r][2*c] = child.nw.population
+                grid[2*r][2*c + 1] = child.ne.population
+                grid[2*r + 1][2*c] = child.sw.population
+                grid[2*r + 1][2*c + 1] = child.se.population
+
+        def next_cell(x: int, y: int) -> Node:
+            """Return the next state of the cell (x, y) of the 4x4 grid."""
+
+            index = (grid[x-1][y-1] | grid[x-1][y] << 1 | grid[x-1][y+1] << 2 |
+                     grid[x][y-1] << 3 | grid[x][y] << 4 | grid[x][y+1] << 5 |
+                     grid[x+1][y-1] << 6 | grid[x+1][y] << 7 | grid[x+1][y+1] << 8)
+            return self.__cache.alive if table[index] else self.__cache.dead
+
+        return self.__cache.join(next_cell(1, 1), next_cell(1, 2),
+                                 next_cell(2, 1), next_cell(2, 2))
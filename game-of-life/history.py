@@ -0,0 +1,171 @@
+
+from array import array
+import itertools
+from core import Snapshot
+
+
+class History:
+    """Recent generations of a board kept in a bounded memory. Each generation is recorded
+    as cells born and died in it, every KEYFRAME_INTERVAL-th one also as all living cells,
+    so a generation is rebuilt from the nearest keyframe before it. The oldest generations
+    are dropped when the history takes more memory than its limit. The history follows
+    a board or its snapshots by the changes of their generations."""
+
+    KEYFRAME_INTERVAL = 32
+    MEMORY_LIMIT = 64 << 20         # Bytes
+    RECORD_BYTES = 200              # Estimated size of a record without its cells
+
+    def __init__(self, memory_limit: int = MEMORY_LIMIT,
+                 keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        """Initialize instance variables."""
+
+        self.__memory_limit = memory_limit
+        self.__interval = keyframe_interval
+
+        # Records of consecutive generations from the oldest one: [births, deaths,
+        # living cells or None, background], cells are flat arrays of coordinates
+        self.__records = []
+        self.__first = 0            # Generation of the first record
+        self.__bytes = 0
+
+        self.__generation = None    # Generation of the followed state
+        self.__version = None       # Version of the followed state
+
+    # PROPERTIES
+    # region
+    @property
+    def memory_limit(self) -> int:
+        return self.__memory_limit
+
+    @memory_limit.setter
+    def memory_limit(self, value: int) -> None:
+        self.__memory_limit = value
+        self.__evict()
+
+    @property
+    def memory(self) -> int:
+        return self.__bytes
+
+    @property
+    def oldest(self) -> int:
+        return self.__first if self.__records else None
+
+    @property
+    def newest(self) -> int:
+        return self.__first + len(self.__records) - 1 if self.__records else None
+    # endregion
+
+    def follow(self, source) -> None:
+        """Record the current generation of a board or a snapshot. Its changes are recorded
+        if they lead from the followed state to the next generation, recorded generations
+        after the followed one are dropped then. Otherwise the history starts again."""
+
+        if self.__version == source.version:
+            return
+
+        changes = source.changes
+        if (self.__version != None and changes != None and
+            changes.base_version == self.__version and
+            source.generation == self.__generation + 1 and self.__generation >= self.__first):
+            self.__truncate(self.__generation)
+
+            keyframe = None
+            if len(self.__records) - self.__keyframe_before(len(self.__records) - 1) >= self.__interval:
+                keyframe = self.__pack(source.living)
+            self.__append(self.__pack(changes.births), self.__pack(changes.deaths), keyframe,
+                          source.background)
+        else:
+            self.clear()
+            self.__first = source.generation
+            self.__append(array('q'), array('q'), self.__pack(source.living), source.background)
+
+        self.__generation = source.generation
+        self.__version = source.version
+        self.__evict()
+
+    def snapshot_at(self, generation: int) -> Snapshot:
+        """Return a snapshot of a recorded generation, rebuilt from the nearest keyframe
+        before it. The history follows the snapshot, so a board restored from it continues
+        the history. Return None if the generation is not recorded."""
+
+        if self.oldest == None or not self.oldest <= generation <= self.newest:
+            return None
+
+        k = generation - self.__first
+        start = self.__keyframe_before(k)
+
+        living = set(self.__unpack(self.__records[start][2]))
+        for births, deaths, keyframe, background in self.__records[start + 1:k + 1]:
+            living.difference_update(self.__unpack(deaths))
+            living.update(self.__unpack(births))
+
+        snapshot = Snapshot(generation, tuple(living), background=self.__records[k][3])
+        self.__generation = generation
+        self.__version = snapshot.version
+        return snapshot
+
+    def truncate(self) -> None:
+        """Drop recorded generations after the followed one, e.g. when the rule changes."""
+
+        if self.__generation != None:
+            self.__truncate(self.__generation)
+
+    def clear(self) -> None:
+        """Drop all recorded generations."""
+
+        self.__records = []
+        self.__bytes = 0
+        self.__generation = None
+        self.__version = None
+
+    def __truncate(self, generation: int) -> None:
+        """Drop records of generations after the generation."""
+
+        for record in self.__records[generation - self.__first + 1:]:
+            self.__bytes -= self.__size(record)
+        del self.__records[generation - self.__first + 1:]
+
+    def __append(self, births: array, deaths: array, keyframe: array, background: int) -> None:
+        """Add a record of the next generation."""
+
+        record = [births, deaths, keyframe, background]
+        self.__records.append(record)
+        self.__bytes += self.__size(record)
+
+    def __evict(self) -> None:
+        """Drop the oldest generations while the memory is over the limit. Generations
+        are dropped up to the next keyframe, the newest keyframe is always kept."""
+
+        while self.__bytes > self.__memory_limit:
+            k = 1
+            while k < len(self.__records) and self.__records[k][2] == None:
+                k += 1
+            if k == len(self.__records):
+                return
+
+            for record in self.__records[:k]:
+                self.__bytes -= self.__size(record)
+            del self.__records[:k]
+            self.__first += k
+
+    def __keyframe_before(self, k: int) -> int:
+        """Return the position of the nearest record with a keyframe at or before the position k."""
+
+        while self.__records[k][2] == None:
+            k -= 1
+        return k
+
+    def __size(self, record: list) -> int:
+        """Return the estimated size of the record in bytes."""
+
+        return self.RECORD_BYTES + sum(cells.itemsize * len(cells) for cells in record[:3] if cells != None)
+
+    def __pack(self, cells) -> array:
+        """Return the cells as a flat array of coordinates."""
+
+        return array('q', itertools.chain.from_iterable(cells))
+
+    def __unpack(self, cells: array) -> 'Iterator[tuple]':
+        """Return an iterator of the cells in the flat array."""
+
+        return zip(cells[::2], cells[1::2])
@@ -2,55 +2,148 @@
 from tkinter import *
 from tkinter import messagebox, filedialog
 import os
+import threading
 from gol import *
+from core import Board, Rule
+from engines import SparseEngine, default_engine
+from history import History
+from topology import BOUNDED, TORUS, KLEIN_BOTTLE
+import formats
+
+
+class FileTask:
+    """Loads or saves a file on a worker thread, so the window does not freeze.
+    The window polls the task for its progress and result and can cancel it."""
+
+    def __init__(self, work, file_name: str) -> None:
+        """Initialize instance variables. The work is a function of a progress."""
+
+        self.__file_name = file_name
+        self.__progress = formats.Progress()
+        self.__result = None
+        self.__error = None         # Exception raised by the work
+        self.__thread = threading.Thread(target=self.__run, args=(work,), daemon=True)
+
+    # PROPERTIES
+    # region
+    @property
+    def file_name(self) -> str:
+        return self.__file_name
+
+    @property
+    def progress(self) -> formats.Progress:
+        return self.__progress
+
+    @property
+    def result(self):
+        return self.__result
+
+    @property
+    def error(self) -> Exception:
+        return self.__error
+
+    @property
+    def is_done(self) -> bool:
+        return not self.__thread.is_alive()
+    # endregion
+
+    def start(self) -> None:
+        """Start the work on the worker thread."""
+
+        self.__thread.start()
+
+    def cancel(self) -> None:
+        """Stop the work as soon as possible."""
+
+        self.__progress.cancel()
+
+    def __run(self, work) -> None:
+        """Do the work and keep its result or error."""
+
+        try:
+            self.__result = work(self.__progress)
+        except Exception as error:
+            self.__error = error
 
 
 class FileManager:
-    """Static class that loads and saves a board to a file, reports the result in a message."""
+    """Static class that loads and saves a board to a file, reports the result in a message.
+    The format of a loaded file is recognized by its header, a board is saved in the format
+    given by the extension (.gol binary, .rle, .lif, .cells, otherwise pairs of coordinates)."""
 
-    def load(board: Board) -> bool:
-        """Open a file dialog and read a board from a file."""
+    FILE_TYPES = (('Text files','*.txt'),('Binary boards','*' + formats.BINARY_EXTENSION),
+                  ('RLE','*.rle'),('Life 1.06','*.lif *.life'),('Plaintext','*.cells'),
+                  ('All files','*.*'))
+
+    def load(board: Board) -> FileTask:
+        """Open a file dialog and start reading a board from a file on a worker thread.
+        Return None if no file was chosen."""
 
         file_name = filedialog.askopenfilename(
             initialdir = os.getcwd(), title = 'Select file', 
-            filetypes = (('Text files','*.txt'),('All files','*.*'))
+            filetypes = FileManager.FILE_TYPES
             )
 
         if not file_name:
-            return False
+            return None
 
-        try:
-            f = open(file_name,'r')
-            contents = f.read()
-            f.close()
-        except OSError:
-            messagebox.showinfo(message = 'Could not read the file ' + file_name + '.')
+        task = FileTask(lambda progress: formats.load_pattern(board, file_name, progress), file_name)
+        task.start()
+        return task
+
+    def loaded(task: FileTask) -> bool:
+        """Report the result of a finished loading task in a message.
+        Return True if the board was read."""
+
+        if isinstance(task.error, formats.Cancelled):
             return False
+        if isinstance(task.error, (OSError, UnicodeDecodeError)):
+            messagebox.showinfo(message = 'Could not read the file ' + task.file_name + '.')
+            return False
+        if isinstance(task.error, (formats.FormatError, RuntimeError)):
+            # E.g. the pattern does not fit on the board, or NumPy is missing for a binary file
+            messagebox.showinfo(message = str(task.error))
+            return False
+        if task.error != None:
+            raise task.error
       
-        if not board.read_from_string(contents):
+        if not task.result:
             messagebox.showinfo(message = 'You have chosen wrong or a damaged file.')
             return False
 
         return True
 
-    def save(board: Board) -> bool:
-        """Open a file dialog and save a board to a file."""
+    def save(board: Board) -> FileTask:
+        """Open a file dialog and start saving a board to a file on a worker thread.
+        Return None if no file was chosen."""
 
         file_name = filedialog.asksaveasfilename(
             initialdir = os.getcwd(), title = 'Select file', 
-            filetypes = (('Text files','*.txt'),('All files','*.*'))
+            filetypes = FileManager.FILE_TYPES
             )
 
         if not file_name:
-            return False
+            return None
 
-        try:
-            f = open(file_name,'w+')
-            f.write(board.save_to_string())
-            f.close()
-        except OSError:
-            messagebox.showinfo(message = 'Could not write to the file ' + filename + '.')
+        task = FileTask(lambda progress: formats.save_pattern(board, file_name, progress), file_name)
+        task.start()
+        return task
+
+    def saved(task: FileTask) -> bool:
+        """Report the result of a finished saving task in a message.
+        Return True if the board was saved."""
+
+        if isinstance(task.error, formats.Cancelled):
+            return False
+        if isinstance(task.error, OSError):
+            messagebox.showinfo(message = 'Could not write to the file ' + task.file_name + '.')
+            return False
+        if isinstance(task.error, (formats.FormatError, RuntimeError)):
+            # E.g. a board on a living background, or NumPy is missing for a binary file
+            messagebox.showinfo(message = str(task.error))
             return False
+        if task.error != None:
+            raise task.error
 
         messagebox.showinfo(message = 'The board was successfully saved.')
         return True
@@ -102,21 +195,32 @@ class Application:
                 'Set the rule in the format "Bx/Ry", where x and y are numbers of neighbors that:\n'
                 'x: causes a birth of a cell\n'
                 'y: allows a living cell to remain alive\n\n'
-                'Numbers 0 and 9 cannot belong to x and y.'
+                'Numbers 0 to 8 may be followed by letters of the Hensel notation, '
+                'e.g. B2-a3/R23, with a minus sign the letters are excluded.\n'
+                'Add "/Cz" for a Generations rule with z states, e.g. B2/R/C3.'
                 )
 
-            self.BOARD_WIDTH = 1000
-            self.BOARD_HEIGHT = 1000
             self.BOARD_BG = (0, 0, 0)
             self.BOARD_STROKE = (50, 50, 50)
             self.BOARD_FILL = (255, 255, 255)
 
             self.IMAGE_MAX_WIDTH = 2000
             self.IMAGE_MAX_HEIGHT = 2000
-            self.CELL_SIZES = [3, 5, 10, 20, 30, 50]
-            self.INITIAL_ZOOM = len(self.CELL_SIZES) // 2
+            # Sizes below 1 are overview levels, one pixel shows a block of cells
+            self.CELL_SIZES = [1/16, 1/8, 1/4, 1/2, 3, 5, 10, 20, 30, 50]
+            self.INITIAL_ZOOM = self.CELL_SIZES.index(20)
 
             self.TIMES_PER_GEN = [3000, 2000, 1500, 1000, 700, 400, 200, 100, 50]
+            self.FILE_POLL_TIME = 100   # Time between checks of a running file task
+            self.HISTORY_MEMORY = 64 << 20      # Memory for generations to step back to, in bytes
+            self.CYCLE_POLICIES = {'Continue': Animator.CYCLE_CONTINUE, 'Pause': Animator.CYCLE_PAUSE,
+                                   'Skip': Animator.CYCLE_SKIP}
+            self.INITIAL_CYCLE_POLICY = 'Pause'
+            # The plane is unbounded, other boards have a fixed size and edges joined by the topology
+            self.TOPOLOGIES = {'Plane': None, 'Bounded': BOUNDED, 'Torus': TORUS,
+                               'Klein bottle': KLEIN_BOTTLE}
+            self.INITIAL_TOPOLOGY = 'Plane'
+            self.BOUNDED_SIZE = (100, 150)     # Rows and columns of boards with edges
             self.INITIAL_TIME_PER_GEN = len(self.TIMES_PER_GEN) // 2
 
         def init_window(master: Tk) -> None:
@@ -137,8 +241,8 @@ class Application:
             self.rule = Rule('B','R','/')
             self.rule.try_set_rule(self.INITIAL_RULE)
 
-            self.board = None           # Original (can be editted) - for reset
-            self.anim_board = None      # Animated board
+            self.board = None           # Animated board, can be editted in the original generation
+            self.original = None        # Snapshot of the board before the animation - for reset
 
             self.painter = Painter()
             self.painter.reset(self.IMAGE_MAX_WIDTH, self.IMAGE_MAX_HEIGHT,
@@ -151,6 +255,11 @@ class Application:
             self.animator.painter = self.painter
             self.animator.time_per_gen = self.TIMES_PER_GEN[self.INITIAL_TIME_PER_GEN]
             self.animator.on_new_gen = self.on_new_generation
+            self.animator.on_cycle = self.on_cycle
+            self.animator.cycle_policy = self.CYCLE_POLICIES[self.INITIAL_CYCLE_POLICY]
+
+            self.history = History(self.HISTORY_MEMORY)
+            self.animator.history = self.history
 
         self.master = master
         create_window_constants()
@@ -162,8 +271,11 @@ class Application:
         self.create_left_frame(master)
         init_gol_objects(master)
 
+        self.file_task = None       # Loading or saving running on a worker thread
+
         # Fixes toggle mode as add or remove mode
         self.edit_toggle_mode = None
+        self.last_edited_cell = None    # Cell edited by the last event of a mouse drag
 
     def create_top_frame(self, master: Tk) -> None:
         """Create the top frame (heading)."""
@@ -194,6 +306,14 @@ class Application:
             save_button = Button(file_menu, text='Save', font=self.FONT_NORMAL,
                                  command=self.on_save)
             save_button.pack(side=LEFT, pady=(0,self.WIDGET_PAD))
+            self.file_buttons = [new_board_button, open_button, save_button]
+
+            self.cancel_button = Button(file_menu, text='Cancel', font=self.FONT_NORMAL,
+                                        command=self.on_cancel_file_task)
+            self.cancel_button.pack(side=LEFT, padx=(self.WIDGET_PAD,0), pady=(0,self.WIDGET_PAD))
+            self.file_status = Label(master, text='', font=self.FONT_SMALL, bg=self.MAIN_BG)
+            self.file_status.pack(side=TOP, anchor=W)
+            TkState.disable([self.cancel_button])
 
         def create_edit_menu(master: Widget) -> None:
             """Create the editing menu with the parent MASTER."""
@@ -252,6 +372,46 @@ class Application:
                 self.zoom_scale.grid(row=1, column=1 ,sticky=W+E, padx=(0,self.WIDGET_PAD),
                                      pady=(0,self.WIDGET_PAD*2))
 
+            def create_minimap_widgets(master: Widget) -> None:
+                """Create minimap widgets with the parent MASTER."""
+
+                self.show_minimap = BooleanVar()
+                self.show_minimap.set(False)
+
+                minimap_button = Checkbutton(master, text='Minimap', font=self.FONT_NORMAL,
+                                             bg=self.MAIN_BG, variable=self.show_minimap,
+                                             command=self.on_minimap_change)
+                minimap_button.grid(row=5, column=0, columnspan=2, sticky=W, padx=self.WIDGET_PAD,
+                                    pady=(0,self.WIDGET_PAD))
+
+            def create_history_widgets(master: Widget) -> None:
+                """Create history widgets with the parent MASTER."""
+
+                history_label = Label(master, text='History:', font=self.FONT_NORMAL, bg=self.MAIN_BG)
+                history_label.grid(row=6, column=0, sticky=W, padx=self.WIDGET_PAD,
+                                   pady=(0,self.WIDGET_PAD))
+
+                self.history_scale = Scale(
+                    master, from_=0, to=0, resolution=1, orient=HORIZONTAL,
+                    bg=self.MAIN_BG, font=self.FONT_SMALL, command=self.on_history_change)
+                self.history_scale.grid(row=6, column=1, sticky=W+E, padx=(0,self.WIDGET_PAD),
+                                        pady=(0,self.WIDGET_PAD))
+
+            def create_cycle_widgets(master: Widget) -> None:
+                """Create widgets choosing what happens when the board repeats, with the parent MASTER."""
+
+                cycle_label = Label(master, text='On cycle:', font=self.FONT_NORMAL, bg=self.MAIN_BG)
+                cycle_label.grid(row=7, column=0, sticky=W, padx=self.WIDGET_PAD,
+                                 pady=(0,self.WIDGET_PAD))
+
+                self.cycle_policy = StringVar()
+                self.cycle_policy.set(self.INITIAL_CYCLE_POLICY)
+                cycle_menu = OptionMenu(master, self.cycle_policy, *self.CYCLE_POLICIES,
+                                        command=self.on_cycle_policy_change)
+                cycle_menu.configure(font=self.FONT_SMALL, bg=self.MAIN_BG)
+                cycle_menu.grid(row=7, column=1, sticky=W+E, padx=(0,self.WIDGET_PAD),
+                                pady=(0,self.WIDGET_PAD))
+
             def create_rule_widgets(master: Widget) -> None:
                 """Create rule widgets with the parent MASTER."""
 
@@ -269,6 +429,21 @@ class Application:
                 rule_button.grid(row=3, column=1, sticky=E, padx=(0,self.WIDGET_PAD),
                                  pady=(0,self.WIDGET_PAD))
 
+            def create_topology_widgets(master: Widget) -> None:
+                """Create widgets choosing how the edges of the board are joined, with the parent MASTER."""
+
+                topology_label = Label(master, text='Topology:', font=self.FONT_NORMAL, bg=self.MAIN_BG)
+                topology_label.grid(row=4, column=0, sticky=W, padx=self.WIDGET_PAD,
+                                    pady=(0,self.WIDGET_PAD))
+
+                self.topology = StringVar()
+                self.topology.set(self.INITIAL_TOPOLOGY)
+                topology_menu = OptionMenu(master, self.topology, *self.TOPOLOGIES,
+                                           command=self.on_topology_change)
+                topology_menu.configure(font=self.FONT_SMALL, bg=self.MAIN_BG)
+                topology_menu.grid(row=4, column=1, sticky=W+E, padx=(0,self.WIDGET_PAD),
+                                   pady=(0,self.WIDGET_PAD))
+
             self.settings_menu = LabelFrame(master,text='Settings', font=self.FONT_SMALL,
                                             bg=self.MAIN_BG)
             self.settings_menu.pack(side=TOP, pady=self.WIDGET_PAD)
@@ -276,6 +451,10 @@ class Application:
             create_speed_widgets(self.settings_menu)
             create_zoom_widgets(self.settings_menu)
             create_rule_widgets(self.settings_menu)
+            create_topology_widgets(self.settings_menu)
+            create_minimap_widgets(self.settings_menu)
+            create_history_widgets(self.settings_menu)
+            create_cycle_widgets(self.settings_menu)
 
         right_frame = Frame(master, bg=self.MAIN_BG)
         right_frame.pack(side=RIGHT, fill=Y, padx = 20, pady=(0,20))
@@ -313,6 +492,9 @@ class Application:
                                        bg=self.MAIN_BG)
                 self.rule_name.pack(side=LEFT)
 
+                self.cycle_info = Label(master, text='', font=self.FONT_NORMAL, bg=self.MAIN_BG)
+                self.cycle_info.pack(side=LEFT, padx=(50,0))
+
             def create_anim_buttons(master: Widget) -> None:
                 """Create animation buttons with the parent MASTER."""
 
@@ -322,6 +504,9 @@ class Application:
                 self.step_button = Button(master, text='Step', font=self.FONT_NORMAL,
                                           command=self.on_step)
                 self.step_button.pack(side=RIGHT, padx=self.WIDGET_PAD)
+                self.step_back_button = Button(master, text='Step back', font=self.FONT_NORMAL,
+                                               command=self.on_step_back)
+                self.step_back_button.pack(side=RIGHT, padx=(0,self.WIDGET_PAD))
                 self.play_button = Button(master, text='Play', font=self.FONT_NORMAL,
                                           command=self.on_play)
                 self.play_button.pack(side=RIGHT)
@@ -332,7 +517,8 @@ class Application:
             create_gen_labels(animation_menu)
             create_rule_labels(animation_menu)
             create_anim_buttons(animation_menu)
-            TkState.disable([self.play_button, self.step_button, self.reset_button])
+            TkState.disable([self.play_button, self.step_button, self.step_back_button,
+                             self.reset_button])
 
         def create_board_canvas(master: Widget) -> None:
             """Create board canvas with the parent MASTER."""
@@ -361,32 +547,56 @@ class Application:
         self.stop_animation()
 
         self.board = self.empty_board()
-        self.anim_board = self.empty_board()
 
         self.init_new_board()
         self.painter.draw_board()
    
     def on_open(self) -> None:
-        """Load a board from a file using the FileManager."""
+        """Start loading a board from a file using the FileManager.
+        The shown board is kept until the file is read."""
 
         self.stop_animation()
-        self.anim_board = self.empty_board()
-        
-        if FileManager.load(self.anim_board):
-            self.board = Board()
-            self.board.copy(self.anim_board)
+        board = self.empty_board()
+        task = FileManager.load(board)
+        if task != None:
+            self.start_file_task(task, 'Loading', lambda: self.on_file_loaded(task, board))
+
+    def on_file_loaded(self, task: FileTask, board: Board) -> None:
+        """Show the board read by the finished loading task."""
+
+        if not FileManager.loaded(task):
+            return
+
+        self.board = board
+        self.show_topology()
 
-            self.init_new_board()
-            self.painter.draw_board()
+        # Binary boards and pattern files store their rule
+        rule_text = self.rule.name_of(self.board.rule)
+        if self.rule.try_set_rule(rule_text):
+            self.rule_name.configure(text = rule_text)
+        else:
+            self.board.rule = self.rule.table
+
+        self.init_new_board()
+        self.painter.draw_board()
 
     def on_save(self) -> None:
-        """Saves a board using FileManager."""
+        """Start saving a board using FileManager, editing is disabled until it is saved."""
 
         if self.board == None:
             return
 
         self.stop_animation()
-        FileManager.save(self.board)
+        task = FileManager.save(self.original_board())
+        if task != None:
+            self.start_file_task(task, 'Saving', lambda: FileManager.saved(task))
+
+    def on_cancel_file_task(self) -> None:
+        """Cancel the running loading or saving."""
+
+        if self.file_task != None:
+            self.file_task.cancel()
+            self.file_status.configure(text='Cancelling...')
 
     def on_play(self) -> None:
         """Toggle the animation."""
@@ -407,28 +617,70 @@ class Application:
 
         TkState.disable(self.edit_menu.winfo_children())
         TkState.enable([self.reset_button])
-        self.anim_board.next_gen()
+        self.keep_original()
+        self.cycle_info.configure(text='')
+        self.board.next_gen()
+        self.history.follow(self.board)
         self.on_new_generation()
         self.painter.draw_board()
 
+    def on_step_back(self) -> None:
+        """Return to the previous generation recorded in the history."""
+
+        if self.board == None:
+            return
+
+        self.stop_animation()
+        self.show_history(self.board.generation - 1)
+
+    def on_history_change(self, event) -> None:
+        """Return to the generation chosen on the history scale."""
+
+        generation = int(self.history_scale.get())
+        if (self.board == None or generation == self.animator.generation or
+            self.file_task != None):
+            return
+
+        self.stop_animation()
+        self.show_history(generation)
+
     def on_reset(self) -> None:
-        """Reset the animation and the animation board."""
+        """Reset the animation, the board is restored from the original snapshot."""
 
         if self.board == None:
             return
         
         self.stop_animation()
-        self.anim_board.copy(self.board)
-        self.gen_number.config(text = 0)
+        if self.original != None:
+            self.board.restore(self.original)
+            self.original = None
+        self.cycle_info.configure(text='')
+        self.gen_number.config(text = self.board.generation)
         TkState.enable(self.edit_menu.winfo_children())
         TkState.disable([self.reset_button])
+        self.history.follow(self.board)
+        self.update_history_widgets()
         
         self.painter.draw_board()
 
+    def on_cycle(self) -> None:
+        """Show the period of the cycle found by the animator, update widgets if it paused."""
+
+        cycle = self.animator.cycle
+        self.cycle_info.configure(text='Period {} from gen {}'.format(cycle.period, cycle.start))
+        if not self.animator.is_running:
+            self.stop_animation()
+
+    def on_cycle_policy_change(self, value: str) -> None:
+        """Set the chosen policy for found cycles to the animator."""
+
+        self.animator.cycle_policy = self.CYCLE_POLICIES[value]
+
     def on_new_generation(self) -> None:
-        """Update the generation number."""
+        """Update the generation number and the history scale."""
 
-        self.gen_number.config(text = self.anim_board.generation)
+        self.gen_number.config(text = self.animator.generation)
+        self.update_history_widgets()
   
     def on_speed_change(self, event) -> None:
         """Set the value from the speed scale as a new animation speed."""
@@ -443,6 +695,12 @@ class Application:
         self.painter.zoom = zoom_level
         self.painter.draw_board()
 
+    def on_minimap_change(self) -> None:
+        """Show or hide the minimap."""
+
+        self.painter.minimap = self.show_minimap.get()
+        self.painter.draw_board()
+
     def on_key_press(self, event) -> None:
         """Zoom in or zoom out."""
 
@@ -460,6 +718,9 @@ class Application:
     def on_set_rule(self) -> None:
         """Try to set the text from the rule entry as a new rule."""
 
+        if self.file_task != None:
+            return
+
         self.stop_animation()
         self.master.focus()     # Move the cursor away from the rule entry
         rule_text = str(self.rule_entry.get())
@@ -468,55 +729,112 @@ class Application:
             messagebox.showinfo(message = self.INVALID_RULE_MESSAGE)
             return
 
+        try:
+            self.board.rule = self.rule.table
+        except ValueError as error:
+            # The engine cannot simulate the rule, the board keeps its rule
+            self.rule.try_set_rule(self.rule.name_of(self.board.rule))
+            messagebox.showinfo(message = str(error))
+            return
+
         self.rule_name.configure(text = rule_text)
 
-        self.board.birth_rule = self.rule.birth_rule
-        self.board.remain_rule = self.rule.remain_rule
-        self.anim_board.birth_rule = self.rule.birth_rule
-        self.anim_board.remain_rule = self.rule.remain_rule
+        # Recorded generations after the current one followed the old rule
+        self.history.truncate()
+        self.update_history_widgets()
+
+    def on_topology_change(self, value: str) -> None:
+        """Join the edges of the board as chosen, cells of the shown generation are kept.
+        A new board is created if the board changes between the plane and a bounded board."""
+
+        if self.board == None or self.file_task != None:
+            self.show_topology()
+            return
+
+        self.stop_animation()
+        topology = self.TOPOLOGIES[value]
+        if topology != None and self.board.bounded:
+            self.board.topology = topology
+
+            # Recorded generations after the current one had other edges
+            self.history.truncate()
+            self.update_history_widgets()
+            return
+        if (topology != None) == self.board.bounded:
+            return
+
+        try:
+            board = self.empty_board()
+        except ValueError as error:
+            # The rule cannot be simulated on the chosen board, the board is kept
+            messagebox.showinfo(message = str(error))
+            self.show_topology()
+            return
+        cells = self.board.living
+        top, left = 0, 0
+        if board.bounded and cells:
+            # The pattern is moved to the middle of the bounded board, cells outside it are lost
+            rows = sorted(i for i, j in cells)
+            columns = sorted(j for i, j in cells)
+            top = (board.height - rows[-1] - rows[0] - 1) // 2
+            left = (board.width - columns[-1] - columns[0] - 1) // 2
+        board.stamp(cells, top, left)
+        if self.board.background:
+            # The stored cells are dead on a living background
+            board.invert_rect(0, 0, board.height, board.width)
+        board.generation = self.board.generation
+
+        self.board = board
+        self.init_new_board()
+        self.painter.draw_board()
 
     def on_canvas_click(self, event) -> None:
-        """Edit boards - add or remove a cell."""
+        """Edit the board - add or remove cells on the way from the last edited cell."""
         
-        def edit_board(board: Board, mode: int, i: int, j: int) -> None:
-            """Add or remove a cell at the position (i, j) depending on the current mode."""
-
-            if mode == 0:
-                board.add(i, j)
-            elif mode == 1:
-                board.remove(i, j)
-            elif mode == 2:
-                if self.edit_toggle_mode == "add":
-                    board.add(i, j)
-                elif self.edit_toggle_mode == "remove":
-                    board.remove(i, j)
-                else:
-                    if board.is_alive(i, j):
-                        self.edit_toggle_mode = "remove"
-                        board.remove(i, j)
-                    else:
-                        self.edit_toggle_mode = "add"
-                        board.add(i, j)
-
-        if (self.board == None or
-            self.anim_board.generation > 0 or
-            self.animator.is_running):
+        def cells_on_line(start: tuple, end: tuple) -> list:
+            """Return cells on the line from the start cell (excluded) to the end cell,
+            so that a fast drag leaves no gaps."""
+
+            steps = max(abs(end[0] - start[0]), abs(end[1] - start[1]))
+            return [(start[0] + round((end[0] - start[0]) * k / steps),
+                     start[1] + round((end[1] - start[1]) * k / steps))
+                    for k in range(1, steps + 1)]
+
+        if (self.board == None or not self.is_editable() or
+            self.animator.is_running or self.file_task != None):
             return
 
-        i, j = self.painter.cell_index_from_coord(event.x, event.y)
-        if i == -1 or j == -1:
+        cell = self.painter.cell_index_from_coord(event.x, event.y)
+        if cell == None or cell == self.last_edited_cell:
             return
 
+        if self.last_edited_cell == None:
+            cells = [cell]
+        else:
+            cells = cells_on_line(self.last_edited_cell, cell)
+        self.last_edited_cell = cell
+
+        # The toggle mode is decided by the first cell of a drag
         mode = self.edit_mode.get()
-        edit_board(self.anim_board, mode, i, j)
-        edit_board(self.board, mode, i, j)
+        if mode == 2 and self.edit_toggle_mode == None:
+            self.edit_toggle_mode = "remove" if self.board.is_alive(*cell) else "add"
+
+        if mode == 0 or (mode == 2 and self.edit_toggle_mode == "add"):
+            self.board.add_many(cells)
+        else:
+            self.board.remove_many(cells)
 
+        # The edited board is the new original, the history starts again from it
+        self.original = None
+        self.history.follow(self.board)
+        self.update_history_widgets()
         self.painter.draw_board()
     
     def on_canvas_mouse_release(self, event) -> None:
-        """Reset the current toggle mode."""
+        """Reset the current toggle mode and the last edited cell."""
 
         self.edit_toggle_mode = None
+        self.last_edited_cell = None
 
     def on_canvas_resize(self, event) -> None:
         """Adjust the painter to the new size of the canvas."""
@@ -546,15 +864,31 @@ class Application:
     # endregion
 
     def empty_board(self) -> Board:
-        """Return an empty board with the initial size."""
-
-        board = Board()
-        board.birth_rule = self.rule.birth_rule
-        board.remain_rule = self.rule.remain_rule
-        board.empty_board(self.BOARD_HEIGHT, self.BOARD_WIDTH)
+        """Return an empty board with the chosen topology, unbounded for the plane.
+        Bounded boards use an engine computing every cell, which can simulate rules
+        with birth on 0 neighbors if NumPy is available. Raise ValueError if it cannot."""
+
+        topology = self.TOPOLOGIES[self.topology.get()]
+        if topology == None:
+            board = Board(SparseEngine())
+            board.empty_unbounded()
+            board.rule = self.rule.table
+        else:
+            board = Board(default_engine())
+            board.empty_board(*self.BOUNDED_SIZE)
+            board.rule = self.rule.table
+            board.topology = topology
 
         return board
 
+    def show_topology(self) -> None:
+        """Show the topology of the board in the topology menu."""
+
+        topology = self.board.topology if self.board != None and self.board.bounded else None
+        for name, value in self.TOPOLOGIES.items():
+            if value == topology:
+                self.topology.set(name)
+
     def init_new_board(self) -> None:
         """Initialize the application after a new board was created."""
 
@@ -563,20 +897,128 @@ class Application:
         TkState.enable([self.play_button, self.step_button])
         TkState.disable([self.reset_button])
 
-        self.gen_number.config(text = 0)
+        self.gen_number.config(text = self.board.generation)
         self.speed_scale.set(self.INITIAL_TIME_PER_GEN)
         self.zoom_scale.set(self.INITIAL_ZOOM)
 
-        self.animator.board = self.anim_board
-        self.painter.board = self.anim_board
+        self.original = None
+        self.cycle_info.configure(text='')
+        self.animator.board = self.board
+        self.painter.board = self.board
         self.painter.adjust_to_canvas()
 
+        self.history.clear()
+        self.history.follow(self.board)
+        self.update_history_widgets()
+
+    def start_file_task(self, task: FileTask, action: str, on_finished) -> None:
+        """Disable file and editing widgets while the task runs, show its progress.
+        The function on_finished is called on the main thread when the task is done."""
+
+        def show_progress() -> None:
+            """Show the progress of the task until it is done."""
+
+            progress = task.progress
+            if not task.is_done:
+                # The size of a saved file is not known in advance
+                if progress.is_cancelled:
+                    text = 'Cancelling...'
+                elif progress.total:
+                    text = '{} {} %'.format(action, 100 * progress.done // progress.total)
+                else:
+                    text = '{} {:.1f} MB'.format(action, progress.done / 1e6)
+                self.file_status.configure(text=text)
+                self.master.after(self.FILE_POLL_TIME, show_progress)
+                return
+
+            self.file_task = None
+            self.file_status.configure(text='')
+            TkState.disable([self.cancel_button])
+            TkState.enable(self.file_buttons)
+            if self.board != None:
+                TkState.enable([self.play_button])
+                self.stop_animation()
+                self.update_history_widgets()
+            on_finished()
+
+        self.file_task = task
+        TkState.disable(self.file_buttons)
+        TkState.disable(self.edit_menu.winfo_children())
+        TkState.disable([self.play_button, self.step_button, self.step_back_button])
+        TkState.enable([self.cancel_button])
+        self.file_status.configure(text=action + '...')
+        self.master.after(self.FILE_POLL_TIME, show_progress)
+
+    def show_history(self, generation: int) -> None:
+        """Restore the animation board to a generation recorded in the history and draw it."""
+
+        snapshot = self.history.snapshot_at(generation)
+        if snapshot == None:
+            return
+
+        self.keep_original()
+        self.board.restore(snapshot)
+        self.cycle_info.configure(text='')
+        self.gen_number.config(text = self.board.generation)
+
+        if self.is_editable():
+            TkState.enable(self.edit_menu.winfo_children())
+        else:
+            TkState.disable(self.edit_menu.winfo_children())
+            TkState.enable([self.reset_button])
+
+        self.update_history_widgets()
+        self.painter.draw_board()
+
+    def update_history_widgets(self) -> None:
+        """Set the range of the history scale to recorded generations, enable stepping back
+        if the previous generation is recorded."""
+
+        oldest, newest = self.history.oldest, self.history.newest
+        generation = self.animator.generation
+        if oldest == None:
+            oldest, newest = generation, generation
+
+        self.history_scale.configure(from_=oldest, to=newest)
+        self.history_scale.set(generation)
+        if oldest < generation and self.file_task == None:
+            TkState.enable([self.step_back_button])
+        else:
+            TkState.disable([self.step_back_button])
+
+    def keep_original(self) -> None:
+        """Take a snapshot of the board before it leaves the original generation,
+        unless it is already taken. The snapshot shares tiles of the cell index with the board."""
+
+        if self.original == None:
+            self.original = self.board.snapshot()
+
+    def is_editable(self) -> bool:
+        """Return True if the board is in the generation of the original, only then it can be edited."""
+
+        return self.original == None or self.board.generation == self.original.generation
+
+    def original_board(self) -> Board:
+        """Return the board in its original generation, a new board is restored
+        from the original snapshot if the board was animated."""
+
+        if self.original == None:
+            return self.board
+
+        # The copy keeps the size and the topology of a loaded board
+        board = Board()
+        board.copy(self.board)
+        board.restore(self.original)
+        return board
+
     def play_animation(self) -> None:
         """Start the animation."""
 
         if self.board == None:
             return
 
+        self.keep_original()
+        self.cycle_info.configure(text='')
         TkState.disable(self.edit_menu.winfo_children())
         TkState.disable([self.step_button])
         TkState.enable([self.reset_button])
@@ -593,7 +1035,7 @@ class Application:
         self.play_button.configure(text='Play')
 
         # If board has not been changed yet, enable editing
-        if self.anim_board.generation == 0:
+        if self.is_editable():
             TkState.enable(self.edit_menu.winfo_children())
         TkState.enable([self.step_button])
 
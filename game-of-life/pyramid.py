@@ -0,0 +1,130 @@
+
+import itertools
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class DensityPyramid:
+    """Counts living cells in square blocks of 2^k x 2^k cells on levels k = 1..levels,
+    one block is drawn as one pixel of a zoomed out view. Blocks of each level are
+    stored in square tiles of NumPy arrays, only tiles with living cells exist,
+    so the plane can be unbounded. The counts follow a board by the changes
+    of its generations."""
+
+    LEVELS = 10
+    TILE_SIZE = 64
+
+    def __init__(self, levels: int = LEVELS, tile_size: int = TILE_SIZE) -> None:
+        """Initialize instance variables."""
+
+        if np == None:
+            raise RuntimeError('NumPy library is missing.')
+
+        self.__levels = levels
+        self.__size = tile_size
+        self.__tiles = [{} for x in range(levels)]     # Tile position -> counts, for each level
+        self.__version = None       # Version of the counted state of a board
+
+    # PROPERTIES
+    # region
+    @property
+    def levels(self) -> int:
+        return self.__levels
+
+    @property
+    def version(self) -> int:
+        return self.__version
+    # endregion
+
+    def follow(self, source) -> None:
+        """Count cells of a board or a snapshot. Only its changes are counted
+        if they start from the counted state, otherwise all living cells."""
+
+        if self.__version == source.version:
+            return
+
+        changes = source.changes
+        if (self.__version != None and changes != None and
+            changes.base_version == self.__version):
+            self.__add(changes.births, 1)
+            self.__add(changes.deaths, -1)
+        else:
+            self.__tiles = [{} for x in range(self.__levels)]
+            self.__add(source.living, 1)
+
+        self.__version = source.version
+
+    def __add(self, cells, weight: int) -> None:
+        """Add the weight to counts of blocks with the cells on all levels."""
+
+        if len(cells) == 0:
+            return
+
+        size = self.__size
+        blocks = np.fromiter(itertools.chain.from_iterable(cells), dtype=np.int64,
+                             count=2 * len(cells)).reshape(-1, 2)
+        weights = np.full(len(blocks), weight, dtype=np.int64)
+        for level in range(1, self.__levels + 1):
+            # Blocks of a level are blocks of the level below halved, merged by their keys.
+            # Keys are ordered by tiles, so blocks of one tile are next to each other.
+            blocks = blocks >> 1
+            tile_rows, rows = np.divmod(blocks[:, 0], size)
+            tile_cols, cols = np.divmod(blocks[:, 1], size)
+            first_row, first_col = tile_rows.min(), tile_cols.min()
+            tile_keys = (tile_rows - first_row) * (tile_cols.max() - first_col + 1) + (tile_cols - first_col)
+            keys, inverse = np.unique((tile_keys * size + rows) * size + cols, return_inverse=True)
+            weights = np.bincount(inverse.reshape(-1), weights=weights).astype(np.int64)
+            first = np.unique(inverse.reshape(-1), return_index=True)[1]
+            blocks = blocks[first]
+            tile_rows, tile_cols = tile_rows[first], tile_cols[first]
+            rows, cols = rows[first], cols[first]
+
+            tiles = self.__tiles[level - 1]
+            ends = np.flatnonzero(np.diff(keys // (size * size))) + 1
+            for start, end in zip([0] + ends.tolist(), ends.tolist() + [len(keys)]):
+                key = (int(tile_rows[start]), int(tile_cols[start]))
+                tile = tiles.get(key)
+                if tile is None:
+                    tile = np.zeros((size, size), dtype=np.int32)
+                tile[rows[start:end], cols[start:end]] += weights[start:end].astype(np.int32)
+
+                if tile.any():
+                    tiles[key] = tile
+                else:
+                    tiles.pop(key, None)
+
+    def window(self, level: int, top: int, left: int, height: int, width: int) -> 'np.ndarray':
+        """Return an array of counts of the level in the rectangle of blocks with the top left
+        block (top, left). The cost depends only on the size of the rectangle."""
+
+        result = np.zeros((height, width), dtype=np.int32)
+        tiles = self.__tiles[level - 1]
+        size = self.__size
+        for ti in range(top // size, (top + height - 1) // size + 1):
+            for tj in range(left // size, (left + width - 1) // size + 1):
+                tile = tiles.get((ti, tj))
+                if tile is None:
+                    continue
+
+                first_row, last_row = max(top, ti * size), min(top + height, (ti + 1) * size)
+                first_col, last_col = max(left, tj * size), min(left + width, (tj + 1) * size)
+                result[first_row - top:last_row - top, first_col - left:last_col - left] = \
+                    tile[first_row - ti * size:last_row - ti * size,
+                         first_col - tj * size:last_col - tj * size]
+        return result
+
+    def bounds(self) -> tuple:
+        """Return a rectangle (top, left, bottom, right) of cells containing all living cells,
+        aligned to tiles of the first level. Return None if there are no living cells."""
+
+        keys = list(self.__tiles[0].keys())
+        if not keys:
+            return None
+
+        span = self.__size * 2      # Cells covered by a tile of the first level
+        rows = [ti for ti, tj in keys]
+        cols = [tj for ti, tj in keys]
+        return (min(rows) * span, min(cols) * span,
+                (max(rows) + 1) * span, (max(cols) + 1) * span)
@@ -0,0 +1,260 @@
+
+import re
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# A 3x3 neighborhood is indexed by 9 bits, the bit (di + 1) * 3 + (dj + 1) is the cell (i + di, j + dj)
+CENTER = 1 << 4
+NEIGHBORHOODS = 512
+
+# Bits of the 8 neighbors in the order of the Hensel notation: N, NE, E, SE, S, SW, W, NW
+RING = (1, 2, 5, 8, 7, 6, 3, 0)
+
+HENSEL_LETTERS = 'cekainyqjrtwz'
+
+# One neighborhood of each isotropic class with 1 to 4 neighbors, alive neighbors
+# in the order of RING. Other neighborhoods of a class are its rotations and reflections,
+# classes with 5 to 7 neighbors are complements of classes with 3 to 1 neighbors.
+HENSEL_CLASSES = {
+    1: {'c': '01000000', 'e': '10000000'},
+    2: {'c': '01010000', 'e': '10100000', 'k': '10010000', 'a': '11000000',
+        'i': '10001000', 'n': '01000100'},
+    3: {'c': '01010100', 'e': '10101000', 'k': '10100100', 'a': '11100000',
+        'i': '11000001', 'n': '11010000', 'y': '10010100', 'q': '11000100',
+        'j': '11000010', 'r': '11001000'},
+    4: {'c': '01010101', 'e': '10101010', 'k': '11010010', 'a': '11110000',
+        'i': '11011000', 'n': '11010001', 'y': '11010100', 'q': '11100100',
+        'j': '11001010', 'r': '11101000', 't': '11001001', 'w': '11000110',
+        'z': '11001100'},
+}
+
+CONDITION = re.compile(r'(\d)(-?)([a-z]*)')
+
+
+def ring_mask(bits: str) -> int:
+    """Return the neighborhood with neighbors given by a string of bits in the order of RING."""
+
+    return sum(1 << RING[k] for k, bit in enumerate(bits) if bit == '1')
+
+
+def isotropic_class(neighborhood: int) -> frozenset:
+    """Return the neighborhood with all its rotations and reflections."""
+
+    ring = [(neighborhood >> bit) & 1 for bit in RING]
+    result = set()
+    for turn in range(0, 8, 2):
+        rotated = ring[turn:] + ring[:turn]
+        for bits in (rotated, rotated[:1] + rotated[:0:-1]):
+            result.add(ring_mask(''.join(str(bit) for bit in bits)))
+    return frozenset(result)
+
+
+def hensel_classes() -> dict:
+    """Return neighborhoods of each class of the Hensel notation,
+    a dictionary number of neighbors -> {letter: set of neighborhoods}."""
+
+    full = ring_mask('11111111')
+    classes = {count: {letter: isotropic_class(ring_mask(bits)) for letter, bits in letters.items()}
+               for count, letters in HENSEL_CLASSES.items()}
+    for count in range(5, 8):
+        classes[count] = {letter: frozenset(full ^ x for x in neighborhoods)
+                          for letter, neighborhoods in classes[8 - count].items()}
+    return classes
+
+
+HENSEL = hensel_classes()
+
+
+def neighbor_count(neighborhood: int) -> int:
+    """Return the number of living neighbors in the neighborhood, without the center."""
+
+    return bin(neighborhood & ~CENTER).count('1')
+
+
+def count_neighborhoods(count: int) -> set:
+    """Return all neighborhoods with the number of living neighbors and a dead center."""
+
+    return {x for x in range(NEIGHBORHOODS) if not x & CENTER and neighbor_count(x) == count}
+
+
+def parse_conditions(text: str) -> set:
+    """Return neighborhoods given by numbers of neighbors, each optionally followed by letters
+    of the Hensel notation, e.g. 2-a3ik: 2 neighbors except the class a, 3 neighbors
+    of the classes i and k. Return None if the text is not valid."""
+
+    neighborhoods = set()
+    counts = set()
+    position = 0
+    while position < len(text):
+        match = CONDITION.match(text, position)
+        if match == None:
+            return None
+        position = match.end()
+
+        count = int(match.group(1))
+        negated, letters = match.group(2) == '-', match.group(3)
+        if count > 8 or count in counts or (negated and not letters):
+            return None
+        counts.add(count)
+
+        if not letters:
+            neighborhoods |= count_neighborhoods(count)
+            continue
+
+        classes = HENSEL.get(count, {})
+        if any(letter not in classes for letter in letters) or len(set(letters)) != len(letters):
+            return None
+        chosen = set(classes) - set(letters) if negated else set(letters)
+        for letter in chosen:
+            neighborhoods |= classes[letter]
+    return neighborhoods
+
+
+def conditions_name(neighborhoods: set) -> str:
+    """Return the shortest text of the neighborhoods in the notation of parse_conditions."""
+
+    name = ''
+    for count in range(9):
+        if count_neighborhoods(count) <= neighborhoods:
+            name += str(count)
+            continue
+
+        classes = HENSEL.get(count, {})
+        letters = ''.join(letter for letter in HENSEL_LETTERS
+                          if letter in classes and classes[letter] <= neighborhoods)
+        missing = ''.join(letter for letter in HENSEL_LETTERS
+                          if letter in classes and letter not in letters)
+        if letters:
+            name += str(count) + (letters if len(letters) <= len(missing) else '-' + missing)
+    return name
+
+
+class RuleTable:
+    """A rule compiled into a lookup table of the next state of a cell for each of the 512
+    states of its 3x3 neighborhood. Engines index the table instead of testing rules for
+    each cell, so totalistic, isotropic and any other rules of the neighborhood cost the same.
+    Rules with more than 2 states (Generations) let cells that did not survive
+    go through dying states 2, 3, ... before they are dead, dying cells are not counted
+    as neighbors and no cell is born in them."""
+
+    def __init__(self, table: bytes, states: int = 2) -> None:
+        """Initialize instance variables.
+        The table has the next state (0 or 1) for each neighborhood index."""
+
+        self.__table = bytes(table)
+        self.__states = states
+        self.__array = None             # Table as a NumPy array, created on first use
+        self.__transitions = None
+        self.__counts = self.__find_counts()
+        self.__name = None
+        self.__phases = {}              # Background -> table of the phase and the next background
+
+    # PROPERTIES
+    # region
+    @property
+    def table(self) -> bytes:
+        return self.__table
+
+    @property
+    def states(self) -> int:
+        return self.__states
+
+    @property
+    def array(self) -> 'np.ndarray':
+        if self.__array is None:
+            self.__array = np.frombuffer(self.__table, dtype=np.uint8)
+        return self.__array
+
+    @property
+    def transitions(self) -> 'np.ndarray':
+        # Next state indexed by the current state and the value of the table
+        if self.__transitions is None:
+            states = self.__states
+            transitions = np.zeros((states, 2), dtype=np.uint8)
+            transitions[0] = (0, 1)
+            transitions[1] = (2 % states, 1)
+            transitions[2:] = ((np.arange(2, states) + 1) % states)[:, None]
+            self.__transitions = transitions
+        return self.__transitions
+
+    @property
+    def birth(self) -> set:
+        return {x for x in range(NEIGHBORHOODS) if not x & CENTER and self.__table[x]}
+
+    @property
+    def remain(self) -> set:
+        return {x ^ CENTER for x in range(NEIGHBORHOODS) if x & CENTER and self.__table[x]}
+
+    @property
+    def counts(self) -> tuple:
+        # Sets of numbers of neighbors for birth and survival, None if the rule is not totalistic
+        if self.__counts == None:
+            return None
+        return self.__counts[0].copy(), self.__counts[1].copy()
+
+    @property
+    def name(self) -> str:
+        if self.__name == None:
+            self.__name = 'B' + conditions_name(self.birth) + '/S' + conditions_name(self.remain)
+            if self.__states > 2:
+                self.__name += '/C' + str(self.__states)
+        return self.__name
+    # endregion
+
+    def __find_counts(self) -> tuple:
+        """Return numbers of neighbors for birth and survival if the next state
+        depends only on them, None otherwise."""
+
+        values = {}     # (center, number of neighbors) -> next states
+        for x in range(NEIGHBORHOODS):
+            values.setdefault((x & CENTER, neighbor_count(x)), set()).add(self.__table[x])
+
+        result = (set(), set())
+        for (center, count), states in values.items():
+            if len(states) > 1:
+                return None
+            if 1 in states:
+                result[1 if center else 0].add(count)
+        return result
+
+    def phase(self, background: int) -> tuple:
+        """Return a table for cells stored as the difference from the background (0 dead,
+        1 alive) and the background of the next generation. Empty neighborhoods of the table
+        stay empty, so engines that compute only cells near living cells can simulate rules
+        with birth on 0 neighbors: the background changes instead of the whole plane."""
+
+        if background in self.__phases:
+            return self.__phases[background]
+
+        flip = NEIGHBORHOODS - 1 if background else 0
+        next_background = self.__table[flip]
+        if flip == 0 and next_background == 0:
+            result = (self, 0)
+        else:
+            table = bytes(self.__table[x ^ flip] ^ next_background for x in range(NEIGHBORHOODS))
+            result = (RuleTable(table, self.__states), next_background)
+
+        self.__phases[background] = result
+        return result
+
+
+def compile_rule(birth: set, remain: set, states: int = 2) -> RuleTable:
+    """Return the table of a rule with neighborhoods (with a dead center) in which
+    a dead cell is born and a living cell survives."""
+
+    table = bytearray(NEIGHBORHOODS)
+    for x in range(NEIGHBORHOODS):
+        table[x] = (x ^ CENTER) in remain if x & CENTER else x in birth
+    return RuleTable(table, states)
+
+
+def totalistic_rule(birth_counts: set, remain_counts: set, states: int = 2) -> RuleTable:
+    """Return the table of a rule given by numbers of neighbors for birth and survival."""
+
+    table = bytearray(NEIGHBORHOODS)
+    for x in range(NEIGHBORHOODS):
+        table[x] = neighbor_count(x) in (remain_counts if x & CENTER else birth_counts)
+    return RuleTable(table, states)
@@ -0,0 +1,86 @@
+
+# How the edges of a bounded board are joined
+BOUNDED = 'bounded'         # Cells outside the board are dead
+TORUS = 'torus'             # Opposite edges are joined
+KLEIN_BOTTLE = 'klein'      # Left and right edges are joined, top and bottom edges with a twist
+TOPOLOGIES = (BOUNDED, TORUS, KLEIN_BOTTLE)
+
+
+def wrap_position(i: int, j: int, height: int, width: int, topology: str) -> tuple:
+    """Return the cell of the board shown at the position (i, j), which is at most one cell
+    outside the board. Return None if cells outside the board are dead."""
+
+    if 0 <= i < height and 0 <= j < width:
+        return i, j
+    if topology == BOUNDED:
+        return None
+
+    j %= width
+    if not 0 <= i < height:
+        i %= height
+        if topology == KLEIN_BOTTLE:
+            j = width - 1 - j
+    return i, j
+
+
+def ghost_positions(i: int, j: int, height: int, width: int, topology: str) -> list:
+    """Return positions one cell outside the board which show the cell (i, j) of the board,
+    i.e. the positions that wrap_position returns the cell for."""
+
+    if topology == BOUNDED:
+        return []
+
+    rows = [(i, False)]         # Rows with the cell and whether they cross the top or bottom edge
+    if i == 0:
+        rows.append((height, True))
+    if i == height - 1:
+        rows.append((-1, True))
+
+    result = []
+    for row, crossed in rows:
+        column = width - 1 - j if crossed and topology == KLEIN_BOTTLE else j
+        columns = [column]
+        if column == 0:
+            columns.append(width)
+        if column == width - 1:
+            columns.append(-1)
+        result.extend((row, col) for col in columns if (row, col) != (i, j))
+    return result
+
+
+def ghost_border(height: int, width: int, topology: str) -> dict:
+    """Return the border of a grid padded by one cell as a dictionary of its positions
+    and the positions of cells they show, in coordinates of the padded grid.
+    Cells of a bounded board are not shown on the border, the positions map to None."""
+
+    border = [(0, j) for j in range(width + 2)] + [(height + 1, j) for j in range(width + 2)]
+    border += [(i, 0) for i in range(1, height + 1)] + [(i, width + 1) for i in range(1, height + 1)]
+
+    result = {}
+    for i, j in border:
+        cell = wrap_position(i - 1, j - 1, height, width, topology)
+        result[(i, j)] = (cell[0] + 1, cell[1] + 1) if cell != None else None
+    return result
+
+
+def fill_border(padded: 'np.ndarray', topology: str) -> None:
+    """Copy cells of the board to the border of a NumPy grid padded by one cell, so that
+    neighborhoods of cells at the edges are read from the grid without bounds checks.
+    The border of a bounded board is dead. Called once per generation."""
+
+    if topology == BOUNDED:
+        padded[0] = 0
+        padded[-1] = 0
+        padded[:, 0] = 0
+        padded[:, -1] = 0
+        return
+
+    # Columns first, so that the rows copied next carry the corners
+    padded[1:-1, 0] = padded[1:-1, -2]
+    padded[1:-1, -1] = padded[1:-1, 1]
+    if topology == KLEIN_BOTTLE:
+        padded[0] = padded[-2, ::-1]
+        padded[-1] = padded[1, ::-1]
+    else:
+        padded[0] = padded[-2]
+        padded[-1] = padded[1]
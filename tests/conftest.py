@@ -0,0 +1,6 @@
+
+import os
+import sys
+
+# Modules of the program are imported by their names, like main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'game-of-life'))
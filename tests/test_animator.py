@@ -0,0 +1,88 @@
+
+import time
+import pytest
+
+pytest.importorskip('PIL')     # gol quits without Pillow
+from gol import Animator, Painter
+from core import Board, Rule
+from engines import SparseEngine
+
+
+class FakeMaster:
+    """Runs callbacks scheduled by after() instead of the tkinter loop."""
+
+    def __init__(self) -> None:
+        self.callbacks = {}
+        self.last_id = 0
+
+    def after(self, time_to_wait: int, callback) -> int:
+        self.last_id += 1
+        self.callbacks[self.last_id] = callback
+        return self.last_id
+
+    def after_cancel(self, after_id: int) -> None:
+        self.callbacks.pop(after_id, None)
+
+    def run(self, animator: Animator, timeout: float = 10) -> None:
+        """Run scheduled callbacks until the animation stops."""
+
+        end = time.time() + timeout
+        while animator.is_running and time.time() < end:
+            for after_id in list(self.callbacks):
+                callback = self.callbacks.pop(after_id, None)
+                if callback != None:
+                    callback()
+            time.sleep(0.001)
+        assert not animator.is_running
+
+
+def create_animator(cells: list, policy: str) -> tuple:
+    rule = Rule('B', 'R', '/')
+    rule.try_set_rule('B3/R23')
+    board = Board(SparseEngine())
+    board.empty_unbounded()
+    board.rule = rule.table
+    board.add_many(cells)
+
+    master = FakeMaster()
+    animator = Animator(master)
+    animator.board = board
+    animator.painter = Painter()
+    animator.time_per_gen = 0
+    animator.cycle_policy = policy
+    return master, animator
+
+
+def test_pause_at_cycle_and_play_again():
+    master, animator = create_animator([(0, 0), (0, 1), (0, 2)], Animator.CYCLE_PAUSE)
+    cycles = []
+    animator.on_cycle = lambda: cycles.append((animator.cycle.start, animator.cycle.period))
+
+    animator.play()
+    master.run(animator)
+    assert animator.board.generation == 2
+    assert cycles == [(0, 2)]
+
+    # The next play shows one more period and pauses at the repeated state again
+    animator.play()
+    master.run(animator)
+    assert animator.board.generation == 4
+    assert cycles == [(0, 2), (2, 2)]
+
+
+def test_skip_cycle_keeps_generations_running():
+    master, animator = create_animator([(0, 0), (0, 1), (1, 0), (1, 1)], Animator.CYCLE_SKIP)
+    generations = []
+    animator.on_new_gen = lambda: generations.append(animator.generation)
+
+    animator.play()
+    end = time.time() + 10
+    while len(generations) < 10 and time.time() < end:
+        for after_id in list(master.callbacks):
+            master.callbacks.pop(after_id)()
+        time.sleep(0.001)
+    animator.stop()
+
+    assert generations[:10] == list(range(1, 11))
+    assert animator.cycle.period == 1
+    assert animator.board.generation == generations[-1]
@@ -0,0 +1,167 @@
+import os
+import random
+import time
+import pytest
+import cycles
+import formats
+from core import Board
+from cycles import CycleDetector, cells_hash
+from engines import NumpyEngine, SparseEngine
+from rules import totalistic_rule
+from topology import TORUS
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'examples')
+
+BLOCK = [(0, 0), (0, 1), (1, 0), (1, 1)]
+BEEHIVE = [(0, 1), (0, 2), (1, 0), (1, 3), (2, 1), (2, 2)]
+BLINKER = [(0, 0), (0, 1), (0, 2)]
+TOAD = [(0, 1), (0, 2), (0, 3), (1, 0), (1, 1), (1, 2)]
+# The row of ten cells becomes a pentadecathlon
+PENTADECATHLON = [(0, j) for j in range(10)]
+GLIDER = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
+R_PENTOMINO = [(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)]
+
+
+def create_board(cells: list, rule=None) -> Board:
+    board = Board(SparseEngine())
+    board.empty_unbounded()
+    board.rule = rule if rule != None else totalistic_rule({3}, {2, 3})
+    board.add_many(cells)
+    return board
+
+
+def find_cycle(board: Board, generations: int, detector: CycleDetector = None):
+    """Step the board until the detector finds a cycle, return the cycle and the generation."""
+
+    if detector == None:
+        detector = CycleDetector()
+    detector.follow(board)
+    for x in range(generations):
+        if detector.cycle != None:
+            break
+        board.next_gen()
+        detector.follow(board)
+    return detector.cycle, board.generation
+
+
+@pytest.mark.parametrize('cells', [BLOCK, BEEHIVE])
+def test_still_life(cells):
+    cycle, generation = find_cycle(create_board(cells), 10)
+    assert (cycle.start, cycle.period, generation) == (0, 1, 1)
+
+
+@pytest.mark.parametrize('cells, start, period', [
+    (BLINKER, 0, 2),
+    (TOAD, 0, 2),
+    (PENTADECATHLON, 2, 15),
+    ([(0, 0), (0, 1), (1, 0)], 1, 1),      # Becomes a block
+])
+def test_oscillator(cells, start, period):
+    cycle, generation = find_cycle(create_board(cells), 50)
+    assert (cycle.start, cycle.period) == (start, period)
+    assert generation == start + period
+    assert cycle.phase(generation + 4) == 4 % period
+
+
+def test_pulsar_from_examples():
+    board = create_board([])
+    assert formats.load_pattern(board, os.path.join(EXAMPLES, 'pulsar.txt'))
+
+    cycle, generation = find_cycle(board, 100)
+    assert cycle != None and cycle.period == 3
+
+
+@pytest.mark.parametrize('cells, generations', [(GLIDER, 40), (R_PENTOMINO, 200)])
+def test_moving_and_growing_patterns_have_no_cycle(cells, generations):
+    cycle, generation = find_cycle(create_board(cells), generations)
+    assert cycle == None
+
+
+def test_small_table_forgets_long_periods():
+    cycle, generation = find_cycle(create_board(PENTADECATHLON), 50, CycleDetector(table_size=8))
+    assert cycle == None
+
+
+def test_skipped_generations_give_a_multiple_of_the_period():
+    board = create_board(BLINKER)
+    detector = CycleDetector()
+    detector.follow(board)
+    board.advance(4)
+    assert (detector.follow(board).start, detector.cycle.period) == (0, 4)
+
+
+def test_edit_clears_the_cycle():
+    board = create_board(BLOCK)
+    detector = CycleDetector()
+    assert find_cycle(board, 10, detector)[0] != None
+
+    board.add(10, 10)
+    assert detector.follow(board) == None
+    board.next_gen()
+    assert detector.follow(board) == None
+    assert detector.population == 4
+
+
+def test_background_is_part_of_the_state():
+    # Birth on 0 neighbors makes the empty plane alternate between dead and alive
+    cycle, generation = find_cycle(create_board([], totalistic_rule({0, 3}, {2, 3})), 10)
+    assert (cycle.start, cycle.period) == (0, 2)
+
+
+def test_hash_does_not_depend_on_numpy(monkeypatch):
+    cells = R_PENTOMINO + [(-5, -7), (1 << 20, -(1 << 20))]
+    expected = cells_hash(cells)
+
+    monkeypatch.setattr(cycles, 'np', None)
+    assert cells_hash(cells) == expected
+    assert cells_hash(list(reversed(cells))) == expected
+    assert cells_hash([]) == 0
+
+
+def generations_board() -> Board:
+    """Return a board of a rule with dying states whose living cells repeat after
+    the first generation, although its states do not."""
+
+    board = Board(NumpyEngine())
+    board.empty_board(6, 6)
+    board.topology = TORUS
+    board.rule = totalistic_rule({2}, {3, 4, 5}, 3)
+    generator = random.Random(12)
+    board.add_many([(i, j) for i in range(6) for j in range(6) if generator.random() < 0.5])
+    return board
+
+
+def test_living_cells_of_generations_rules_repeat_without_a_cycle():
+    board = generations_board()
+    states = [set(board.living)]
+    for x in range(10):
+        board.next_gen()
+        states.append(set(board.living))
+
+    assert states[1] == states[2] and states[2] != states[3]
+
+
+def test_animator_does_not_search_cycles_with_dying_states():
+    pytest.importorskip('PIL')      # gol quits without Pillow
+    from gol import Animator, Painter
+    from tests.test_animator import FakeMaster
+
+    master = FakeMaster()
+    animator = Animator(master)
+    animator.board = generations_board()
+    animator.painter = Painter()
+    animator.time_per_gen = 0
+    animator.cycle_policy = Animator.CYCLE_PAUSE
+    cycles = []
+    animator.on_cycle = lambda: cycles.append(animator.cycle)
+
+    animator.play()
+    end = time.time() + 10
+    while animator.generation < 20 and time.time() < end:
+        for after_id in list(master.callbacks):
+            master.callbacks.pop(after_id)()
+        time.sleep(0.001)
+    animator.stop()
+
+    assert animator.generation >= 20
+    assert cycles == [] and animator.cycle == None
@@ -0,0 +1,219 @@
+import random
+import pytest
+
+pytest.importorskip('numpy')    # Most engines and the bit rows need NumPy
+from core import Board, Rule
+from engines import (BitEngine, ListEngine, NumpyEngine, ProcessEngine, SparseEngine,
+                     ThreadedEngine, TiledEngine)
+from hashlife import HashLifeEngine
+from rules import RuleTable, totalistic_rule
+from topology import BOUNDED, TOPOLOGIES, wrap_position
+
+GENERATIONS = 8
+HEIGHT, WIDTH = 12, 10
+
+
+def engine_factories() -> dict:
+    return {
+        'list': ListEngine,
+        'numpy': NumpyEngine,
+        'bit': BitEngine,
+        'sparse': SparseEngine,
+        'tiled': TiledEngine,
+        'small-tiles': lambda: TiledEngine(4),      # Patterns of the tests span several tiles
+        'threaded': lambda: ThreadedEngine(2),
+        'process': lambda: ProcessEngine(2),
+        'hashlife': HashLifeEngine,
+    }
+
+
+def parsed_rule(text: str) -> RuleTable:
+    rule = Rule('B', 'R', '/')
+    assert rule.try_set_rule(text)
+    return rule.table
+
+
+def random_table(seed: int, birth_on_zero: bool) -> RuleTable:
+    """Return a rule of random neighborhoods, not isotropic nor totalistic."""
+
+    generator = random.Random(seed)
+    table = bytearray(generator.getrandbits(1) for x in range(512))
+    table[0] = birth_on_zero
+    return RuleTable(table)
+
+
+RULES = {
+    'life': totalistic_rule({3}, {2, 3}),
+    'highlife': totalistic_rule({3, 6}, {2, 3}),
+    'isotropic': parsed_rule('B2-a3/R23'),
+    'b0-inverted': totalistic_rule({0, 1, 3}, {1, 4, 5, 8}),     # The background turns alive
+    'b0-alternating': totalistic_rule({0, 3}, {2, 3}),          # Background alternates
+    'brians-brain': totalistic_rule({2}, set(), 3),
+    'generations': totalistic_rule({3, 4}, {3, 4, 5}, 4),
+    'random': random_table(1, False),
+    'random-b0': random_table(2, True),
+}
+
+
+def reference_step(cells: dict, height: int, width: int, topology: str, rule: RuleTable) -> dict:
+    """Return states of the next generation of a bounded grid, computed cell by cell.
+    Cells are a dictionary position -> state of cells that are not dead."""
+
+    result = {}
+    for i in range(height):
+        for j in range(width):
+            neighborhood = 0
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    position = wrap_position(i + di, j + dj, height, width, topology)
+                    if position != None and cells.get(position) == 1:
+                        neighborhood |= 1 << ((di + 1) * 3 + (dj + 1))
+
+            state = cells.get((i, j), 0)
+            if state == 0:
+                state = rule.table[neighborhood]
+            elif state == 1:
+                state = 1 if rule.table[neighborhood] else 2 % rule.states
+            else:
+                state = (state + 1) % rule.states
+            if state:
+                result[(i, j)] = state
+    return result
+
+
+def living_of(cells: dict, top: int = 0, left: int = 0) -> set:
+    return {(i + top, j + left) for (i, j), state in cells.items() if state == 1}
+
+
+def random_cells(seed: int, height: int, width: int) -> list:
+    generator = random.Random(seed)
+    return [(i, j) for i in range(height) for j in range(width) if generator.random() < 0.4]
+
+
+def create_board(engine_name: str) -> Board:
+    return Board(engine_factories()[engine_name]())
+
+
+def close(board: Board) -> None:
+    if hasattr(board.engine, 'close'):
+        board.engine.close()
+
+
+@pytest.mark.parametrize('rule_name', RULES)
+@pytest.mark.parametrize('topology', TOPOLOGIES)
+@pytest.mark.parametrize('engine_name', [name for name in engine_factories() if name != 'hashlife'])
+def test_bounded_board_matches_reference(engine_name, topology, rule_name):
+    rule = RULES[rule_name]
+    board = create_board(engine_name)
+    try:
+        if topology not in board.engine.TOPOLOGIES:
+            with pytest.raises(ValueError):
+                board.topology = topology
+            return
+        board.empty_board(HEIGHT, WIDTH)
+        board.topology = topology
+
+        # Engines that store cells near living ones must refuse what they cannot simulate
+        if rule.states > board.engine.MAX_STATES or (rule.table[0] and not board.engine.EVERY_CELL):
+            with pytest.raises(ValueError):
+                board.rule = rule
+            return
+        board.rule = rule
+
+        cells = random_cells(HEIGHT * WIDTH, HEIGHT, WIDTH)
+        board.add_many(cells)
+        expected = {cell: 1 for cell in cells}
+        for generation in range(GENERATIONS):
+            board.next_gen()
+            expected = reference_step(expected, HEIGHT, WIDTH, topology, rule)
+            assert set(board.living) == living_of(expected), generation
+            assert set(board.cells_in(0, 0, HEIGHT, WIDTH)) == living_of(expected), generation
+    finally:
+        close(board)
+
+
+@pytest.mark.parametrize('rule_name', RULES)
+@pytest.mark.parametrize('engine_name', ['sparse', 'tiled', 'small-tiles', 'hashlife'])
+def test_unbounded_board_matches_reference(engine_name, rule_name):
+    rule = RULES[rule_name]
+    board = create_board(engine_name)
+    board.empty_unbounded()
+    if rule.states > board.engine.MAX_STATES or (rule.table[0] and rule.states > 2):
+        with pytest.raises(ValueError):
+            board.rule = rule
+        return
+    board.rule = rule
+
+    # The reference grid is big enough that its dead edges do not reach the compared cells
+    size = 6
+    margin = GENERATIONS + 2
+    cells = [(i - 3, j - 3) for i, j in random_cells(7, size, size)]
+    board.add_many(cells)
+    top = -3 - margin
+    expected = {(i - top, j - top): 1 for i, j in cells}
+    grid_size = size + 2 * margin
+    for generation in range(GENERATIONS):
+        board.next_gen()
+        expected = reference_step(expected, grid_size, grid_size, BOUNDED, rule)
+
+        window = board.window(-5, -5, size + 4, size + 4)
+        living = {(i - 5, j - 5) for i, j in zip(*window.nonzero())}
+        inside = {(i, j) for i, j in living_of(expected, top, top)
+                  if -5 <= i < size - 1 and -5 <= j < size - 1}
+        assert living == inside, generation
+        assert set(board.cells_in(-5, -5, size + 4, size + 4)) == inside, generation
+        assert board.is_alive(-5, -5) == ((-5, -5) in inside)
+
+
+@pytest.mark.parametrize('engine_name', engine_factories())
+def test_unsupported_boards_are_refused(engine_name):
+    board = create_board(engine_name)
+    try:
+        if board.engine.BOUNDED_GRID:
+            board.empty_board(HEIGHT, WIDTH)
+        else:
+            with pytest.raises(ValueError):
+                board.empty_board(HEIGHT, WIDTH)
+        if board.engine.UNBOUNDED_PLANE:
+            board.empty_unbounded()
+        else:
+            with pytest.raises(ValueError):
+                board.empty_unbounded()
+    finally:
+        close(board)
+
+
+@pytest.mark.parametrize('rule_name', ['life', 'b0-alternating', 'random-b0'])
+def test_hashlife_advance_matches_steps(rule_name):
+    stepped = create_board('sparse')
+    jumped = create_board('hashlife')
+    for board in (stepped, jumped):
+        board.empty_unbounded()
+        board.rule = RULES[rule_name]
+        board.add_many(random_cells(3, 8, 8))
+
+    for x in range(37):
+        stepped.next_gen()
+    jumped.advance(37)
+
+    assert jumped.generation == stepped.generation
+    assert jumped.background == stepped.background
+    assert set(jumped.living) == set(stepped.living)
+
+
+@pytest.mark.parametrize('engine_name', ['tiled', 'hashlife'])
+def test_b0_rule_on_many_tiles_matches_sparse(engine_name):
+    # Tiles that did not change must be computed again when the background changes
+    generator = random.Random(1)
+    cells = list({(generator.randint(-150, 150), generator.randint(-150, 150)) for x in range(3000)})
+    boards = [create_board(name) for name in ('sparse', engine_name)]
+    for board in boards:
+        board.empty_unbounded()
+        board.rule = totalistic_rule({0, 1, 2, 3, 4, 7, 8}, {3, 4, 6, 7, 8})
+        board.add_many(cells)
+
+    for generation in range(6):
+        for board in boards:
+            board.next_gen()
+        assert boards[1].background == boards[0].background
+        assert set(boards[1].living) == set(boards[0].living), generation
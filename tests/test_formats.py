@@ -0,0 +1,186 @@
+import random
+import pytest
+
+pytest.importorskip('numpy')    # Binary files are read through NumPy views
+import formats
+from core import Board, Rule
+from engines import NumpyEngine, SparseEngine
+from rules import totalistic_rule
+from topology import BOUNDED, TOPOLOGIES
+
+TEXT_EXTENSIONS = ['.txt', '.rle', '.lif', '.cells']
+EXTENSIONS = TEXT_EXTENSIONS + [formats.BINARY_EXTENSION]
+# Formats which keep the rule, and the size and topology of boards with joined edges
+KEEP_RULE = {formats.BINARY_EXTENSION, '.rle'}
+KEEP_POSITION = {'.txt', formats.BINARY_EXTENSION, '.rle', '.lif'}
+HEIGHT, WIDTH = 40, 50
+
+
+def parsed_rule(text: str):
+    rule = Rule('B', 'R', '/')
+    assert rule.try_set_rule(text)
+    return rule.table
+
+
+def random_cells(seed: int, top: int, left: int, height: int, width: int, density: float) -> list:
+    generator = random.Random(seed)
+    return [(i, j) for i in range(top, top + height) for j in range(left, left + width)
+            if generator.random() < density]
+
+
+def normalized(cells) -> set:
+    """Return the cells moved to the top left corner, the plaintext format keeps only the shape."""
+
+    cells = set(cells)
+    if not cells:
+        return cells
+    top = min(i for i, j in cells)
+    left = min(j for i, j in cells)
+    return {(i - top, j - left) for i, j in cells}
+
+
+def create_unbounded(cells: list = ()) -> Board:
+    board = Board(SparseEngine())
+    board.empty_unbounded()
+    board.rule = totalistic_rule({3}, {2, 3})
+    board.add_many(cells)
+    return board
+
+
+def create_bounded(topology: str = BOUNDED, cells: list = (), height: int = HEIGHT,
+                   width: int = WIDTH) -> Board:
+    board = Board(NumpyEngine())
+    board.empty_board(height, width)
+    board.topology = topology
+    board.rule = totalistic_rule({3}, {2, 3})
+    board.add_many(cells)
+    return board
+
+
+def round_trip(board: Board, target: Board, path) -> Board:
+    formats.save_pattern(board, str(path))
+    assert formats.load_pattern(target, str(path))
+    return target
+
+
+def assert_same_cells(loaded: Board, board: Board, extension: str) -> None:
+    if extension in KEEP_POSITION:
+        assert set(loaded.living) == set(board.living)
+    else:
+        assert normalized(loaded.living) == normalized(board.living)
+
+
+@pytest.mark.parametrize('extension', EXTENSIONS)
+def test_unbounded_round_trip(tmp_path, extension):
+    board = create_unbounded(random_cells(1, -20, -30, 60, 70, 0.3))
+    board.rule = parsed_rule('B36/R23')
+    board.generation = 17
+
+    loaded = round_trip(board, create_unbounded(), tmp_path / ('board' + extension))
+    assert_same_cells(loaded, board, extension)
+    if extension in KEEP_RULE:
+        assert loaded.rule.table == board.rule.table
+    if extension == formats.BINARY_EXTENSION:
+        assert loaded.generation == 17
+
+
+@pytest.mark.parametrize('topology', TOPOLOGIES)
+@pytest.mark.parametrize('extension', EXTENSIONS)
+def test_bounded_round_trip(tmp_path, extension, topology):
+    board = create_bounded(topology, random_cells(2, 0, 0, HEIGHT, WIDTH, 0.4))
+
+    # Boards with joined edges are loaded with their size, a binary file keeps any size
+    size = (HEIGHT, WIDTH)
+    if (topology != BOUNDED and extension in KEEP_RULE) or extension == formats.BINARY_EXTENSION:
+        size = (10, 10)
+    loaded = round_trip(board, create_bounded(BOUNDED, (), *size), tmp_path / ('board' + extension))
+
+    assert_same_cells(loaded, board, extension)
+    if extension in KEEP_RULE:
+        assert (loaded.height, loaded.width, loaded.topology) == (HEIGHT, WIDTH, topology)
+
+
+@pytest.mark.parametrize('extension', TEXT_EXTENSIONS)
+def test_large_pattern_is_read_in_chunks(tmp_path, extension):
+    board = create_unbounded(random_cells(3, 0, 0, 300, 300, 0.5))
+
+    path = tmp_path / ('board' + extension)
+    loaded = round_trip(board, create_unbounded(), path)
+    assert path.stat().st_size > formats.CHUNK_SIZE
+    assert_same_cells(loaded, board, extension)
+
+
+@pytest.mark.parametrize('extension', EXTENSIONS)
+def test_empty_board_round_trip(tmp_path, extension):
+    board = create_unbounded()
+
+    loaded = round_trip(board, create_unbounded(), tmp_path / ('board' + extension))
+    assert list(loaded.living) == []
+
+
+@pytest.mark.parametrize('text', ['B2-a3/R23', 'B2/R/C3'])
+def test_binary_keeps_rule_tables_and_states(tmp_path, text):
+    board = create_bounded(cells=random_cells(4, 0, 0, HEIGHT, WIDTH, 0.3))
+    board.rule = parsed_rule(text)
+
+    loaded = round_trip(board, create_bounded(), tmp_path / 'board.gol')
+    assert loaded.rule.table == board.rule.table
+    assert loaded.rule.states == board.rule.states
+    assert set(loaded.living) == set(board.living)
+
+
+def test_rle_keeps_isotropic_rule(tmp_path):
+    board = create_unbounded(random_cells(5, 0, 0, 20, 20, 0.3))
+    board.rule = parsed_rule('B2-a3/R23')
+
+    loaded = round_trip(board, create_unbounded(), tmp_path / 'board.rle')
+    assert loaded.rule.table == board.rule.table
+
+
+def test_living_background_is_not_saved(tmp_path):
+    board = create_unbounded([(0, 0)])
+    board.rule = totalistic_rule({0, 3}, {2, 3})
+    board.next_gen()
+    assert board.background
+
+    with pytest.raises(formats.FormatError):
+        formats.save_pattern(board, str(tmp_path / 'board.rle'))
+
+
+@pytest.mark.parametrize('extension, text', [
+    ('.rle', '#C no header\nbo$2o!\n'),
+    ('.lif', '#Life 1.06\n0 0\n1 1\n2\n'),
+    ('.cells', '!Name: damaged\n.O.\nOO\n.x.\n'),
+])
+def test_damaged_file_leaves_empty_board(tmp_path, extension, text):
+    path = tmp_path / ('board' + extension)
+    path.write_text(text)
+
+    loaded = create_unbounded()
+    with pytest.raises(formats.FormatError):
+        formats.load_pattern(loaded, str(path))
+    assert list(loaded.living) == []
+
+
+@pytest.mark.parametrize('text, message', [
+    ('x = 3, y = 1\n3o!\n', 'The pattern does not fit on the board.'),
+    ('x = 1, y = 1, rule = B3/S23/Q\no!\n', 'Unsupported rule B3/S23/Q.'),
+])
+def test_error_of_a_text_file_is_reported(tmp_path, text, message):
+    path = tmp_path / 'board.rle'
+    path.write_text(text)
+
+    loaded = create_bounded(height=1, width=2)
+    with pytest.raises(formats.FormatError, match=message):
+        formats.load_pattern(loaded, str(path))
+    assert list(loaded.living) == []
+
+
+def test_damaged_binary_file_is_refused(tmp_path):
+    board = create_bounded(cells=random_cells(7, 0, 0, HEIGHT, WIDTH, 0.3))
+    path = tmp_path / 'board.gol'
+    formats.save_pattern(board, str(path))
+    with open(path, 'rb+') as f:
+        f.truncate(path.stat().st_size - 1)
+
+    assert not formats.load_pattern(create_bounded(), str(path))
@@ -0,0 +1,118 @@
+import random
+from core import Board
+from engines import SparseEngine
+from history import History
+from rules import totalistic_rule
+
+
+def create_board(rule=None) -> Board:
+    board = Board(SparseEngine())
+    board.empty_unbounded()
+    board.rule = rule if rule != None else totalistic_rule({3}, {2, 3})
+    generator = random.Random(0)
+    board.add_many([(i, j) for i in range(30) for j in range(30) if generator.random() < 0.4])
+    return board
+
+
+def run(board: Board, history: History, generations: int) -> dict:
+    """Step the board, followed by the history, and return its living cells by generation."""
+
+    history.follow(board)
+    states = {board.generation: set(board.living)}
+    for x in range(generations):
+        board.next_gen()
+        history.follow(board)
+        states[board.generation] = set(board.living)
+    return states
+
+
+def test_every_generation_is_rebuilt():
+    board = create_board()
+    history = History(keyframe_interval=8)
+    states = run(board, history, 50)
+
+    assert (history.oldest, history.newest) == (0, 50)
+    for generation, living in states.items():
+        snapshot = history.snapshot_at(generation)
+        assert snapshot.generation == generation
+        assert set(snapshot.living) == living
+    assert history.snapshot_at(51) == None
+
+
+def test_going_back_continues_the_history():
+    board = create_board()
+    history = History(keyframe_interval=8)
+    states = run(board, history, 30)
+
+    board.restore(history.snapshot_at(12))
+    history.follow(board)
+    assert set(board.living) == states[12]
+
+    # Generations after the restored one are computed again, older ones are kept
+    board.next_gen()
+    history.follow(board)
+    assert (history.oldest, history.newest) == (0, 13)
+    assert set(history.snapshot_at(13).living) == states[13]
+    assert set(history.snapshot_at(5).living) == states[5]
+
+
+def test_edit_starts_the_history_again():
+    board = create_board()
+    history = History()
+    run(board, history, 10)
+
+    board.add(100, 100)
+    history.follow(board)
+    assert (history.oldest, history.newest) == (10, 10)
+    assert (100, 100) in history.snapshot_at(10).living
+
+
+def test_jump_starts_the_history_again():
+    board = create_board()
+    history = History()
+    run(board, history, 10)
+
+    board.advance(5)
+    history.follow(board)
+    assert (history.oldest, history.newest) == (15, 15)
+
+
+def test_oldest_generations_are_evicted_up_to_a_keyframe():
+    board = create_board()
+    interval = 8
+    history = History(keyframe_interval=interval)
+    states = run(board, history, 100)
+    full_memory = history.memory
+
+    history.memory_limit = full_memory // 3
+    assert history.memory <= history.memory_limit
+    assert history.newest == 100
+    assert history.oldest > 0 and history.oldest % interval == 0
+    assert history.snapshot_at(history.oldest - 1) == None
+    for generation in range(history.oldest, history.newest + 1):
+        assert set(history.snapshot_at(generation).living) == states[generation]
+
+    # The history keeps its limit while it follows the board
+    states.update(run(board, history, 50))
+    assert history.memory <= history.memory_limit
+    assert set(history.snapshot_at(history.oldest).living) == states[history.oldest]
+
+
+def test_newest_keyframe_is_kept_over_the_limit():
+    board = create_board()
+    history = History(memory_limit=1, keyframe_interval=8)
+    states = run(board, history, 20)
+
+    assert history.oldest == 16
+    assert set(history.snapshot_at(20).living) == states[20]
+
+
+def test_background_is_recorded():
+    board = create_board(totalistic_rule({0, 3}, {2, 3}))
+    history = History(keyframe_interval=4)
+    run(board, history, 9)
+
+    for generation in range(10):
+        snapshot = history.snapshot_at(generation)
+        board.restore(snapshot)
+        assert board.background == generation % 2
@@ -0,0 +1,124 @@
+import random
+import pytest
+
+pytest.importorskip('PIL')     # gol quits without Pillow
+np = pytest.importorskip('numpy')   # Frames are updated incrementally only with NumPy
+from gol import Painter
+from core import Board
+from engines import BitEngine, SparseEngine
+from rules import totalistic_rule
+from topology import TORUS
+
+WIDTH, HEIGHT = 400, 300
+
+RULES = {
+    'life': totalistic_rule({3}, {2, 3}),
+    'highlife': totalistic_rule({3, 6}, {2, 3}),
+    'b0-alternating': totalistic_rule({0, 3}, {2, 3}),          # The background alternates
+    'b0-inverted': totalistic_rule({0, 1, 3}, {1, 4, 5, 8}),     # The background turns alive
+}
+
+
+def create_painter(board: Board, cell_size: float, minimap: bool = False) -> Painter:
+    painter = Painter()
+    painter.reset(WIDTH, HEIGHT, [cell_size], (0, 0, 0), (50, 50, 50))
+    painter.minimap = minimap
+    painter.resize(WIDTH, HEIGHT)
+    painter.board = board
+    return painter
+
+
+def create_board(rule_name: str, bounded: bool) -> Board:
+    """Return a board with a soup larger than the view, so that cells are cut off by its edges."""
+
+    if bounded:
+        board = Board(BitEngine())
+        board.empty_board(80, 100)
+        board.topology = TORUS
+        top, left = 0, 0
+    else:
+        board = Board(SparseEngine())
+        board.empty_unbounded()
+        top, left = -50, -50
+    board.rule = RULES[rule_name]
+    generator = random.Random(0)
+    board.add_many([(top + i, left + j) for i in range(80) for j in range(100)
+                    if generator.random() < 0.3])
+    return board
+
+
+def pixels_of(painter: Painter, full: bool = False) -> 'np.ndarray':
+    """Return pixels of the next frame, drawn whole if full is set."""
+
+    if full:
+        painter.zoom = 0       # The frame is drawn again after zooming
+    image = painter.render_frame()
+    assert image != None
+    return np.array(image)
+
+
+def assert_same_frames(incremental: Painter, full: Painter) -> None:
+    assert (pixels_of(incremental) == pixels_of(full, True)).all()
+
+
+@pytest.mark.parametrize('minimap', [False, True])
+@pytest.mark.parametrize('cell_size', [1, 5, 1 / 4])
+@pytest.mark.parametrize('bounded', [False, True])
+@pytest.mark.parametrize('rule_name', RULES)
+def test_incremental_frames_match_full_frames(rule_name, bounded, cell_size, minimap):
+    board = create_board(rule_name, bounded)
+    incremental = create_painter(board, cell_size, minimap)
+    full = create_painter(board, cell_size, minimap)
+
+    for x in range(10):
+        assert_same_frames(incremental, full)
+        board.next_gen()
+    assert_same_frames(incremental, full)
+
+
+@pytest.mark.parametrize('rule_name', RULES)
+def test_edits_are_drawn_incrementally(rule_name):
+    board = create_board(rule_name, False)
+    incremental = create_painter(board, 5)
+    full = create_painter(board, 5)
+
+    edits = [
+        lambda: board.add(0, 0),
+        lambda: board.remove(0, 0),
+        lambda: board.add_many([(i, -i) for i in range(-30, 30)]),
+        lambda: board.fill_rect(-10, -20, 15, 25),
+        lambda: board.invert_rect(-40, -45, 90, 90),
+        lambda: board.clear_rect(-5, -5, 3, 300),
+    ]
+    for edit in edits:
+        assert_same_frames(incremental, full)
+        edit()
+        assert_same_frames(incremental, full)
+        board.next_gen()
+
+
+def test_snapshots_are_drawn_incrementally():
+    board = create_board('life', False)
+    incremental = create_painter(board, 5)
+    full = create_painter(board, 5)
+
+    for x in range(10):
+        snapshot = board.snapshot()
+        incremental.snapshot = snapshot
+        full.snapshot = snapshot
+        assert_same_frames(incremental, full)
+        board.next_gen()
+
+
+def test_moved_view_is_drawn_again():
+    board = create_board('life', False)
+    incremental = create_painter(board, 5)
+    full = create_painter(board, 5)
+
+    assert_same_frames(incremental, full)
+    for x in range(5):
+        for painter in (incremental, full):
+            painter.move_view(1, -1)
+        assert_same_frames(incremental, full)
+        board.next_gen()
+        assert_same_frames(incremental, full)